@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Compares AltoBuilder.write_file() with a DOM-based conversion of the
+output of LineBoxBuilder to ALTO (xml.dom.minidom): throughput (words/s)
+and peak memory. Also measures the time needed to read the ALTO back.
+
+USAGE:
+ > python bench/bench_alto_write.py [repeat]
+"""
+
+import io
+import sys
+import time
+import tracemalloc
+import xml.dom.minidom
+
+from pyocr import builders
+
+import synthetic
+
+
+def _set_dimensions(element, position):
+    ((x1, y1), (x2, y2)) = position
+    element.setAttribute("HPOS", str(x1))
+    element.setAttribute("VPOS", str(y1))
+    element.setAttribute("WIDTH", str(x2 - x1))
+    element.setAttribute("HEIGHT", str(y2 - y1))
+
+
+def dom_write_file(file_descriptor, lines):
+    doc = xml.dom.minidom.getDOMImplementation().createDocument(
+        "http://www.loc.gov/standards/alto/ns-v3#", "alto", None
+    )
+    layout = doc.createElement("Layout")
+    doc.documentElement.appendChild(layout)
+    page = doc.createElement("Page")
+    layout.appendChild(page)
+    print_space = doc.createElement("PrintSpace")
+    page.appendChild(print_space)
+    for line in lines:
+        block = doc.createElement("TextBlock")
+        _set_dimensions(block, line.position)
+        print_space.appendChild(block)
+        text_line = doc.createElement("TextLine")
+        _set_dimensions(text_line, line.position)
+        block.appendChild(text_line)
+        for box in line.word_boxes:
+            string = doc.createElement("String")
+            _set_dimensions(string, box.position)
+            string.setAttribute("WC", "%.2f" % (box.confidence / 100.0))
+            string.setAttribute("CONTENT", box.content)
+            text_line.appendChild(string)
+    doc.writexml(file_descriptor)
+
+
+def bench(func, repeat):
+    tracemalloc.start()
+    start = time.time()
+    for _ in range(repeat):
+        result = func()
+    duration = (time.time() - start) / repeat
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (duration, peak, result)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    print("%-8s %12s %12s %12s %12s %12s" % (
+        "words", "DOM (w/s)", "DOM (MB)", "ALTO (w/s)", "ALTO (MB)",
+        "read (w/s)"
+    ))
+    for nb_lines in (10, 60, 300):
+        lines = synthetic.make_lines(nb_columns=2, nb_lines=nb_lines)
+        nb_words = sum(len(line.word_boxes) for line in lines)
+
+        def write(write_file):
+            output = io.StringIO()
+            write_file(output, lines)
+            return output.getvalue()
+
+        (dom_time, dom_peak, _) = bench(lambda: write(dom_write_file),
+                                        repeat)
+        (alto_time, alto_peak, alto) = bench(
+            lambda: write(builders.AltoBuilder.write_file), repeat
+        )
+        (read_time, _, result) = bench(
+            lambda: builders.AltoBuilder().read_file(io.StringIO(alto)),
+            repeat
+        )
+        assert result == lines
+        print("%-8d %12d %12.2f %12d %12.2f %12d" % (
+            nb_words, nb_words / dom_time, dom_peak / 1e6,
+            nb_words / alto_time, alto_peak / 1e6, nb_words / read_time
+        ))
+
+
+if __name__ == "__main__":
+    main()
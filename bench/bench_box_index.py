@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+Compares BoxIndex with going through all the boxes of a page: time needed
+to build the index, and to find the boxes in a rectangle, at a point, and
+the nearest boxes to a point.
+
+USAGE:
+ > python bench/bench_box_index.py [nb_queries]
+"""
+
+import heapq
+import random
+import sys
+import time
+
+from pyocr import builders
+
+import synthetic
+
+
+def linear_find_in_rect(boxes, position):
+    ((qx1, qy1), (qx2, qy2)) = position
+    return [
+        box for box in boxes
+        if box.position[0][0] <= qx2 and box.position[0][1] <= qy2 and
+        box.position[1][0] >= qx1 and box.position[1][1] >= qy1
+    ]
+
+
+def linear_find_at(boxes, point):
+    return linear_find_in_rect(boxes, (point, point))
+
+
+def linear_find_nearest(boxes, point, k=1):
+    (px, py) = point
+
+    def distance(idx):
+        ((x1, y1), (x2, y2)) = boxes[idx].position
+        dx = max(x1 - px, 0, px - x2)
+        dy = max(y1 - py, 0, py - y2)
+        return (dx * dx + dy * dy, idx)
+
+    return [boxes[idx] for idx in
+            heapq.nsmallest(k, range(len(boxes)), key=distance)]
+
+
+def bench(func, queries):
+    start = time.time()
+    results = [func(query) for query in queries]
+    return ((time.time() - start) / len(queries), results)
+
+
+def main():
+    nb_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rand = random.Random(0)
+
+    print("%-8s %-8s %14s %14s %8s" % (
+        "words", "query", "linear (us)", "index (us)", "speedup"
+    ))
+    for nb_lines in (50, 420, 2100):
+        lines = synthetic.make_lines(nb_columns=2, nb_lines=nb_lines)
+        boxes = [box for line in lines for box in line.word_boxes]
+        width = max(box.position[1][0] for box in boxes)
+        height = max(box.position[1][1] for box in boxes)
+
+        start = time.time()
+        index = builders.BoxIndex(boxes)
+        print("%-8d %-8s %14s %14.0f" % (
+            len(boxes), "build", "-", (time.time() - start) * 1e6
+        ))
+
+        points = [(rand.randint(0, width), rand.randint(0, height))
+                  for _ in range(nb_queries)]
+        rects = [((x, y), (x + 400, y + 200)) for (x, y) in points]
+        for (name, linear, indexed, queries) in (
+            ("rect", lambda rect: linear_find_in_rect(boxes, rect),
+             index.find_in_rect, rects),
+            ("point", lambda point: linear_find_at(boxes, point),
+             index.find_at, points),
+            ("nearest", lambda point: linear_find_nearest(boxes, point, 5),
+             lambda point: index.find_nearest(point, 5), points),
+        ):
+            (linear_time, expected) = bench(linear, queries)
+            (index_time, result) = bench(indexed, queries)
+            assert result == expected
+            print("%-8d %-8s %14.0f %14.0f %7.1fx" % (
+                len(boxes), name, linear_time * 1e6, index_time * 1e6,
+                linear_time / index_time
+            ))
+
+
+if __name__ == "__main__":
+    main()
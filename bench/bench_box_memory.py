@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Measures the memory used per word by the word boxes of dense pages:
+Box objects (with and without __slots__) and BoxArray.
+
+Requires Python >= 3.4 (tracemalloc).
+
+USAGE:
+ > python3 bench/bench_box_memory.py [nb_pages]
+"""
+
+import sys
+import tracemalloc
+
+from pyocr import builders
+
+import synthetic
+
+
+class DictBox(object):
+    """
+    Same attributes as builders.Box, without __slots__ (PyOCR <= 0.5)
+    """
+    def __init__(self, content, position, confidence=0):
+        self.content = content
+        self.position = position
+        self.confidence = confidence
+
+
+def get_words(nb_pages):
+    for page in range(nb_pages):
+        for line in synthetic.make_lines(nb_columns=2, nb_lines=60,
+                                         seed=page):
+            for box in line.word_boxes:
+                # each page is parsed separately: equal strings and
+                # positions are distinct objects, as they would be
+                yield (u"%s" % box.content[:], box.position,
+                       box.confidence)
+
+
+def measure(build, words):
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    result = build(words)
+    end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = end.compare_to(start, "filename")
+    size = sum(stat.size_diff for stat in stats)
+    return (result, size)
+
+
+def build_dict_boxes(words):
+    return [DictBox(content, ((x1, y1), (x2, y2)), confidence)
+            for (content, ((x1, y1), (x2, y2)), confidence) in words]
+
+
+def build_boxes(words):
+    return [builders.Box(content, ((x1, y1), (x2, y2)), confidence)
+            for (content, ((x1, y1), (x2, y2)), confidence) in words]
+
+
+def build_box_array(words):
+    boxes = builders.BoxArray()
+    for (content, position, confidence) in words:
+        boxes.add(content, position, confidence)
+    return boxes
+
+
+def main():
+    nb_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    words = list(get_words(nb_pages))
+    print("%d words" % len(words))
+    print("%-24s %14s %14s" % ("storage", "total (KB)", "bytes/word"))
+    for (name, build) in (("Box without __slots__", build_dict_boxes),
+                          ("Box", build_boxes),
+                          ("BoxArray", build_box_array)):
+        (result, size) = measure(build, words)
+        assert len(result) == len(words)
+        print("%-24s %14.1f %14.1f" % (name, size / 1024.0,
+                                       size / float(len(words))))
+        del result
+
+
+if __name__ == "__main__":
+    main()
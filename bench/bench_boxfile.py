@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Compares the size and speed of the ways to store the output of
+LineBoxBuilder: hOCR (write_file() / read_file()), pickle and
+pyocr.boxfile.
+
+USAGE:
+ > python bench/bench_boxfile.py [nb_pages]
+"""
+
+import io
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+
+from pyocr import boxfile
+from pyocr import builders
+
+import synthetic
+
+
+def timed(func, *args):
+    start = time.time()
+    result = func(*args)
+    return (time.time() - start, result)
+
+
+def bench_hocr(pages):
+    def write():
+        outputs = []
+        for page in pages:
+            output = io.StringIO()
+            builders.LineBoxBuilder.write_file(output, page)
+            outputs.append(output.getvalue().encode("utf-8"))
+        return outputs
+
+    def read(outputs):
+        builder = builders.LineBoxBuilder()
+        return [builder.read_file(io.StringIO(output.decode("utf-8")))
+                for output in outputs]
+
+    (write_time, outputs) = timed(write)
+    (read_time, _) = timed(read, outputs)
+    return (sum(len(output) for output in outputs), write_time, read_time)
+
+
+def bench_pickle(pages):
+    (write_time, data) = timed(pickle.dumps, pages, pickle.HIGHEST_PROTOCOL)
+    (read_time, _) = timed(pickle.loads, data)
+    return (len(data), write_time, read_time)
+
+
+def bench_boxfile(pages):
+    (write_time, data) = timed(boxfile.dumps, pages)
+    (read_time, _) = timed(boxfile.loads, data)
+    return (len(data), write_time, read_time)
+
+
+def bench_random_access(pages, nb_accesses):
+    rand = random.Random(0)
+    (file_descriptor, path) = tempfile.mkstemp(suffix=".box")
+    try:
+        with os.fdopen(file_descriptor, 'wb') as output:
+            boxfile.dump(pages, output)
+        start = time.time()
+        with boxfile.BoxFile(path) as box_file:
+            for _ in range(nb_accesses):
+                page_idx = rand.randrange(len(box_file))
+                line_idx = rand.randrange(box_file.get_nb_lines(page_idx))
+                box_file.get_line(page_idx, line_idx)
+        return (time.time() - start) / nb_accesses
+    finally:
+        os.remove(path)
+
+
+def main():
+    nb_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    pages = [synthetic.make_lines(nb_columns=2, nb_lines=60, seed=page)
+             for page in range(nb_pages)]
+    nb_words = sum(len(line.word_boxes) for page in pages for line in page)
+    print("%d pages, %d words" % (nb_pages, nb_words))
+
+    print("%-10s %12s %12s %14s %14s" % (
+        "format", "size (KB)", "bytes/word", "write (w/s)", "read (w/s)"
+    ))
+    for (name, bench) in (("hOCR", bench_hocr),
+                          ("pickle", bench_pickle),
+                          ("boxfile", bench_boxfile)):
+        (size, write_time, read_time) = bench(pages)
+        print("%-10s %12.1f %12.1f %14d %14d" % (
+            name, size / 1024.0, size / float(nb_words),
+            nb_words / write_time, nb_words / read_time
+        ))
+
+    print("boxfile random access to a line: %.1f us" % (
+        bench_random_access(pages, 1000) * 1e6
+    ))
+
+
+if __name__ == "__main__":
+    main()
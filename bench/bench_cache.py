@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+Measures pyocr.cache on a page scanned at 300 dpi: time needed to compute
+the key (hash of the pixels), to store a result and to read it back, and
+size of the results in the cache. If Tesseract is available, also measures
+tesseract.image_to_string() without cache, on a miss, and on a hit.
+
+For the in-memory EventCache (Libtesseract), measures the time needed to
+store the events of the page and to replay them into each builder.
+
+USAGE:
+ > python bench/bench_cache.py [repeat]
+"""
+
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+
+from PIL import Image
+from PIL import ImageDraw
+
+from pyocr import builders
+from pyocr import cache
+from pyocr import tesseract
+
+import synthetic
+
+PAGE_SIZE = (2480, 3508)  # A4, 300 dpi
+
+
+class FakeTool(object):
+    """
+    Same key as Tesseract, without running it
+    """
+    @staticmethod
+    def get_name():
+        return "Tesseract (sh)"
+
+    @staticmethod
+    def get_version():
+        return (4, 1, 1)
+
+
+def make_page(lines):
+    image = Image.new("L", PAGE_SIZE, 255)
+    draw = ImageDraw.Draw(image)
+    for line in lines:
+        for box in line.word_boxes:
+            draw.text(box.position[0], box.content, fill=0)
+    return image
+
+
+def make_events(lines):
+    events = []
+    for line in lines:
+        events.append(("start_line", line.position))
+        for box in line.word_boxes:
+            events.append(("add_word", box.content, box.position,
+                           box.confidence))
+        events.append(("end_line",))
+    return events
+
+
+def replay(event_cache, key, builder):
+    for event in event_cache.get(key):
+        getattr(builder, event[0])(*event[1:])
+    return builder.get_output()
+
+
+def timed(repeat, func, *args):
+    start = time.time()
+    for _ in range(repeat):
+        result = func(*args)
+    return ((time.time() - start) / repeat, result)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    lines = synthetic.make_lines()
+    page = make_page(lines)
+    builder = builders.LineBoxBuilder()
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        result_cache = cache.ResultCache(os.path.join(tmp_dir, "bench.db"))
+
+        (key_time, (key, _)) = timed(repeat, result_cache.get_key, FakeTool,
+                                     page, "eng", builder)
+        (put_time, _) = timed(repeat, result_cache.put, key, lines)
+        (get_time, result) = timed(repeat, result_cache.get, key)
+        assert result == lines
+        print("%d lines, %d words on a %dx%d page" % (
+            len(lines), sum(len(line.word_boxes) for line in lines),
+            PAGE_SIZE[0], PAGE_SIZE[1]
+        ))
+        print("key: %.1f ms, put: %.1f ms, get: %.1f ms" % (
+            key_time * 1000, put_time * 1000, get_time * 1000
+        ))
+        print("result: %d bytes pickled, %d bytes in the cache" % (
+            len(pickle.dumps(lines, cache.PICKLE_PROTOCOL)),
+            result_cache.get_size()[1]
+        ))
+
+        event_cache = cache.EventCache()
+        events = make_events(lines)
+        (key, _) = event_cache.get_key(FakeTool, page, "eng", builder)
+        (put_time, _) = timed(repeat, event_cache.put, key, events)
+        print("events: %d bytes in memory, put: %.1f ms" % (
+            event_cache.size, put_time * 1000
+        ))
+        for builder_type in (builders.TextBuilder, builders.WordBoxBuilder,
+                             builders.LineBoxBuilder):
+            (replay_time, _) = timed(
+                repeat, lambda: replay(event_cache, key, builder_type())
+            )
+            print("replay into %s: %.1f ms" % (
+                builder_type.__name__, replay_time * 1000
+            ))
+
+        if not tesseract.is_available():
+            print("Tesseract not available: end-to-end times skipped")
+            return
+        result_cache.clear()
+        (ocr_time, expected) = timed(1, tesseract.image_to_string, page,
+                                     "eng", builder)
+        cache.set_cache(result_cache)
+        (miss_time, _) = timed(1, tesseract.image_to_string, page, "eng",
+                               builder)
+        (hit_time, result) = timed(repeat, tesseract.image_to_string, page,
+                                   "eng", builder)
+        cache.set_cache(None)
+        assert result == expected
+        print("tesseract: %.0f ms, miss: %.0f ms, hit: %.1f ms (%.0fx)" % (
+            ocr_time * 1000, miss_time * 1000, hit_time * 1000,
+            ocr_time / hit_time
+        ))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""
+Compares the time needed to read and write Tesseract box files
+(CharBoxBuilder) line by line (PyOCR <= 0.5) and column by column
+(CharBoxBuilder.read_box_array() / write_box_array()).
+
+USAGE:
+ > python bench/bench_char_boxes.py [repeat]
+"""
+
+import io
+import sys
+import time
+
+from pyocr import builders
+from pyocr import tesseract
+
+import synthetic
+
+
+def legacy_read(file_descriptor):
+    boxes = []
+    for line in file_descriptor.readlines():
+        line = line.strip()
+        if line == "":
+            continue
+        elements = line.split(" ")
+        if len(elements) < 6:
+            continue
+        position = ((int(elements[1]), int(elements[2])),
+                    (int(elements[3]), int(elements[4])))
+        boxes.append(builders.Box(elements[0], position))
+    return boxes
+
+
+def legacy_write(file_descriptor, boxes):
+    for box in boxes:
+        file_descriptor.write(u"%s %d %d %d %d 0\n" % (
+            box.content, box.position[0][0], box.position[0][1],
+            box.position[1][0], box.position[1][1]
+        ))
+
+
+def make_box_file(nb_chars):
+    lines = synthetic.make_lines(nb_columns=2, nb_lines=nb_chars // 600 + 1,
+                                 nb_words=50)
+    output = io.StringIO()
+    nb_written = 0
+    for line in lines:
+        for box in line.word_boxes:
+            ((x1, y1), (x2, y2)) = box.position
+            for char in box.content:
+                if nb_written >= nb_chars:
+                    return output.getvalue()
+                output.write(u"%s %d %d %d %d 0\n" % (char, x1, y1, x2, y2))
+                x1 += 10
+                nb_written += 1
+    return output.getvalue()
+
+
+def bench(func, repeat):
+    start = time.time()
+    for _ in range(repeat):
+        result = func()
+    return ((time.time() - start) / repeat, result)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    print("%-8s %-6s %14s %14s %8s" % (
+        "lines", "op", "legacy (l/s)", "columns (l/s)", "speedup"
+    ))
+    for nb_chars in (1000, 30000, 300000):
+        data = make_box_file(nb_chars)
+        (legacy_time, boxes) = bench(
+            lambda: legacy_read(io.StringIO(data)), repeat
+        )
+        (new_time, box_array) = bench(
+            lambda: tesseract.CharBoxBuilder.read_box_array(
+                io.StringIO(data)
+            ), repeat
+        )
+        assert box_array.to_boxes() == boxes
+        print("%-8d %-6s %14.0f %14.0f %7.1fx" % (
+            nb_chars, "read", nb_chars / legacy_time, nb_chars / new_time,
+            legacy_time / new_time
+        ))
+
+        (legacy_time, _) = bench(
+            lambda: legacy_write(io.StringIO(), boxes), repeat
+        )
+        (new_time, _) = bench(
+            lambda: tesseract.CharBoxBuilder.write_box_array(
+                io.StringIO(), box_array
+            ), repeat
+        )
+        print("%-8d %-6s %14.0f %14.0f %7.1fx" % (
+            nb_chars, "write", nb_chars / legacy_time, nb_chars / new_time,
+            legacy_time / new_time
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Compares pyocr.document.iter_results() with splitting a multi-page TIFF
+with Pillow first and then running the OCR page by page: total time and
+peak memory (RSS of a child process for each method).
+
+The OCR is simulated (it sleeps for a fixed time, like waiting for
+Tesseract), so that only the decoding and the memory are measured.
+
+USAGE:
+ > python bench/bench_document.py [nb_pages] [ocr_time_ms]
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from PIL import Image
+from PIL import ImageDraw
+
+PAGE_SIZE = (2480, 3508)  # A4, 300 dpi
+
+
+class FakeTool(object):
+    def __init__(self, ocr_time):
+        self.ocr_time = ocr_time
+
+    def image_to_string(self, image, lang=None, builder=None):
+        time.sleep(self.ocr_time)
+        return image.getpixel((0, 0))
+
+
+def make_document(path, nb_pages):
+    pages = []
+    for page_idx in range(nb_pages):
+        page = Image.new("RGB", PAGE_SIZE, (255, 255, 255))
+        draw = ImageDraw.Draw(page)
+        for line_idx in range(100):
+            draw.text((100, 100 + 30 * line_idx),
+                      "page %d line %d " % (page_idx, line_idx) * 8,
+                      fill=(0, 0, 0))
+        pages.append(page)
+    pages[0].save(path, save_all=True, append_images=pages[1:],
+                  compression="tiff_lzw")
+
+
+def run_split(path, tool):
+    image = Image.open(path)
+    pages = []
+    for frame_idx in range(image.n_frames):
+        image.seek(frame_idx)
+        pages.append(image.copy())
+    return [tool.image_to_string(page) for page in pages]
+
+
+def run_document(path, tool):
+    from pyocr import document
+    return list(document.iter_results(tool, path))
+
+
+def child(method, path, ocr_time):
+    tool = FakeTool(ocr_time)
+    start = time.time()
+    {"split": run_split, "document": run_document}[method](path, tool)
+    # ru_maxrss: kB on Linux
+    print("%f %d" % (time.time() - start,
+                     resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+def main():
+    nb_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    ocr_time = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.2
+    (fd, path) = tempfile.mkstemp(suffix=".tiff")
+    os.close(fd)
+    try:
+        # in a child process too: ru_maxrss of the children includes the
+        # RSS of the parent
+        subprocess.check_call([sys.executable, __file__, "--make", path,
+                               str(nb_pages)])
+        print("%d pages of %dx%d (%.1f MB), OCR: %d ms per page" % (
+            nb_pages, PAGE_SIZE[0], PAGE_SIZE[1],
+            os.path.getsize(path) / 1e6, ocr_time * 1000
+        ))
+        print("%-10s %10s %14s" % ("method", "time (s)", "peak RSS (MB)"))
+        for method in ("split", "document"):
+            output = subprocess.check_output([
+                sys.executable, __file__, "--child", method, path,
+                str(ocr_time)
+            ])
+            (total_time, peak) = output.split()
+            print("%-10s %10.2f %14.0f" % (method, float(total_time),
+                                           int(peak) / 1024.0))
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3], float(sys.argv[4]))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--make":
+        make_document(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""
+Compares pyocr.geometry (NumPy) with Python loops over Box.position:
+scaling the boxes of a page, IoU matrix, and non-maximum suppression.
+
+USAGE:
+ > python bench/bench_geometry.py [repeat]
+"""
+
+import sys
+import time
+
+from pyocr import builders
+from pyocr import geometry
+
+import synthetic
+
+
+def loop_scale(boxes, factor):
+    return [
+        builders.Box(box.content, (
+            (int(round(box.position[0][0] * factor)),
+             int(round(box.position[0][1] * factor))),
+            (int(round(box.position[1][0] * factor)),
+             int(round(box.position[1][1] * factor)))
+        ), box.confidence)
+        for box in boxes
+    ]
+
+
+def _iou(position_a, position_b):
+    ((ax1, ay1), (ax2, ay2)) = position_a
+    ((bx1, by1), (bx2, by2)) = position_b
+    inter = (max(min(ax2, bx2) - max(ax1, bx1), 0) *
+             max(min(ay2, by2) - max(ay1, by1), 0))
+    total = (ax2 - ax1) * (ay2 - ay1) + (bx2 - bx1) * (by2 - by1) - inter
+    return float(inter) / total if total > 0 else 0.0
+
+
+def loop_iou_matrix(boxes):
+    return [[_iou(box_a.position, box_b.position) for box_b in boxes]
+            for box_a in boxes]
+
+
+def loop_nms(boxes, max_iou=0.5):
+    order = sorted(range(len(boxes)), key=lambda idx: -boxes[idx].confidence)
+    kept = []
+    for idx in order:
+        if all(_iou(boxes[idx].position, boxes[other].position) <= max_iou
+               for other in kept):
+            kept.append(idx)
+    return kept
+
+
+def bench(func, repeat):
+    start = time.time()
+    for _ in range(repeat):
+        result = func()
+    return ((time.time() - start) / repeat, result)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    lines = synthetic.make_lines(nb_columns=2, nb_lines=420)
+    words = [box for line in lines for box in line.word_boxes]
+    # each word twice, as if found by two passes of OCR
+    candidates = words[:1000] + [
+        builders.Box(box.content, ((box.position[0][0] + 2,
+                                    box.position[0][1] + 1),
+                                   (box.position[1][0] + 2,
+                                    box.position[1][1] + 1)),
+                     box.confidence - 10)
+        for box in words[:1000]
+    ]
+    box_array = builders.BoxArray(words)
+    positions = geometry.to_array(words)
+    candidate_positions = geometry.to_array(candidates)
+
+    print("%-22s %-8s %12s %12s %8s" % (
+        "operation", "boxes", "loop (ms)", "numpy (ms)", "speedup"
+    ))
+    for (name, nb_boxes, loop, vectorized) in (
+        ("scale", len(words), lambda: loop_scale(words, 0.5),
+         lambda: geometry.transform(words, geometry.scaling(0.5))),
+        ("scale (BoxArray)", len(words), lambda: loop_scale(words, 0.5),
+         lambda: geometry.transform(box_array, geometry.scaling(0.5))),
+        ("scale (positions)", len(words), None,
+         lambda: geometry.transform_positions(positions,
+                                              geometry.scaling(0.5))),
+        ("IoU matrix", 1000, lambda: loop_iou_matrix(words[:1000]),
+         lambda: geometry.iou_matrix(positions[:1000])),
+        ("NMS", len(candidates), lambda: loop_nms(candidates),
+         lambda: geometry.nms(candidate_positions,
+                              [box.confidence for box in candidates])),
+    ):
+        (numpy_time, result) = bench(vectorized, repeat)
+        if loop is None:
+            print("%-22s %-8d %12s %12.2f" % (
+                name, nb_boxes, "-", numpy_time * 1000
+            ))
+            continue
+        (loop_time, expected) = bench(loop, repeat)
+        if name == "NMS":
+            assert sorted(result.tolist()) == sorted(expected)
+        elif name.startswith("scale"):
+            assert list(result) == expected
+        print("%-22s %-8d %12.2f %12.2f %7.1fx" % (
+            name, nb_boxes, loop_time * 1000, numpy_time * 1000,
+            loop_time / numpy_time
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""
+Compares the time needed to parse the hOCR output of Tesseract with the
+HTMLParser-based parsers (previous behaviour of the builders: the
+Tesseract-style parser, then the Cuneiform-style one) and with the
+builders themselves (expat-based parser).
+
+USAGE:
+ > python bench/bench_hocr_parse.py [repeat]
+"""
+
+import io
+import sys
+import time
+
+from pyocr import builders
+
+import synthetic
+
+
+def parse_legacy(hocr):
+    for parser in (builders._WordHTMLParser(), builders._LineHTMLParser()):
+        parser.feed(hocr)
+        if len(parser.boxes) > 0:
+            return parser.boxes
+    return []
+
+
+def parse_builder(hocr):
+    return builders.WordBoxBuilder().read_file(io.StringIO(hocr))
+
+
+def bench(parse, hocr, repeat):
+    start = time.time()
+    for _ in range(repeat):
+        result = parse(hocr)
+    return ((time.time() - start) / repeat, len(result))
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print("%-8s %10s %14s %14s %8s %12s" % (
+        "words", "size (KB)", "legacy (ms)", "builder (ms)", "speedup",
+        "words/s"
+    ))
+    for (nb_columns, nb_lines) in ((1, 10), (2, 60), (3, 300), (4, 600)):
+        lines = synthetic.make_lines(nb_columns=nb_columns,
+                                     nb_lines=nb_lines)
+        nb_words = sum(len(line.word_boxes) for line in lines)
+        hocr = synthetic.to_hocr(lines)
+        (legacy_time, nb_legacy) = bench(parse_legacy, hocr, repeat)
+        (builder_time, nb_boxes) = bench(parse_builder, hocr, repeat)
+        assert nb_legacy == nb_boxes == nb_words
+        print("%-8d %10.1f %14.2f %14.2f %7.1fx %12d" % (
+            nb_words, len(hocr) / 1024.0, legacy_time * 1000,
+            builder_time * 1000, legacy_time / builder_time,
+            nb_words / builder_time
+        ))
+
+
+if __name__ == "__main__":
+    main()
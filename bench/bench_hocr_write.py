@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""
+Compares the throughput (boxes/s) of WordBoxBuilder.write_file() and
+LineBoxBuilder.write_file() with their xml.dom.minidom-based implementation
+of PyOCR <= 0.5, and checks that both write the same bytes.
+
+USAGE:
+ > python bench/bench_hocr_write.py [repeat]
+"""
+
+import io
+import sys
+import time
+import xml.dom.minidom
+
+from pyocr import builders
+
+import synthetic
+
+
+def legacy_write_file(file_descriptor, boxes):
+    impl = xml.dom.minidom.getDOMImplementation()
+    newdoc = impl.createDocument(None, "root", None)
+
+    file_descriptor.write(builders._XHTML_HEADER)
+    file_descriptor.write(u"<body>\n")
+    for box in boxes:
+        xml_str = u"%s" % box.get_xml_tag(newdoc).toxml()
+        file_descriptor.write(u"<p>" + xml_str + u"</p>\n")
+    file_descriptor.write(u"</body>\n</html>\n")
+
+
+def bench(write_file, boxes, repeat):
+    start = time.time()
+    for _ in range(repeat):
+        output = io.StringIO()
+        write_file(output, boxes)
+    return ((time.time() - start) / repeat, output.getvalue())
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    print("%-8s %-16s %14s %14s %8s" % (
+        "words", "builder", "legacy (w/s)", "current (w/s)", "speedup"
+    ))
+    for nb_lines in (10, 60, 300):
+        lines = synthetic.make_lines(nb_columns=2, nb_lines=nb_lines)
+        words = [box for line in lines for box in line.word_boxes]
+        for (builder, boxes) in ((builders.WordBoxBuilder, words),
+                                 (builders.LineBoxBuilder, lines)):
+            (legacy_time, legacy_output) = bench(legacy_write_file, boxes,
+                                                 repeat)
+            (current_time, output) = bench(builder.write_file, boxes,
+                                           repeat)
+            assert output == legacy_output
+            print("%-8d %-16s %14d %14d %7.1fx" % (
+                len(words), builder.__name__, len(words) / legacy_time,
+                len(words) / current_time, legacy_time / current_time
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Compares the intermediate image formats used to hand images over to the
+shell tools (see pyocr.util.IMAGE_FORMATS).
+
+For each image of tests/input (as-is, converted to grayscale and converted
+to bilevel), measures the encoding time and the size of each format. If
+Tesseract is available, also measures the end-to-end time of
+tesseract.image_to_string().
+
+USAGE:
+ > python bench/bench_image_formats.py [repeat]
+"""
+
+import io
+import os
+import sys
+import time
+
+from PIL import Image
+
+from pyocr import tesseract
+from pyocr import util
+
+INPUT_DIRS = [
+    os.path.join("tests", "input", "specific"),
+    os.path.join("tests", "input", "real"),
+]
+
+
+def get_images():
+    for input_dir in INPUT_DIRS:
+        for file_name in sorted(os.listdir(input_dir)):
+            img = Image.open(os.path.join(input_dir, file_name))
+            img.load()
+            yield ("%s (%s)" % (file_name, img.mode), img)
+            if img.mode != "L":
+                yield ("%s (L)" % file_name, img.convert("L"))
+            if img.mode != "1":
+                yield ("%s (1)" % file_name, img.convert("1"))
+
+
+def bench_encoding(img, image_format, repeat):
+    (img, fmt) = util.choose_image_format(img, image_format)
+    start = time.time()
+    for _ in range(repeat):
+        output = io.BytesIO()
+        util.save_image(img, fmt, output)
+    return ((time.time() - start) / repeat, len(output.getvalue()), fmt)
+
+
+def bench_tesseract(img, image_format, repeat):
+    tesseract.IMAGE_FORMAT = image_format
+    start = time.time()
+    for _ in range(repeat):
+        tesseract.image_to_string(img)
+    return (time.time() - start) / repeat
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    has_tesseract = tesseract.is_available()
+    formats = [None] + sorted(util.IMAGE_FORMATS.keys())
+
+    print("%-32s %-8s %-8s %10s %12s %10s" % (
+        "image", "format", "used", "size (KB)", "encode (ms)", "ocr (ms)"
+    ))
+    for (name, img) in get_images():
+        for image_format in formats:
+            (encode_time, size, fmt) = bench_encoding(img, image_format,
+                                                      repeat)
+            ocr_time = "-"
+            if has_tesseract:
+                ocr_time = "%.1f" % (
+                    bench_tesseract(img, image_format, repeat) * 1000
+                )
+            print("%-32s %-8s %-8s %10.1f %12.2f %10s" % (
+                name, image_format or "auto", fmt.extension, size / 1024.0,
+                encode_time * 1000, ocr_time
+            ))
+
+
+if __name__ == "__main__":
+    main()
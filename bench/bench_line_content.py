@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Measures how TextBuilder and LineBox.content scale with the length of the
+lines, compared with their implementation in PyOCR <= 0.5 (string
+concatenation). Time per word must stay constant.
+
+USAGE:
+ > python bench/bench_line_content.py [nb_accesses]
+"""
+
+import sys
+import time
+
+from pyocr import builders
+
+POSITION = ((0, 0), (10, 10))
+
+
+class LegacyTextBuilder(builders.TextBuilder):
+    def start_line(self, box):
+        self.built_text.append(u"")
+
+    def add_word(self, word, box, confidence=0):
+        if self.built_text[-1] != u"":
+            self.built_text[-1] += u" "
+        self.built_text[-1] += word
+
+    def end_line(self):
+        pass
+
+    def get_output(self):
+        return u"\n".join(self.built_text)
+
+
+class LegacyLineBox(builders.LineBox):
+    __slots__ = ()
+
+    def __get_content(self):
+        txt = u""
+        for box in self.word_boxes:
+            txt += box.content + u" "
+        txt = txt.strip()
+        return txt
+
+    content = property(__get_content)
+
+
+def bench_text_builder(builder, nb_words):
+    start = time.time()
+    builder.start_line(POSITION)
+    for word_idx in range(nb_words):
+        builder.add_word(u"word%d" % word_idx, POSITION)
+    builder.end_line()
+    builder.get_output()
+    return time.time() - start
+
+
+def bench_line_content(line_cls, nb_words, nb_accesses):
+    start = time.time()
+    line = line_cls([], POSITION)
+    for word_idx in range(nb_words):
+        line.word_boxes.append(builders.Box(u"word%d" % word_idx, POSITION))
+    for _ in range(nb_accesses):
+        line.content
+    return time.time() - start
+
+
+def main():
+    nb_accesses = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    print("%-8s %-24s %14s %14s" % (
+        "words", "test", "legacy (us/w)", "current (us/w)"
+    ))
+    for nb_words in (1000, 10000, 100000):
+        legacy = bench_text_builder(LegacyTextBuilder(), nb_words)
+        current = bench_text_builder(builders.TextBuilder(), nb_words)
+        print("%-8d %-24s %14.2f %14.2f" % (
+            nb_words, "TextBuilder", legacy * 1e6 / nb_words,
+            current * 1e6 / nb_words
+        ))
+        legacy = bench_line_content(LegacyLineBox, nb_words, nb_accesses)
+        current = bench_line_content(builders.LineBox, nb_words,
+                                     nb_accesses)
+        print("%-8d %-24s %14.2f %14.2f" % (
+            nb_words, "LineBox.content x%d" % nb_accesses,
+            legacy * 1e6 / nb_words, current * 1e6 / nb_words
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Rebuilds the lines of multi-column pages from their word boxes alone
+(builders.build_lines()), and compares the reading order with sorting the
+lines top to bottom (sorted()): time, and lines at their right place.
+
+USAGE:
+ > python bench/bench_reading_order.py [repeat]
+"""
+
+import random
+import sys
+import time
+
+from pyocr import builders
+
+import synthetic
+
+
+def bench(func, repeat):
+    start = time.time()
+    for _ in range(repeat):
+        result = func()
+    return ((time.time() - start) / repeat, result)
+
+
+def nb_in_place(lines, expected):
+    return sum(1 for (line, expected_line) in zip(lines, expected)
+               if line.content == expected_line.content)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    print("%-8s %-8s %14s %12s %14s %12s" % (
+        "columns", "words", "sorted() (ms)", "in place", "build (ms)",
+        "in place"
+    ))
+    for (nb_columns, nb_lines) in ((1, 60), (2, 60), (3, 80), (4, 400)):
+        expected = synthetic.make_columns(nb_columns, nb_lines)
+        words = [box for line in expected for box in line.word_boxes]
+        random.Random(0).shuffle(words)
+
+        (sort_time, lines) = bench(lambda: sorted(expected), repeat)
+        sorted_ok = nb_in_place(lines, expected)
+        (build_time, lines) = bench(lambda: builders.build_lines(words),
+                                    repeat)
+        build_ok = nb_in_place(lines, expected)
+        print("%-8d %-8d %14.2f %5d / %-4d %14.2f %5d / %-4d" % (
+            nb_columns, len(words), sort_time * 1000, sorted_ok,
+            len(expected), build_time * 1000, build_ok, len(expected)
+        ))
+
+
+if __name__ == "__main__":
+    main()
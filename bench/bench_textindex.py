@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+Compares pyocr.textindex with going through the word boxes of every page
+for each query: time needed to build the index, size of the index, and
+query latency (word, prefix, phrase) on many pages.
+
+The linear scan is measured on the first pages only and extrapolated to
+all of them.
+
+USAGE:
+ > python bench/bench_textindex.py [nb_pages]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from pyocr import builders
+from pyocr import textindex
+
+NB_WORDS_PER_PAGE = 250
+NB_LINEAR_PAGES = 2000
+VOCABULARY_SIZE = 50000
+
+
+def make_vocabulary(rand):
+    vocabulary = set()
+    while len(vocabulary) < VOCABULARY_SIZE:
+        vocabulary.add(u"".join(
+            rand.choice(u"abcdefghijklmnopqrstuvwxyz\xe9")
+            for _ in range(rand.randint(2, 10))
+        ))
+    vocabulary = sorted(vocabulary)
+    rand.shuffle(vocabulary)
+    return vocabulary
+
+
+def make_pages(nb_pages, vocabulary, seed=0):
+    """
+    Yields pages of word boxes. Word frequencies follow Zipf's law, like in
+    real text.
+    """
+    rand = random.Random(seed)
+    weights = [1.0 / rank for rank in range(1, len(vocabulary) + 1)]
+    for _ in range(nb_pages):
+        contents = rand.choices(vocabulary, weights, k=NB_WORDS_PER_PAGE)
+        yield [builders.Box(content, ((10 * idx, 0), (10 * idx + 8, 20)))
+               for (idx, content) in enumerate(contents)]
+
+
+def linear_search(pages, query):
+    tokens = textindex.tokenize(query)
+    hits = []
+    for (page_idx, boxes) in enumerate(pages):
+        page_tokens = [(word_idx, token)
+                       for (word_idx, box) in enumerate(boxes)
+                       for token in textindex.tokenize(box.content)]
+        for idx in range(len(page_tokens) - len(tokens) + 1):
+            if all(page_tokens[idx + offset][1] == token
+                   for (offset, token) in enumerate(tokens)):
+                hits.append((page_idx, page_tokens[idx][0],
+                             page_tokens[idx + len(tokens) - 1][0]))
+    return hits
+
+
+def timed(func, *args):
+    start = time.time()
+    result = func(*args)
+    return (time.time() - start, result)
+
+
+def main():
+    nb_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rand = random.Random(0)
+    vocabulary = make_vocabulary(rand)
+
+    writer = textindex.IndexWriter()
+    (build_time, _) = timed(
+        lambda: [writer.add_page(page)
+                 for page in make_pages(nb_pages, vocabulary)]
+    )
+    (fd, path) = tempfile.mkstemp(suffix=".idx")
+    os.close(fd)
+    try:
+        with open(path, 'wb') as file_descriptor:
+            (write_time, _) = timed(writer.write, file_descriptor)
+        writer = None
+        print("%d pages, %d words: indexed in %.1fs, written in %.1fs,"
+              " %.1f MB" % (
+                  nb_pages, nb_pages * NB_WORDS_PER_PAGE, build_time,
+                  write_time, os.path.getsize(path) / 1e6
+              ))
+
+        linear_pages = list(make_pages(min(nb_pages, NB_LINEAR_PAGES),
+                                       vocabulary))
+        # the phrases are taken from the pages
+        phrase_2 = u" ".join(box.content for box in linear_pages[0][10:12])
+        phrase_3 = u" ".join(box.content for box in linear_pages[0][20:23])
+        queries = [
+            ("common word", vocabulary[0]),
+            ("rare word", vocabulary[5000]),
+            ("phrase (2)", phrase_2),
+            ("phrase (3)", phrase_3),
+        ]
+
+        print("%-12s %8s %14s %12s %8s" % (
+            "query", "hits", "linear (ms)", "index (ms)", "speedup"
+        ))
+        with textindex.TextIndex(path) as index:
+            for (name, query) in queries:
+                (linear_time, expected) = timed(linear_search, linear_pages,
+                                                query)
+                linear_time *= float(nb_pages) / len(linear_pages)
+                (index_time, hits) = timed(index.search, query)
+                assert hits[:len(expected)] == expected
+                print("%-12s %8d %14.1f %12.3f %7.0fx" % (
+                    name, len(hits), linear_time * 1000, index_time * 1000,
+                    linear_time / index_time
+                ))
+            query = vocabulary[5000][:3] + u"*"
+            (index_time, hits) = timed(index.search, query)
+            print("%-12s %8d %14s %12.3f" % (
+                "prefix", len(hits), "-", index_time * 1000
+            ))
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
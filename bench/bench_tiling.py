@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""
+Measures pyocr.tiling on a very large image:
+- wall time of the OCR of all the tiles with 1 worker and with more workers.
+  The OCR is simulated: it sleeps for a time proportional to the number of
+  pixels of the tile, like waiting for Tesseract
+- time needed to merge the words of all the tiles (dropping the duplicates
+  of the overlaps) and to build the lines, on a page of many words
+
+If Tesseract is available, also compares tesseract.image_to_string() on the
+whole image with tiling.image_to_string().
+
+USAGE:
+ > python bench/bench_tiling.py [nb_cpus]
+"""
+
+import multiprocessing
+import random
+import sys
+import time
+
+from PIL import Image
+from PIL import ImageDraw
+
+from pyocr import builders
+from pyocr import tesseract
+from pyocr import tiling
+
+IMAGE_SIZE = (8000, 12000)
+MERGE_PAGE_SIZE = (20000, 30000)
+TILE_SIZE = 2048
+OVERLAP = 256
+# narrower than the longest words: some words are found by two tiles
+MERGE_OVERLAP = 100
+OCR_TIME_PER_PIXEL = 30e-9
+
+
+class FakeTool(object):
+    def __init__(self):
+        self.max_pixels = 0
+
+    def image_to_string(self, image, lang=None, builder=None):
+        pixels = image.size[0] * image.size[1]
+        self.max_pixels = max(self.max_pixels, pixels)
+        time.sleep(pixels * OCR_TIME_PER_PIXEL)
+        return []
+
+
+def make_tile_words(size, seed=0):
+    """
+    Words of a page, as found by each tile: the words of the overlaps are
+    found by all the tiles covering them (cut if needed)
+    """
+    rand = random.Random(seed)
+    words = []
+    for y in range(50, size[1] - 50, 45):
+        x = 50
+        while x < size[0] - 200:
+            width = rand.randint(40, 150)
+            words.append(((x, y), (x + width, y + 30)))
+            x += width + rand.randint(15, 30)
+    tile_words = []
+    tile_indexes = []
+    tiles = tiling.get_tiles(size, TILE_SIZE, MERGE_OVERLAP)
+    for (tile_idx, (((x1, y1), (x2, y2)), core)) in enumerate(tiles):
+        ((cx1, cy1), (cx2, cy2)) = core
+        for (word_idx, ((wx1, wy1), (wx2, wy2))) in enumerate(words):
+            if wx2 <= x1 or wx1 >= x2 or wy2 <= y1 or wy1 >= y2:
+                continue
+            # cut by the tile
+            position = ((max(wx1, x1), max(wy1, y1)),
+                        (min(wx2, x2), min(wy2, y2)))
+            ((px1, py1), (px2, py2)) = position
+            if not (2 * cx1 <= px1 + px2 < 2 * cx2 and
+                    2 * cy1 <= py1 + py2 < 2 * cy2):
+                continue
+            tile_words.append(builders.Box(u"word%d" % word_idx, position,
+                                           90))
+            tile_indexes.append(tile_idx)
+    return (words, tile_words, tile_indexes)
+
+
+def main():
+    nb_cpus = (int(sys.argv[1]) if len(sys.argv) > 1
+               else multiprocessing.cpu_count())
+    image = Image.new("L", IMAGE_SIZE, 255)
+    tiles = tiling.get_tiles(IMAGE_SIZE, TILE_SIZE, OVERLAP)
+    print("%dx%d image, %d tiles of %dx%d" % (
+        IMAGE_SIZE[0], IMAGE_SIZE[1], len(tiles), TILE_SIZE, TILE_SIZE
+    ))
+    for max_workers in sorted(set([1, nb_cpus])):
+        tool = FakeTool()
+        start = time.time()
+        tiling.image_to_string(tool, image, builder=builders.WordBoxBuilder(),
+                               tile_size=TILE_SIZE, overlap=OVERLAP,
+                               max_workers=max_workers)
+        print("%d worker(s): %.2fs, biggest tile: %.1f%% of the image" % (
+            max_workers, time.time() - start,
+            100.0 * tool.max_pixels / (IMAGE_SIZE[0] * IMAGE_SIZE[1])
+        ))
+
+    (words, tile_words, tile_indexes) = make_tile_words(MERGE_PAGE_SIZE)
+    start = time.time()
+    merged = tiling._drop_duplicates(tile_words, tile_indexes)
+    dedup_time = time.time() - start
+    start = time.time()
+    lines = builders.build_lines(merged)
+    lines_time = time.time() - start
+    assert len(set(box.content for box in merged)) == len(words)
+    print("%dx%d page, %d words (%d found by the tiles): duplicates"
+          " dropped in %.2fs, %d words left, %d lines built in %.2fs" % (
+              MERGE_PAGE_SIZE[0], MERGE_PAGE_SIZE[1], len(words),
+              len(tile_words), dedup_time, len(merged), len(lines),
+              lines_time
+          ))
+
+    if not tesseract.is_available():
+        print("Tesseract not available: end-to-end times skipped")
+        return
+    page = Image.new("L", (6000, 6000), 255)
+    draw = ImageDraw.Draw(page)
+    txt = "The quick brown fox jumps over the lazy dog " * 12
+    for y in range(100, 5900, 40):
+        draw.text((100, y), txt, fill=0)
+    start = time.time()
+    whole = tesseract.image_to_string(page, builder=builders.WordBoxBuilder())
+    whole_time = time.time() - start
+    start = time.time()
+    tiled = tiling.image_to_string(tesseract, page,
+                                   builder=builders.WordBoxBuilder(),
+                                   tile_size=TILE_SIZE, overlap=OVERLAP)
+    print("tesseract: whole image: %.1fs (%d words), tiled: %.1fs"
+          " (%d words)" % (whole_time, len(whole), time.time() - start,
+                           len(tiled)))
+
+
+if __name__ == "__main__":
+    main()
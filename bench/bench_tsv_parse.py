@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Compares the time needed to parse the word and line boxes of Tesseract
+(shell) from hOCR and from TSV (builders with tesseract_tsv=True).
+
+USAGE:
+ > python bench/bench_tsv_parse.py [repeat]
+"""
+
+import io
+import sys
+import time
+
+from pyocr import builders
+
+import synthetic
+
+
+def bench(builder, data, repeat):
+    start = time.time()
+    for _ in range(repeat):
+        result = builder.read_file(io.StringIO(data))
+    return ((time.time() - start) / repeat, len(result))
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print("%-8s %-16s %8s %12s %12s %8s" % (
+        "words", "builder", "results", "hOCR (ms)", "TSV (ms)", "speedup"
+    ))
+    for nb_lines in (10, 60, 300):
+        lines = synthetic.make_lines(nb_columns=2, nb_lines=nb_lines)
+        nb_words = sum(len(line.word_boxes) for line in lines)
+        hocr = synthetic.to_hocr(lines)
+        tsv = synthetic.to_tsv(lines)
+        for builder_cls in (builders.WordBoxBuilder,
+                            builders.LineBoxBuilder):
+            (hocr_time, nb_results) = bench(builder_cls(), hocr, repeat)
+            (tsv_time, _) = bench(builder_cls(tesseract_tsv=True), tsv,
+                                  repeat)
+            print("%-8d %-16s %8d %12.2f %12.2f %7.1fx" % (
+                nb_words, builder_cls.__name__, nb_results,
+                hocr_time * 1000, tsv_time * 1000, hocr_time / tsv_time
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Compares reading a noisy page (many speckles recognized as tiny words with
+a low confidence) and then filtering the words, with dropping them while
+reading (builders' min_confidence and min_size): time and peak memory.
+
+USAGE:
+ > python bench/bench_word_filter.py [repeat]
+"""
+
+import io
+import random
+import sys
+import time
+import tracemalloc
+
+from pyocr import builders
+
+import synthetic
+
+MIN_CONFIDENCE = 30
+MIN_SIZE = 8
+
+
+def make_noisy_lines(nb_lines, noise_ratio, seed=0):
+    rand = random.Random(seed)
+    lines = synthetic.make_lines(nb_columns=2, nb_lines=nb_lines)
+    for line in lines:
+        ((x1, y1), (x2, y2)) = line.position
+        for _ in range(int(len(line.word_boxes) * noise_ratio)):
+            x = rand.randint(x1, x2)
+            y = rand.randint(y1, y2)
+            size = rand.randint(1, 6)
+            line.word_boxes.append(builders.Box(
+                rand.choice([u".", u",", u"'", u"~"]),
+                ((x, y), (x + size, y + size)), rand.randint(0, 20)
+            ))
+    return lines
+
+
+def filter_after(hocr):
+    boxes = builders.WordBoxBuilder().read_file(io.StringIO(hocr))
+    return [
+        box for box in boxes
+        if box.confidence >= MIN_CONFIDENCE and (
+            box.position[1][0] - box.position[0][0] >= MIN_SIZE or
+            box.position[1][1] - box.position[0][1] >= MIN_SIZE
+        )
+    ]
+
+
+def filter_while_reading(hocr):
+    builder = builders.WordBoxBuilder(min_confidence=MIN_CONFIDENCE,
+                                      min_size=MIN_SIZE)
+    return builder.read_file(io.StringIO(hocr))
+
+
+def bench(func, hocr, repeat):
+    tracemalloc.start()
+    start = time.time()
+    for _ in range(repeat):
+        result = func(hocr)
+    duration = (time.time() - start) / repeat
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (duration, peak, result)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    print("%-8s %-8s %12s %12s %12s %12s" % (
+        "words", "noise", "after (ms)", "after (MB)", "while (ms)",
+        "while (MB)"
+    ))
+    for noise_ratio in (0.0, 1.0, 5.0):
+        hocr = synthetic.to_hocr(make_noisy_lines(300, noise_ratio))
+        (after_time, after_peak, expected) = bench(filter_after, hocr,
+                                                   repeat)
+        (while_time, while_peak, result) = bench(filter_while_reading,
+                                                 hocr, repeat)
+        assert result == expected
+        print("%-8d %-8.1f %12.2f %12.2f %12.2f %12.2f" % (
+            len(expected), noise_ratio, after_time * 1000,
+            after_peak / 1e6, while_time * 1000, while_peak / 1e6
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Synthetic OCR results used by the benchmarks: dense multi-column pages,
+serialized the way Tesseract would have serialized them.
+"""
+
+import random
+
+from pyocr import builders
+
+WORDS = [
+    u"lorem", u"ipsum", u"dolor", u"sit", u"amet", u"consectetur",
+    u"adipiscing", u"elit", u"sed", u"do", u"eiusmod", u"tempor",
+    u"incididunt", u"ut", u"labore", u"et", u"dolore", u"magna", u"aliqua",
+    u"caf\xe9", u"na\xefve", u"&", u"<tag>",
+]
+
+
+def make_lines(nb_columns=2, nb_lines=60, nb_words=12, seed=0):
+    """
+    Returns a list of LineBox laid out in 'nb_columns' columns of
+    'nb_lines' lines of 'nb_words' words each.
+    """
+    rand = random.Random(seed)
+    lines = []
+    column_width = nb_words * 60 + 40
+    for column in range(nb_columns):
+        for line_idx in range(nb_lines):
+            top = 100 + line_idx * 40
+            left = 50 + column * column_width
+            words = []
+            for _ in range(nb_words):
+                content = rand.choice(WORDS)
+                width = 10 * len(content) + rand.randint(0, 8)
+                position = ((left, top), (left + width, top + 24))
+                words.append(builders.Box(content, position,
+                                          rand.randint(50, 99)))
+                left += width + 12
+            line_position = (words[0].position[0],
+                             (words[-1].position[1][0], top + 30))
+            lines.append(builders.LineBox(words, line_position))
+    return lines
+
+
+def make_columns(nb_columns=3, nb_lines=60, column_width=600, gutter=50,
+                 seed=0):
+    """
+    Returns a list of LineBox in reading order: a title across the page,
+    then 'nb_columns' columns of 'nb_lines' lines filled with words, with
+    paragraph breaks at random places in each column.
+    """
+    rand = random.Random(seed)
+    lines = []
+    for column in range(-1, nb_columns):
+        if column < 0:
+            # title
+            (left, right, top) = (50, 50 + column_width, 20)
+            nb_column_lines = 1
+        else:
+            left = 50 + column * (column_width + gutter)
+            (right, top) = (left + column_width, 100)
+            nb_column_lines = nb_lines
+        for _ in range(nb_column_lines):
+            if rand.random() < 0.1:
+                top += 30  # new paragraph
+            words = []
+            x = left
+            while True:
+                content = rand.choice(WORDS)
+                width = 10 * len(content) + rand.randint(0, 6)
+                if x + width > right:
+                    break
+                # short words are smaller (no ascender)
+                y = top + (6 if len(content) <= 2 else 0)
+                words.append(builders.Box(content, ((x, y), (x + width,
+                                                             top + 20)),
+                                          rand.randint(50, 99)))
+                x += width + rand.randint(6, 14)
+            line_position = (
+                (words[0].position[0][0], top),
+                (words[-1].position[1][0], top + 20)
+            )
+            lines.append(builders.LineBox(words, line_position))
+            top += 30
+    return lines
+
+
+def _escape(txt):
+    return (txt.replace(u"&", u"&amp;").replace(u"<", u"&lt;")
+            .replace(u">", u"&gt;"))
+
+
+def to_hocr(lines):
+    """
+    Serialize the lines like Tesseract 3.04 hOCR output
+    """
+    out = [u'<?xml version="1.0" encoding="UTF-8"?>\n'
+           u'<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"\n'
+           u'    "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">\n'
+           u'<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en"'
+           u' lang="en">\n <head>\n  <title></title>\n </head>\n <body>\n'
+           u"  <div class='ocr_page' id='page_1' title='bbox 0 0 5000 5000;"
+           u" ppageno 0'>\n"]
+    word_idx = 0
+    for (line_idx, line) in enumerate(lines):
+        out.append(
+            u"     <span class='ocr_line' id='line_1_%d' title=\"bbox %d %d"
+            u" %d %d; baseline 0 -6\">" % (
+                line_idx, line.position[0][0], line.position[0][1],
+                line.position[1][0], line.position[1][1]
+            )
+        )
+        for box in line.word_boxes:
+            word_idx += 1
+            out.append(
+                u"<span class='ocrx_word' id='word_1_%d' title='bbox %d %d %d"
+                u" %d; x_wconf %d' lang='eng' dir='ltr'>%s</span> " % (
+                    word_idx, box.position[0][0], box.position[0][1],
+                    box.position[1][0], box.position[1][1], box.confidence,
+                    _escape(box.content)
+                )
+            )
+        out.append(u"\n     </span>\n")
+    out.append(u"  </div>\n </body>\n</html>\n")
+    return u"".join(out)
+
+
+def to_tsv(lines):
+    """
+    Serialize the lines like Tesseract 3.05 TSV output
+    """
+    out = [u"level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft"
+           u"\ttop\twidth\theight\tconf\ttext\n"
+           u"1\t1\t0\t0\t0\t0\t0\t0\t5000\t5000\t-1\t\n"]
+    for (line_idx, line) in enumerate(lines):
+        ((x1, y1), (x2, y2)) = line.position
+        out.append(u"4\t1\t1\t1\t%d\t0\t%d\t%d\t%d\t%d\t-1\t\n" % (
+            line_idx + 1, x1, y1, x2 - x1, y2 - y1
+        ))
+        for (word_idx, box) in enumerate(line.word_boxes):
+            ((x1, y1), (x2, y2)) = box.position
+            out.append(u"5\t1\t1\t1\t%d\t%d\t%d\t%d\t%d\t%d\t%d\t%s\n" % (
+                line_idx + 1, word_idx + 1, x1, y1, x2 - x1, y2 - y1,
+                box.confidence, box.content
+            ))
+    return u"".join(out)
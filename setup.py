@@ -50,4 +50,8 @@ setup(
         "Pillow",
         "six",
     ],
+    extras_require={
+        # pyocr.geometry
+        "geometry": ["numpy"],
+    },
 )
@@ -0,0 +1,319 @@
+"""
+Compact binary storage for OCR results: pages of word boxes (output of
+WordBoxBuilder) or of line boxes (output of LineBoxBuilder).
+
+USAGE:
+ > from pyocr import boxfile
+ > with open('results.box', 'wb') as file_descriptor:
+ >     boxfile.dump([page_1_lines, page_2_lines], file_descriptor)
+ > with boxfile.BoxFile('results.box') as results:
+ >     print(results.get_line(1, 0).content)
+
+Files are mapped in memory (mmap): only the pages and lines accessed are
+decoded.
+
+FORMAT (version 1):
+All integers are little-endian. Sections start on 8 bytes boundaries.
+    - header: magic "PYOCRBOX", version, number of pages, lines, words and
+      strings (uint32)
+    - page kinds: one uint8 per page (PAGE_WORDS or PAGE_LINES)
+    - page index: first line of each page (nb pages + 1 uint32). Pages of
+      words have a single line (without position) holding all their words.
+    - line index: first word of each line (nb lines + 1 uint32)
+    - line positions: 4 columns of int32 (x1, y1, x2, y2)
+    - word positions: 4 columns of int32 (x1, y1, x2, y2)
+    - word confidences: float64
+    - word contents: index in the string table (uint32)
+    - string index: offset of each string in the string data
+      (nb strings + 1 uint32)
+    - string data: UTF-8
+
+COPYRIGHT:
+PyOCR is released under the GPL v3.
+https://github.com/openpaperwork/pyocr#readme
+"""
+
+import array
+import struct
+
+import six
+
+from . import builders
+from .columnfile import FLOAT64
+from .columnfile import INT32
+from .columnfile import StringTable
+from .columnfile import UINT32
+from .columnfile import UINT8
+from .columnfile import map_source
+from .columnfile import padding
+from .columnfile import read_column
+from .columnfile import release
+from .columnfile import to_bytes
+from .columnfile import unmap
+from .error import PyocrException
+
+__all__ = [
+    'BoxFile',
+    'dump',
+    'dumps',
+    'load',
+    'loads',
+]
+
+MAGIC = b"PYOCRBOX"
+VERSION = 1
+
+PAGE_WORDS = 0
+PAGE_LINES = 1
+
+_HEADER = struct.Struct("<8sIIIII")
+_NO_POSITION = ((0, 0), (0, 0))
+
+
+class _Writer(object):
+    def __init__(self):
+        self.kinds = array.array(UINT8)
+        self.page_index = array.array(UINT32, [0])
+        self.line_index = array.array(UINT32, [0])
+        self.line_positions = [array.array(INT32) for _ in range(4)]
+        self.words = builders.BoxArray()
+
+    def __add_line(self, position, word_boxes):
+        ((x1, y1), (x2, y2)) = position
+        for (column, value) in zip(self.line_positions, (x1, y1, x2, y2)):
+            column.append(value)
+        for box in word_boxes:
+            self.words.add(box.content, box.position, box.confidence)
+        self.line_index.append(len(self.words))
+
+    def add_page(self, boxes):
+        boxes = list(boxes)
+        if len(boxes) > 0 and not isinstance(boxes[0], builders.LineBox):
+            self.kinds.append(PAGE_WORDS)
+            self.__add_line(_NO_POSITION, boxes)
+        else:
+            self.kinds.append(PAGE_LINES)
+            for line in boxes:
+                self.__add_line(line.position, line.word_boxes)
+        self.page_index.append(len(self.line_index) - 1)
+
+    def write(self, file_descriptor):
+        strings = [string.encode("utf-8") for string in self.words.strings]
+        string_index = array.array(UINT32, [0])
+        for string in strings:
+            string_index.append(string_index[-1] + len(string))
+
+        file_descriptor.write(_HEADER.pack(
+            MAGIC, VERSION, len(self.kinds), len(self.line_index) - 1,
+            len(self.words), len(strings)
+        ))
+        size = _HEADER.size
+        sections = (
+            [self.kinds, self.page_index, self.line_index] +
+            self.line_positions +
+            [self.words.x1, self.words.y1, self.words.x2, self.words.y2,
+             self.words.confidences, self.words.contents, string_index]
+        )
+        for section in sections:
+            data = b"\0" * padding(size) + to_bytes(section)
+            file_descriptor.write(data)
+            size += len(data)
+        file_descriptor.write(b"\0" * padding(size))
+        file_descriptor.write(b"".join(strings))
+
+
+def dump(pages, file_descriptor):
+    """
+    Write OCR results in 'file_descriptor' (opened in binary mode).
+
+    Arguments:
+        pages --- iterable of pages. Each page is a list of Box (output of
+            WordBoxBuilder) or a list of LineBox (output of LineBoxBuilder)
+    """
+    writer = _Writer()
+    for page in pages:
+        writer.add_page(page)
+    writer.write(file_descriptor)
+
+
+def dumps(pages):
+    """
+    Same as dump(), but returns the data as bytes.
+    """
+    output = six.BytesIO()
+    dump(pages, output)
+    return output.getvalue()
+
+
+def load(file_descriptor):
+    """
+    Read all the pages written by dump() in 'file_descriptor'.
+    """
+    return loads(file_descriptor.read())
+
+
+def loads(data):
+    """
+    Same as load(), but reads the data from bytes.
+    """
+    with BoxFile(data) as box_file:
+        return list(box_file)
+
+
+class BoxFile(object):
+    """
+    Read-only access to the pages written by dump(), without loading the
+    whole file.
+    """
+
+    def __init__(self, source):
+        """
+        Arguments:
+            source --- path of the file, or bytes-like object
+        """
+        (self.__file, self.__mmap, self.__buffer) = map_source(source)
+        self.kinds = None
+        self.page_index = None
+        self.line_index = None
+        self.line_positions = []
+        self.words = None
+        try:
+            self.__read_header()
+        except Exception:
+            self.close()
+            raise
+
+    def __read_header(self):
+        if len(self.__buffer) < _HEADER.size:
+            raise PyocrException("Not a box file (too short)")
+        (magic, version, nb_pages, nb_lines, nb_words, nb_strings) = \
+            _HEADER.unpack(bytes(self.__buffer[:_HEADER.size]))
+        if magic != MAGIC:
+            raise PyocrException("Not a box file")
+        if version != VERSION:
+            raise PyocrException(
+                "Unsupported box file version: %d" % version
+            )
+        self.nb_pages = nb_pages
+        self.nb_lines = nb_lines
+        self.nb_words = nb_words
+
+        self.__offset = _HEADER.size
+        self.kinds = self.__read_column(UINT8, nb_pages)
+        self.page_index = self.__read_column(UINT32, nb_pages + 1)
+        self.line_index = self.__read_column(UINT32, nb_lines + 1)
+        self.line_positions = [
+            self.__read_column(INT32, nb_lines) for _ in range(4)
+        ]
+        self.words = builders.BoxArray()
+        self.words.x1 = self.__read_column(INT32, nb_words)
+        self.words.y1 = self.__read_column(INT32, nb_words)
+        self.words.x2 = self.__read_column(INT32, nb_words)
+        self.words.y2 = self.__read_column(INT32, nb_words)
+        self.words.confidences = self.__read_column(FLOAT64, nb_words)
+        self.words.contents = self.__read_column(UINT32, nb_words)
+        string_index = self.__read_column(UINT32, nb_strings + 1)
+        self.__offset += padding(self.__offset)
+        self.words.strings = StringTable(
+            string_index, self.__buffer[self.__offset:]
+        )
+
+    def __read_column(self, typecode, count):
+        (column, self.__offset) = read_column(self.__buffer, self.__offset,
+                                              typecode, count)
+        return column
+
+    def __len__(self):
+        return self.nb_pages
+
+    def __get_lines(self, page_idx):
+        if page_idx < 0:
+            page_idx += self.nb_pages
+        if page_idx < 0 or page_idx >= self.nb_pages:
+            raise IndexError("page index out of range")
+        return (self.kinds[page_idx], self.page_index[page_idx],
+                self.page_index[page_idx + 1])
+
+    def __get_line(self, line_idx):
+        word_boxes = self.words[
+            self.line_index[line_idx]:self.line_index[line_idx + 1]
+        ].to_boxes()
+        position = ((self.line_positions[0][line_idx],
+                     self.line_positions[1][line_idx]),
+                    (self.line_positions[2][line_idx],
+                     self.line_positions[3][line_idx]))
+        return builders.LineBox(word_boxes, position)
+
+    def get_page(self, page_idx):
+        """
+        Returns the page as it was written: a list of Box or a list of
+        LineBox.
+        """
+        (kind, first_line, end_line) = self.__get_lines(page_idx)
+        if kind == PAGE_WORDS:
+            return self.__get_line(first_line).word_boxes
+        return [self.__get_line(line_idx)
+                for line_idx in range(first_line, end_line)]
+
+    def get_nb_lines(self, page_idx):
+        (kind, first_line, end_line) = self.__get_lines(page_idx)
+        if kind == PAGE_WORDS:
+            return 0
+        return end_line - first_line
+
+    def get_line(self, page_idx, line_idx):
+        """
+        Returns the LineBox 'line_idx' of the page 'page_idx'. Only this line
+        is decoded.
+        """
+        (kind, first_line, end_line) = self.__get_lines(page_idx)
+        if kind == PAGE_WORDS or line_idx < 0 or \
+                line_idx >= end_line - first_line:
+            raise IndexError("line index out of range")
+        return self.__get_line(first_line + line_idx)
+
+    def get_words(self, page_idx):
+        """
+        Returns all the word boxes of the page 'page_idx' as a read-only
+        BoxArray. Nothing is copied: the BoxArray reads the file, so it
+        must be dropped before closing the BoxFile.
+        """
+        (kind, first_line, end_line) = self.__get_lines(page_idx)
+        return self.words[
+            self.line_index[first_line]:self.line_index[end_line]
+        ]
+
+    def __iter__(self):
+        for page_idx in range(self.nb_pages):
+            yield self.get_page(page_idx)
+
+    def close(self):
+        """
+        Unmaps and closes the file. Raises BufferError if BoxArray returned
+        by get_words() are still in use.
+        """
+        columns = [self.kinds, self.page_index, self.line_index]
+        columns += self.line_positions
+        if self.words is not None:
+            columns += [self.words.x1, self.words.y1, self.words.x2,
+                        self.words.y2, self.words.confidences,
+                        self.words.contents]
+            if isinstance(self.words.strings, StringTable):
+                columns += self.words.strings.get_columns()
+        columns.append(self.__buffer)
+        self.kinds = None
+        self.page_index = None
+        self.line_index = None
+        self.line_positions = []
+        self.words = None
+        self.__buffer = None
+        release(columns)
+        unmap(self.__file, self.__mmap)
+        self.__mmap = None
+        self.__file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -4,6 +4,8 @@ Builders: Each builder specifies the expected output format
 raw text : TextBuilder
 words + boxes : WordBoxBuilder
 lines + words + boxes : LineBoxBuilder
+lines + words + boxes, written as ALTO XML : AltoBuilder
+blocks + paragraphs + lines + words + boxes : BlockBuilder
 """
 
 try:
@@ -11,21 +13,34 @@ try:
 except ImportError:
     from html.parser import HTMLParser
 
-import xml.dom.minidom
+import array
+import heapq
+import itertools
 import logging
+import re
+import xml.dom.minidom
+import xml.parsers.expat
 
 from .util import to_unicode
 
 logger = logging.getLogger(__name__)
 
 __all__ = [
+    'AltoBuilder',
+    'Block',
+    'BlockBuilder',
     'Box',
+    'BoxArray',
+    'BoxIndex',
     'TextBuilder',
     'WordBoxBuilder',
     'LineBox',
     'LineBoxBuilder',
+    'Paragraph',
     'DigitBuilder',
     'DigitLineBoxBuilder',
+    'build_lines',
+    'sort_reading_order',
 ]
 
 _XHTML_HEADER = to_unicode("""<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.1//EN"
@@ -38,6 +53,197 @@ _XHTML_HEADER = to_unicode("""<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.1//EN"
 """)
 
 
+# Number of boxes serialized before each write() in write_file()
+WRITE_BATCH_SIZE = 1000
+
+
+def _escape_xml(txt):
+    # same escaping as xml.dom.minidom
+    return (txt.replace("&", "&amp;").replace("<", "&lt;")
+            .replace("\"", "&quot;").replace(">", "&gt;"))
+
+
+def _word_to_hocr(box):
+    """
+    Returns the same markup as box.get_xml_tag(doc).toxml()
+    """
+    ((x1, y1), (x2, y2)) = box.position
+    return to_unicode(
+        '<span class="ocrx_word" title="bbox %d %d %d %d; x_wconf %d">'
+        '%s</span>'
+    ) % (x1, y1, x2, y2, box.confidence, _escape_xml(box.content))
+
+
+def _line_to_hocr(line):
+    """
+    Returns the same markup as line.get_xml_tag(doc).toxml()
+    """
+    ((x1, y1), (x2, y2)) = line.position
+    tag = to_unicode('<span class="ocr_line" title="bbox %d %d %d %d"') % (
+        x1, y1, x2, y2
+    )
+    if len(line.word_boxes) <= 0:
+        return tag + to_unicode("/>")
+    words = [_word_to_hocr(box) for box in line.word_boxes]
+    return to_unicode("%s> %s</span>") % (tag, to_unicode(" ").join(words))
+
+
+def _write_hocr(file_descriptor, boxes):
+    """
+    Write the *very* *simplified* hOCR of write_file(). 'boxes' (Box or
+    LineBox) can be any iterable (for instance iter_lines()): boxes are
+    written as they come.
+    """
+    file_descriptor.write(_XHTML_HEADER)
+    file_descriptor.write(to_unicode("<body>\n"))
+    batch = []
+    for box in boxes:
+        if isinstance(box, LineBox):
+            xml_str = _line_to_hocr(box)
+        else:
+            xml_str = _word_to_hocr(box)
+        batch.append(to_unicode("<p>%s</p>\n") % xml_str)
+        if len(batch) >= WRITE_BATCH_SIZE:
+            file_descriptor.write(to_unicode("").join(batch))
+            batch = []
+    batch.append(to_unicode("</body>\n</html>\n"))
+    file_descriptor.write(to_unicode("").join(batch))
+
+
+_ALTO_HEADER = to_unicode("""<?xml version="1.0" encoding="UTF-8"?>
+<alto xmlns="http://www.loc.gov/standards/alto/ns-v3#"
+ xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+ xsi:schemaLocation="http://www.loc.gov/standards/alto/ns-v3#
+ http://www.loc.gov/alto/v3/alto-3-0.xsd">
+<Description>
+\t<MeasurementUnit>pixel</MeasurementUnit>
+</Description>
+<Layout>
+\t<Page ID="page_0" PHYSICAL_IMG_NR="1">
+\t\t<PrintSpace>
+""")
+_ALTO_FOOTER = to_unicode("""\t\t</PrintSpace>
+\t</Page>
+</Layout>
+</alto>
+""")
+
+
+def _alto_dimensions(position):
+    ((x1, y1), (x2, y2)) = position
+    return to_unicode('HPOS="%d" VPOS="%d" WIDTH="%d" HEIGHT="%d"') % (
+        x1, y1, x2 - x1, y2 - y1
+    )
+
+
+# Names of the block types (see libtesseract.tesseract_raw.PolyBlockType),
+# written in the TYPE attribute of the ALTO ComposedBlock
+BLOCK_TYPE_NAMES = [
+    "unknown", "flowing_text", "heading_text", "pullout_text", "table",
+    "vertical_text", "caption_text", "flowing_image", "heading_image",
+    "pullout_image", "horz_line", "vert_line", "noise",
+]
+
+
+def _line_to_alto(line, ids, indent):
+    """
+    Returns the ALTO markup of a LineBox (TextLine). 'ids' are the counters
+    of each kind of element.
+    """
+    out = [to_unicode('%s<TextLine ID="line_%d" %s>\n') % (
+        indent, next(ids["line"]), _alto_dimensions(line.position)
+    )]
+    for box in line.word_boxes:
+        out.append(to_unicode(
+            '%s\t<String ID="string_%d" %s WC="%.2f" CONTENT="%s"/>\n'
+        ) % (indent, next(ids["string"]), _alto_dimensions(box.position),
+             box.confidence / 100.0, _escape_xml(box.content)))
+    out.append(to_unicode("%s</TextLine>\n") % indent)
+    return to_unicode("").join(out)
+
+
+def _text_block_to_alto(position, lines, ids, indent):
+    out = [to_unicode('%s<TextBlock ID="block_%d" %s>\n') % (
+        indent, next(ids["block"]), _alto_dimensions(position)
+    )]
+    for line in lines:
+        out.append(_line_to_alto(line, ids, indent + "\t"))
+    out.append(to_unicode("%s</TextBlock>\n") % indent)
+    return to_unicode("").join(out)
+
+
+def _block_to_alto(block, ids, indent):
+    """
+    Returns the ALTO markup of a Block: a ComposedBlock holding a TextBlock
+    per paragraph (same layout as the ALTO output of Tesseract).
+    """
+    block_type = (BLOCK_TYPE_NAMES[block.block_type]
+                  if 0 <= block.block_type < len(BLOCK_TYPE_NAMES)
+                  else BLOCK_TYPE_NAMES[0])
+    out = [to_unicode('%s<ComposedBlock ID="cblock_%d" %s TYPE="%s">\n') % (
+        indent, next(ids["cblock"]), _alto_dimensions(block.position),
+        block_type
+    )]
+    for paragraph in block.paragraphs:
+        out.append(_text_block_to_alto(paragraph.position, paragraph.lines,
+                                       ids, indent + "\t"))
+    out.append(to_unicode("%s</ComposedBlock>\n") % indent)
+    return to_unicode("").join(out)
+
+
+def _write_alto(file_descriptor, boxes):
+    """
+    Write the ALTO XML of AltoBuilder.write_file(). 'boxes' (Block, LineBox,
+    or Box written as lines of a single word) can be any iterable: boxes are
+    written as they come. Lines don't tell which block they belong to: each
+    of them gets its own TextBlock.
+    """
+    file_descriptor.write(_ALTO_HEADER)
+    ids = dict((name, itertools.count())
+               for name in ("cblock", "block", "line", "string"))
+    indent = to_unicode("\t\t\t")
+    batch = []
+    for box in boxes:
+        if isinstance(box, Block):
+            batch.append(_block_to_alto(box, ids, indent))
+        else:
+            if not isinstance(box, LineBox):
+                box = LineBox([box], box.position)
+            batch.append(_text_block_to_alto(box.position, [box], ids,
+                                             indent))
+        if len(batch) >= WRITE_BATCH_SIZE:
+            file_descriptor.write(to_unicode("").join(batch))
+            batch = []
+    batch.append(_ALTO_FOOTER)
+    file_descriptor.write(to_unicode("").join(batch))
+
+
+def _position_key(position):
+    """
+    Sort key of a box position: top to bottom, then left to right.
+    """
+    return (position[0][1], position[1][1], position[0][0], position[1][0])
+
+
+def _position_hash(position):
+    return hash((position[0][0], position[0][1],
+                 position[1][0], position[1][1]))
+
+
+def _set_slots_state(obj, state):
+    """
+    Restores the state of a Box or LineBox from a pickle: (None, slots) as
+    pickled by default for __slots__, or the __dict__ of the objects pickled
+    by PyOCR <= 0.5 (no __slots__ then).
+    """
+    if isinstance(state, tuple):
+        (dict_state, slots_state) = state
+        state = dict(dict_state or {})
+        state.update(slots_state or {})
+    for (name, value) in state.items():
+        setattr(obj, name, value)
+
+
 class Box(object):
     """
     Boxes are rectangles around each individual element recognized in the
@@ -45,6 +251,8 @@ class Box(object):
     was used.
     """
 
+    __slots__ = ("content", "position", "confidence")
+
     def __init__(self, content, position, confidence=0):
         """
         Arguments:
@@ -84,6 +292,13 @@ class Box(object):
         span_tag.appendChild(txt)
         return span_tag
 
+    def __reduce__(self):
+        # much smaller and faster to pickle than the default for __slots__
+        return (Box, (self.content, self.position, self.confidence))
+
+    def __setstate__(self, state):
+        _set_slots_state(self, state)
+
     def __str__(self):
         return self.get_unicode_string().encode('utf-8')
 
@@ -93,14 +308,12 @@ class Box(object):
         """
         if other is None:
             return -1
-        for (x, y) in ((self.position[0][1], other.position[0][1]),
-                       (self.position[1][1], other.position[1][1]),
-                       (self.position[0][0], other.position[0][0]),
-                       (self.position[1][0], other.position[1][0])):
-            if x < y:
-                return -1
-            elif x > y:
-                return 1
+        key = _position_key(self.position)
+        other_key = _position_key(other.position)
+        if key < other_key:
+            return -1
+        elif key > other_key:
+            return 1
         return 0
 
     def __lt__(self, other):
@@ -122,12 +335,8 @@ class Box(object):
         return self.__box_cmp(other) != 0
 
     def __hash__(self):
-        position_hash = 0
-        position_hash += ((self.position[0][0] & 0xFF) << 0)
-        position_hash += ((self.position[0][1] & 0xFF) << 8)
-        position_hash += ((self.position[1][0] & 0xFF) << 16)
-        position_hash += ((self.position[1][1] & 0xFF) << 24)
-        return (position_hash ^ hash(self.content) ^ hash(self.content))
+        # boxes are compared on their position only
+        return _position_hash(self.position)
 
 
 class LineBox(object):
@@ -136,6 +345,8 @@ class LineBox(object):
     image. LineBox are boxes around lines. LineBox contains Box.
     """
 
+    __slots__ = ("word_boxes", "position")
+
     def __init__(self, word_boxes, position):
         """
         Arguments:
@@ -153,23 +364,21 @@ class LineBox(object):
         This string can be stored in a file as-is (see write_box_file())
         and reread using read_box_file().
         """
-        txt = to_unicode("[\n")
+        txt = [to_unicode("[")]
         for box in self.word_boxes:
-            txt += to_unicode("  %s\n") % box.get_unicode_string()
-        return to_unicode("%s] %d %d %d %d") % (
-            txt,
+            txt.append(to_unicode("  %s") % box.get_unicode_string())
+        txt.append(to_unicode("] %d %d %d %d") % (
             self.position[0][0],
             self.position[0][1],
             self.position[1][0],
             self.position[1][1],
-        )
+        ))
+        return to_unicode("\n").join(txt)
 
     def __get_content(self):
-        txt = to_unicode("")
-        for box in self.word_boxes:
-            txt += box.content + to_unicode(" ")
-        txt = txt.strip()
-        return txt
+        return to_unicode(" ").join(
+            [box.content for box in self.word_boxes]
+        ).strip()
 
     content = property(__get_content)
 
@@ -187,6 +396,12 @@ class LineBox(object):
             span_tag.appendChild(box_xml)
         return span_tag
 
+    def __reduce__(self):
+        return (LineBox, (self.word_boxes, self.position))
+
+    def __setstate__(self, state):
+        _set_slots_state(self, state)
+
     def __str__(self):
         return self.get_unicode_string().encode('utf-8')
 
@@ -196,14 +411,12 @@ class LineBox(object):
         """
         if other is None:
             return -1
-        for (x, y) in ((self.position[0][1], other.position[0][1]),
-                       (self.position[1][1], other.position[1][1]),
-                       (self.position[0][0], other.position[0][0]),
-                       (self.position[1][0], other.position[1][0])):
-            if (x < y):
-                return -1
-            elif (x > y):
-                return 1
+        key = _position_key(self.position)
+        other_key = _position_key(other.position)
+        if key < other_key:
+            return -1
+        elif key > other_key:
+            return 1
         return 0
 
     def __lt__(self, other):
@@ -225,13 +438,696 @@ class LineBox(object):
         return self.__box_cmp(other) != 0
 
     def __hash__(self):
-        content = self.content
-        position_hash = 0
-        position_hash += ((self.position[0][0] & 0xFF) << 0)
-        position_hash += ((self.position[0][1] & 0xFF) << 8)
-        position_hash += ((self.position[1][0] & 0xFF) << 16)
-        position_hash += ((self.position[1][1] & 0xFF) << 24)
-        return (position_hash ^ hash(content) ^ hash(content))
+        # boxes are compared on their position only
+        return _position_hash(self.position)
+
+
+class Paragraph(object):
+    """
+    Paragraph of a Block (see BlockBuilder). Paragraph contains LineBox.
+    """
+
+    __slots__ = ("lines", "position")
+
+    def __init__(self, lines, position):
+        """
+        Arguments:
+            lines --- a list of LineBox objects, in reading order
+            position --- the position of the paragraph on the image (see
+                LineBox)
+        """
+        self.lines = lines
+        self.position = position
+
+    def __get_content(self):
+        return to_unicode("\n").join([line.content for line in self.lines])
+
+    content = property(__get_content)
+
+    def __eq__(self, other):
+        if not isinstance(other, Paragraph):
+            return False
+        return self.position == other.position and self.lines == other.lines
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+
+class Block(object):
+    """
+    Block of text (or image, table, ...) found by the OCR tool (see
+    BlockBuilder). Block contains Paragraph.
+
+    Attributes:
+        block_type --- type of the block (see BLOCK_TYPE_NAMES and
+            libtesseract.tesseract_raw.PolyBlockType). 0 (unknown) if the OCR
+            tool doesn't tell.
+    """
+
+    __slots__ = ("paragraphs", "position", "block_type")
+
+    def __init__(self, paragraphs, position, block_type=0):
+        """
+        Arguments:
+            paragraphs --- a list of Paragraph objects, in reading order
+            position --- the position of the block on the image (see LineBox)
+            block_type --- see above
+        """
+        self.paragraphs = paragraphs
+        self.position = position
+        self.block_type = block_type
+
+    def __get_content(self):
+        return to_unicode("\n\n").join(
+            [paragraph.content for paragraph in self.paragraphs]
+        )
+
+    content = property(__get_content)
+
+    def iter_lines(self):
+        """
+        Yields the LineBox of all the paragraphs, in reading order.
+        """
+        for paragraph in self.paragraphs:
+            for line in paragraph.lines:
+                yield line
+
+    def __eq__(self, other):
+        if not isinstance(other, Block):
+            return False
+        return (self.position == other.position and
+                self.block_type == other.block_type and
+                self.paragraphs == other.paragraphs)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+
+def _to_confidence(value):
+    # confidences are stored as floats, but are usually integers
+    if value.is_integer():
+        return int(value)
+    return value
+
+
+class BoxView(Box):
+    """
+    Box stored in a BoxArray. Reading or writing its attributes reads or
+    writes the BoxArray.
+    """
+
+    __slots__ = ("array", "index")
+
+    def __init__(self, box_array, index):
+        # the Box slots are left empty: attributes are properties
+        self.array = box_array
+        self.index = index
+
+    def __get_content(self):
+        return self.array.strings[self.array.contents[self.index]]
+
+    def __set_content(self, content):
+        self.array.contents[self.index] = self.array.intern(content)
+
+    def __get_position(self):
+        (box_array, index) = (self.array, self.index)
+        return ((box_array.x1[index], box_array.y1[index]),
+                (box_array.x2[index], box_array.y2[index]))
+
+    def __set_position(self, position):
+        (box_array, index) = (self.array, self.index)
+        ((box_array.x1[index], box_array.y1[index]),
+         (box_array.x2[index], box_array.y2[index])) = position
+
+    def __get_confidence(self):
+        return _to_confidence(self.array.confidences[self.index])
+
+    def __set_confidence(self, confidence):
+        self.array.confidences[self.index] = confidence
+
+    content = property(__get_content, __set_content)
+    position = property(__get_position, __set_position)
+    confidence = property(__get_confidence, __set_confidence)
+
+
+class BoxArray(object):
+    """
+    Compact list of word boxes: instead of one Box object per word, boxes
+    are stored in columns (one array per coordinate, an array of confidences
+    and an array of indexes in a table of unique strings).
+
+    Indexing a BoxArray returns a BoxView, that can be used like a Box.
+    Slicing it returns a new BoxArray.
+    """
+
+    # typecodes of the columns: 32 bits integers and C doubles
+    COORDINATE_TYPE = "i"
+    CONFIDENCE_TYPE = "d"
+
+    def __init__(self, boxes=()):
+        """
+        Arguments:
+            boxes --- Box (or any object with the attributes 'content',
+                'position' and 'confidence') to store in the array
+        """
+        self.x1 = array.array(self.COORDINATE_TYPE)
+        self.y1 = array.array(self.COORDINATE_TYPE)
+        self.x2 = array.array(self.COORDINATE_TYPE)
+        self.y2 = array.array(self.COORDINATE_TYPE)
+        self.confidences = array.array(self.CONFIDENCE_TYPE)
+        self.contents = array.array(self.COORDINATE_TYPE)
+        self.strings = []
+        self.__string_ids = {}
+        self.extend(boxes)
+
+    def intern(self, content):
+        """
+        Returns the index of 'content' in the string table ('strings'), and
+        adds it to the table if required.
+        """
+        content = to_unicode(content)
+        string_id = self.__string_ids.get(content)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(content)
+            self.__string_ids[content] = string_id
+        return string_id
+
+    def add(self, content, position, confidence=0):
+        """
+        Same as append(Box(content, position, confidence)), without creating
+        the Box.
+        """
+        ((x1, y1), (x2, y2)) = position
+        self.x1.append(x1)
+        self.y1.append(y1)
+        self.x2.append(x2)
+        self.y2.append(y2)
+        self.confidences.append(confidence)
+        self.contents.append(self.intern(content))
+
+    def append(self, box):
+        self.add(box.content, box.position, box.confidence)
+
+    def extend(self, boxes):
+        if isinstance(boxes, BoxArray):
+            for column in ("x1", "y1", "x2", "y2", "confidences"):
+                getattr(self, column).extend(getattr(boxes, column))
+            self.contents.extend(
+                array.array(self.COORDINATE_TYPE,
+                            (self.intern(boxes.strings[string_id])
+                             for string_id in boxes.contents))
+            )
+            return
+        for box in boxes:
+            self.add(box.content, box.position, box.confidence)
+
+    def to_boxes(self):
+        """
+        Returns the content of the array as a list of Box
+        """
+        strings = self.strings
+        return [
+            Box(strings[string_id], ((x1, y1), (x2, y2)),
+                _to_confidence(confidence))
+            for (x1, y1, x2, y2, confidence, string_id) in zip(
+                self.x1, self.y1, self.x2, self.y2, self.confidences,
+                self.contents
+            )
+        ]
+
+    def to_numpy(self):
+        """
+        Returns the content of the array as NumPy arrays (requires NumPy):
+        (positions, confidences, contents)
+
+            positions --- int32 array of shape (N, 4): x1, y1, x2, y2
+            confidences --- float64 array of shape (N,)
+            contents --- int32 array of shape (N,): indexes in 'strings'
+        """
+        import numpy
+
+        positions = numpy.empty((len(self), 4), dtype=numpy.int32)
+        for (idx, column) in enumerate((self.x1, self.y1, self.x2, self.y2)):
+            positions[:, idx] = numpy.frombuffer(column, dtype=numpy.int32)
+        confidences = numpy.frombuffer(self.confidences,
+                                       dtype=numpy.float64).copy()
+        contents = numpy.frombuffer(self.contents, dtype=numpy.int32).copy()
+        return (positions, confidences, contents)
+
+    def __len__(self):
+        return len(self.contents)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            result = BoxArray()
+            for column in ("x1", "y1", "x2", "y2", "confidences",
+                           "contents"):
+                setattr(result, column, getattr(self, column)[index])
+            # string ids stay valid: the string table is shared
+            result.strings = self.strings
+            result.__string_ids = self.__string_ids
+            return result
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("BoxArray index out of range")
+        return BoxView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield BoxView(self, index)
+
+    def __reduce__(self):
+        if (not isinstance(self.strings, list) or
+                not isinstance(self.contents, array.array)):
+            # read-only BoxArray (see boxfile.BoxFile.get_words())
+            return BoxArray(self).__reduce__()
+        return (_rebuild_box_array,
+                (self.strings, self.x1, self.y1, self.x2, self.y2,
+                 self.confidences, self.contents))
+
+    def __eq__(self, other):
+        if not isinstance(other, BoxArray):
+            return NotImplemented
+        return (self.x1 == other.x1 and self.y1 == other.y1 and
+                self.x2 == other.x2 and self.y2 == other.y2 and
+                self.confidences == other.confidences and
+                [self.strings[i] for i in self.contents] ==
+                [other.strings[i] for i in other.contents])
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+
+def _rebuild_box_array(strings, x1, y1, x2, y2, confidences, contents):
+    box_array = BoxArray()
+    (box_array.x1, box_array.y1, box_array.x2, box_array.y2) = (x1, y1, x2, y2)
+    box_array.confidences = confidences
+    box_array.contents = contents
+    for string in strings:
+        box_array.intern(string)
+    return box_array
+
+
+class BoxIndex(object):
+    """
+    Spatial index over boxes (Box, LineBox, BoxArray, ...): finds the boxes
+    in a rectangle, at a point, or the nearest ones to a point, without
+    going through all of them.
+
+    Boxes are stored in a uniform grid: each box is referenced by all the
+    grid cells it overlaps. Boxes overlapping more than MAX_CELLS_PER_BOX
+    cells (for instance a box around a whole column) are checked by every
+    query instead.
+
+    Positions are read once, when the index is built: boxes moved or added
+    afterwards are not taken into account.
+    """
+
+    MAX_CELLS_PER_BOX = 64
+
+    def __init__(self, boxes, cell_size=None):
+        """
+        Arguments:
+            boxes --- iterable of objects with an attribute 'position'
+                (((x1, y1), (x2, y2)))
+            cell_size --- width and height of the grid cells, in pixels.
+                Default: twice the median size of the boxes.
+        """
+        self.boxes = list(boxes)
+        positions = [box.position for box in self.boxes]
+        if cell_size is None:
+            sizes = sorted(max(x2 - x1, y2 - y1)
+                           for ((x1, y1), (x2, y2)) in positions)
+            cell_size = 2 * sizes[len(sizes) // 2] if len(sizes) > 0 else 1
+        self.cell_size = max(int(cell_size), 1)
+
+        self.__positions = positions
+        self.__cells = {}
+        self.__oversized = []
+        for (idx, ((x1, y1), (x2, y2))) in enumerate(positions):
+            (cx1, cy1, cx2, cy2) = self.__get_cells(x1, y1, x2, y2)
+            if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > self.MAX_CELLS_PER_BOX:
+                self.__oversized.append(idx)
+                continue
+            for cx in range(cx1, cx2 + 1):
+                for cy in range(cy1, cy2 + 1):
+                    cell = self.__cells.get((cx, cy))
+                    if cell is None:
+                        self.__cells[(cx, cy)] = [idx]
+                    else:
+                        cell.append(idx)
+        if len(self.__cells) > 0:
+            self.__bounds = (min(cx for (cx, cy) in self.__cells),
+                             min(cy for (cx, cy) in self.__cells),
+                             max(cx for (cx, cy) in self.__cells),
+                             max(cy for (cx, cy) in self.__cells))
+        else:
+            self.__bounds = None
+
+    def __get_cells(self, x1, y1, x2, y2):
+        cell_size = self.cell_size
+        return (x1 // cell_size, y1 // cell_size,
+                x2 // cell_size, y2 // cell_size)
+
+    def __get_candidates(self, x1, y1, x2, y2):
+        (cx1, cy1, cx2, cy2) = self.__get_cells(x1, y1, x2, y2)
+        candidates = set(self.__oversized)
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > len(self.__cells):
+            for ((cx, cy), cell) in self.__cells.items():
+                if cx1 <= cx <= cx2 and cy1 <= cy <= cy2:
+                    candidates.update(cell)
+            return candidates
+        cells = self.__cells
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                cell = cells.get((cx, cy))
+                if cell is not None:
+                    candidates.update(cell)
+        return candidates
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def find_in_rect(self, position, contained=False):
+        """
+        Returns the boxes overlapping the rectangle 'position'
+        (((x1, y1), (x2, y2)), borders included), in the order they were
+        given to the index.
+
+        Arguments:
+            contained --- if True, only returns the boxes entirely inside the
+                rectangle
+        """
+        ((qx1, qy1), (qx2, qy2)) = position
+        positions = self.__positions
+        result = []
+        for idx in sorted(self.__get_candidates(qx1, qy1, qx2, qy2)):
+            ((x1, y1), (x2, y2)) = positions[idx]
+            if contained:
+                if x1 >= qx1 and y1 >= qy1 and x2 <= qx2 and y2 <= qy2:
+                    result.append(self.boxes[idx])
+            elif x1 <= qx2 and y1 <= qy2 and x2 >= qx1 and y2 >= qy1:
+                result.append(self.boxes[idx])
+        return result
+
+    def find_at(self, point):
+        """
+        Returns the boxes containing the point (x, y) (borders included), in
+        the order they were given to the index.
+        """
+        return self.find_in_rect((point, point))
+
+    def find_nearest(self, point, k=1):
+        """
+        Returns the 'k' boxes nearest to the point (x, y), nearest first.
+        The distance is measured from the point to the closest point of each
+        box (0 if the box contains the point). Ties are broken by the order
+        the boxes were given to the index.
+        """
+        if k <= 0 or len(self.boxes) <= 0:
+            return []
+        (px, py) = point
+        positions = self.__positions
+        best = []  # heap of the k best (-square distance, -index)
+        seen = set()
+
+        def consider(indexes):
+            for idx in indexes:
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                ((x1, y1), (x2, y2)) = positions[idx]
+                dx = max(x1 - px, 0, px - x2)
+                dy = max(y1 - py, 0, py - y2)
+                candidate = (-(dx * dx + dy * dy), -idx)
+                if len(best) < k:
+                    heapq.heappush(best, candidate)
+                elif candidate > best[0]:
+                    heapq.heapreplace(best, candidate)
+
+        consider(self.__oversized)
+        cells = self.__cells
+        for (ring, ring_cells) in self.__iter_rings(px // self.cell_size,
+                                                    py // self.cell_size):
+            for cell in ring_cells:
+                consider(cells[cell])
+            # boxes in the next rings are at least 'ring' cells away
+            limit = ring * self.cell_size
+            if len(best) >= k and -best[0][0] <= limit * limit:
+                break
+
+        return [self.boxes[-idx] for (_, idx) in
+                sorted(best, reverse=True)]
+
+    def __iter_rings(self, pcx, pcy):
+        """
+        Yields the non-empty cells around the cell (pcx, pcy), ring by ring
+        (ring = distance in cells): (ring, list of cells).
+        """
+        if self.__bounds is None:
+            return
+        cells = self.__cells
+        (bx1, by1, bx2, by2) = self.__bounds
+        # no need to look at the rings before the grid or after it
+        ring = max(bx1 - pcx, pcx - bx2, by1 - pcy, pcy - by2, 0)
+        last_ring = max(pcx - bx1, bx2 - pcx, pcy - by1, by2 - pcy)
+        while ring <= last_ring:
+            if 8 * ring > len(cells):
+                break
+            ring_cells = [(pcx + dx, pcy - ring)
+                          for dx in range(-ring, ring + 1)]
+            if ring > 0:
+                ring_cells += [(pcx + dx, pcy + ring)
+                               for dx in range(-ring, ring + 1)]
+                ring_cells += [(pcx - ring, pcy + dy)
+                               for dy in range(1 - ring, ring)]
+                ring_cells += [(pcx + ring, pcy + dy)
+                               for dy in range(1 - ring, ring)]
+            yield (ring, [cell for cell in ring_cells if cell in cells])
+            ring += 1
+        else:
+            return
+
+        # rings bigger than the whole grid: sort its cells by ring instead
+        remaining = sorted(
+            (max(abs(cx - pcx), abs(cy - pcy)), (cx, cy))
+            for (cx, cy) in cells
+            if max(abs(cx - pcx), abs(cy - pcy)) >= ring
+        )
+        for (ring, group) in itertools.groupby(remaining,
+                                               key=lambda cell: cell[0]):
+            yield (ring, [cell for (_, cell) in group])
+
+
+def _union_position(boxes):
+    return ((min(box.position[0][0] for box in boxes),
+             min(box.position[0][1] for box in boxes)),
+            (max(box.position[1][0] for box in boxes),
+             max(box.position[1][1] for box in boxes)))
+
+
+def _chain(boxes, axis, spacing):
+    """
+    Links each box to the nearest box after it along 'axis' (0: on its
+    right, 1: below it) if they overlap by at least half of the smallest one
+    on the other axis, and if they are less than 'spacing' times the height
+    of the box (or the median height if bigger) apart. A box is linked to
+    only one box before it: the nearest one.
+
+    Returns:
+        Chains of linked boxes (lists of indexes in 'boxes'), each one in
+        order along 'axis'.
+    """
+    other_axis = 1 - axis
+    heights = sorted(box.position[1][1] - box.position[0][1]
+                     for box in boxes)
+    median_height = heights[len(heights) // 2] if len(heights) > 0 else 1
+    index = BoxIndex(boxes)
+    indexes = dict((id(box), idx) for (idx, box) in enumerate(boxes))
+    nexts = [None] * len(boxes)
+    previous = {}  # index --> (distance, index of the previous box)
+    for (idx, box) in enumerate(boxes):
+        ((x1, y1), (x2, y2)) = position = box.position
+        (start, end) = (position[0][axis], position[1][axis])
+        (other_start, other_end) = (position[0][other_axis],
+                                    position[1][other_axis])
+        limit = int(spacing * max(y2 - y1, median_height, 1))
+        if axis == 0:
+            rect = ((x1, y1), (x2 + limit, y2))
+        else:
+            rect = ((x1, y1), (x2, y2 + limit))
+
+        best = None
+        for other in index.find_in_rect(rect):
+            ((ox1, oy1), (ox2, oy2)) = other_position = other.position
+            if other_position[0][axis] + other_position[1][axis] <= \
+                    start + end:
+                # not after this box
+                continue
+            overlap = (min(other_end, other_position[1][other_axis]) -
+                       max(other_start, other_position[0][other_axis]))
+            if 2 * overlap < min(
+                    other_end - other_start,
+                    other_position[1][other_axis] -
+                    other_position[0][other_axis]):
+                continue
+            candidate = (other_position[0][axis] - end, indexes[id(other)])
+            if best is None or candidate < best:
+                best = candidate
+        if best is None:
+            continue
+        (distance, next_idx) = best
+        nexts[idx] = next_idx
+        if next_idx not in previous or \
+                (distance, idx) < previous[next_idx]:
+            previous[next_idx] = (distance, idx)
+
+    chains = []
+    for idx in range(len(boxes)):
+        if idx in previous:
+            # not the first box of its chain
+            continue
+        chain = [idx]
+        while nexts[idx] is not None and previous[nexts[idx]][1] == idx:
+            idx = nexts[idx]
+            chain.append(idx)
+        chains.append(chain)
+    return chains
+
+
+def _split_gaps(indexes, positions, axis):
+    """
+    Splits the boxes where nothing covers the page between them along
+    'axis'. Returns the groups of boxes in order along 'axis'.
+    """
+    indexes = sorted(indexes, key=lambda idx: positions[idx][0][axis])
+    groups = [[indexes[0]]]
+    end = positions[indexes[0]][1][axis]
+    for idx in indexes[1:]:
+        if positions[idx][0][axis] > end:
+            groups.append([])
+        groups[-1].append(idx)
+        end = max(end, positions[idx][1][axis])
+    return groups
+
+
+def _xy_cut(positions):
+    """
+    Recursive XY-cut: splits the page in columns along the vertical gaps
+    between the boxes, or else in rows along the horizontal gaps, and does
+    the same in each part.
+
+    Returns:
+        The indexes of the positions, in reading order
+    """
+    order = []
+    stack = [list(range(len(positions)))]
+    while len(stack) > 0:
+        group = stack.pop()
+        parts = []
+        if len(group) > 1:
+            parts = _split_gaps(group, positions, 0)
+            if len(parts) <= 1:
+                parts = _split_gaps(group, positions, 1)
+        if len(parts) <= 1:
+            order += sorted(group,
+                            key=lambda idx: _position_key(positions[idx]))
+            continue
+        stack += reversed(parts)
+    return order
+
+
+def sort_reading_order(lines, line_spacing=1.5):
+    """
+    Sorts lines in reading order, column by column. Lines are grouped in
+    blocks (lines below each other, overlapping horizontally), and the page
+    is cut along the gaps between the blocks: columns from left to right,
+    then rows from top to bottom. Unlike sorted(), the lines of two columns
+    are not interleaved.
+
+    Arguments:
+        lines --- LineBox (or any box)
+        line_spacing --- maximum space between two lines of a block, in
+            line heights
+
+    Returns:
+        A list of LineBox
+    """
+    lines = list(lines)
+    blocks = [[lines[idx] for idx in chain]
+              for chain in _chain(lines, 1, line_spacing)]
+    positions = [_union_position(block) for block in blocks]
+    return [line for block_idx in _xy_cut(positions)
+            for line in blocks[block_idx]]
+
+
+def build_lines(boxes, word_spacing=1.5, line_spacing=1.5):
+    """
+    Groups word boxes into lines, for the OCR results that only provide
+    words (output of WordBoxBuilder or CharBoxBuilder, ...). Words close to
+    each other and on the same baseline form a line.
+
+    Arguments:
+        boxes --- Box (or BoxArray)
+        word_spacing --- maximum space between two words of a line, in line
+            heights
+        line_spacing --- see sort_reading_order()
+
+    Returns:
+        A list of LineBox, in reading order (see sort_reading_order())
+    """
+    boxes = list(boxes)
+    lines = []
+    for chain in _chain(boxes, 0, word_spacing):
+        word_boxes = [boxes[idx] for idx in chain]
+        lines.append(LineBox(word_boxes, _union_position(word_boxes)))
+    return sort_reading_order(lines, line_spacing)
+
+
+class _WordFilter(object):
+    """
+    Rejects the words whose confidence is below 'min_confidence', or whose
+    box fits in a square of 'min_size' x 'min_size' pixels (speckles).
+    Rejected words are counted in 'rejected'. Words without confidence
+    (None: Cuneiform) are only filtered on their size.
+    """
+
+    def __init__(self, min_confidence, min_size, rejected):
+        self.min_confidence = min_confidence
+        self.min_size = min_size
+        self.rejected = rejected
+
+    def accept(self, position, confidence):
+        if self.min_confidence is not None and confidence is not None and \
+                confidence < self.min_confidence:
+            self.rejected["confidence"] += 1
+            return False
+        ((x1, y1), (x2, y2)) = position
+        if x2 - x1 < self.min_size and y2 - y1 < self.min_size:
+            self.rejected["size"] += 1
+            return False
+        return True
+
+
+def _new_word_filter(min_confidence, min_size, rejected):
+    """
+    Returns a _WordFilter counting the rejected words in the dict
+    'rejected', or None if no word can be rejected.
+    """
+    if min_confidence is None and min_size <= 0:
+        return None
+    return _WordFilter(min_confidence, min_size, rejected)
 
 
 class BaseBuilder(object):
@@ -285,6 +1181,32 @@ class BaseBuilder(object):
         """
         raise NotImplementedError("Implement in subclasses")
 
+    def start_block(self, box, block_type=0):
+        """
+        Start a new block of output (see Block). Optional: ignored by
+        default.
+        """
+        pass
+
+    def start_paragraph(self, box):
+        """
+        Start a new paragraph in the current block. Optional: ignored by
+        default.
+        """
+        pass
+
+    def end_paragraph(self):
+        """
+        End a paragraph in output. Optional: ignored by default.
+        """
+        pass
+
+    def end_block(self):
+        """
+        End a block in output. Optional: ignored by default.
+        """
+        pass
+
     def get_output(self):
         """
         Return the output that has been built so far.
@@ -316,6 +1238,9 @@ class TextBuilder(BaseBuilder):
         super(TextBuilder, self).__init__(file_ext, tess_flags, [], cun_args)
         self.tesseract_layout = tesseract_layout
         self.built_text = []
+        # words of the current line, joined into built_text[-1] once the
+        # line is complete
+        self.__line_words = None
 
     @staticmethod
     def read_file(file_descriptor):
@@ -331,18 +1256,27 @@ class TextBuilder(BaseBuilder):
         """
         file_descriptor.write(text)
 
+    def __flush_line(self):
+        if self.__line_words is not None and len(self.built_text) > 0:
+            self.built_text[-1] = u" ".join(self.__line_words)
+
     def start_line(self, box):
+        self.__flush_line()
         self.built_text.append(u"")
+        self.__line_words = []
 
     def add_word(self, word, box, confidence=0):
-        if self.built_text[-1] != u"":
-            self.built_text[-1] += u" "
-        self.built_text[-1] += word
+        line = self.__line_words
+        if word == u"" and len(line) <= 0:
+            # the line must not start with a space
+            return
+        line.append(word)
 
     def end_line(self):
-        pass
+        self.__flush_line()
 
     def get_output(self):
+        self.__flush_line()
         return u"\n".join(self.built_text)
 
     @staticmethod
@@ -379,9 +1313,10 @@ class _WordHTMLParser(HTMLParser):
     ocrx_word
     """
 
-    def __init__(self):
+    def __init__(self, word_filter=None):
         HTMLParser.__init__(self)
 
+        self.word_filter = word_filter
         self.__tag_types = []
 
         self.__current_box_position = None
@@ -438,6 +1373,10 @@ class _WordHTMLParser(HTMLParser):
                 # invalid position --> old format --> we ignore this tag
                 self.__tag_types.append("ignore")
                 return
+            if self.word_filter is not None and \
+                    not self.word_filter.accept(position, confidence):
+                self.__tag_types.append("ignore")
+                return
             self.__current_box_text = to_unicode("")
         elif tag_type == 'ocr_line':
             self.__current_line_position = self.__parse_position(position)
@@ -480,13 +1419,28 @@ class _LineHTMLParser(HTMLParser):
     Cuneiform style: Cuneiform provides the OCR line by line, and for each
     line, the position of all its characters.
     Spaces have "-1 -1 -1 -1" for position".
+    Word boxes are built from the character positions, and grouped in line
+    boxes.
     """
-    def __init__(self):
+    def __init__(self, word_filter=None):
         HTMLParser.__init__(self)
+        self.word_filter = word_filter
         self.boxes = []
+        self.lines = []
         self.__line_text = None
+        self.__line_position = None
         self.__char_positions = None
 
+    @staticmethod
+    def __parse_position(title):
+        for piece in title.split(";"):
+            piece = piece.strip().split(" ")
+            if piece[0] != "bbox" or len(piece) < 5:
+                continue
+            return ((int(piece[1]), int(piece[2])),
+                    (int(piece[3]), int(piece[4])))
+        return None
+
     def handle_starttag(self, tag, attrs):
         TAG_TYPE_CONTENT = 0
         TAG_TYPE_POSITIONS = 1
@@ -494,30 +1448,29 @@ class _LineHTMLParser(HTMLParser):
         if (tag != "span"):
             return
         tag_type = -1
+        title = None
         for attr in attrs:
             if attr[0] == 'class':
                 if attr[1] == 'ocr_line':
                     tag_type = TAG_TYPE_CONTENT
                 elif attr[1] == 'ocr_cinfo':
                     tag_type = TAG_TYPE_POSITIONS
+            elif attr[0] == 'title':
+                title = attr[1]
 
         if tag_type == TAG_TYPE_CONTENT:
             self.__line_text = to_unicode("")
+            self.__line_position = None
+            if title is not None:
+                self.__line_position = self.__parse_position(title)
             self.__char_positions = []
             return
-        elif tag_type == TAG_TYPE_POSITIONS:
-            for attr in attrs:
-                if attr[0] == 'title':
-                    self.__char_positions = attr[1].split(" ")
-            # strip x_bboxes
-            self.__char_positions = self.__char_positions[1:]
-            if self.__char_positions[-1] == "":
-                self.__char_positions[:-1]
-            try:
-                while True:
-                    self.__char_positions.remove("-1")
-            except ValueError:
-                pass
+        elif tag_type == TAG_TYPE_POSITIONS and title is not None:
+            # strip x_bboxes and the spaces positions
+            self.__char_positions = [
+                int(position) for position in title.split(" ")[1:]
+                if position != "" and position != "-1"
+            ]
 
     def handle_data(self, data):
         if self.__line_text is None:
@@ -527,25 +1480,39 @@ class _LineHTMLParser(HTMLParser):
     def handle_endtag(self, tag):
         if self.__line_text is None or self.__char_positions == []:
             return
-        words = self.__line_text.split(" ")
-        for word in words:
+        positions = self.__char_positions
+        line_boxes = []
+        offset = 0
+        for word in self.__line_text.split(" "):
             if word == "":
                 continue
-            positions = self.__char_positions[0:4 * len(word)]
-            self.__char_positions = self.__char_positions[4 * len(word):]
-
-            left_pos = min([int(positions[x])
-                            for x in range(0, 4 * len(word), 4)])
-            top_pos = min([int(positions[x])
-                           for x in range(1, 4 * len(word), 4)])
-            right_pos = max([int(positions[x])
-                             for x in range(2, 4 * len(word), 4)])
-            bottom_pos = max([int(positions[x])
-                              for x in range(3, 4 * len(word), 4)])
-
-            box_pos = ((left_pos, top_pos), (right_pos, bottom_pos))
+            end = offset + 4 * len(word)
+            if end > len(positions):
+                break
+            box_pos = (
+                (min(positions[offset:end:4]),
+                 min(positions[offset + 1:end:4])),
+                (max(positions[offset + 2:end:4]),
+                 max(positions[offset + 3:end:4])),
+            )
+            offset = end
+            # Cuneiform gives no confidence
+            if self.word_filter is not None and \
+                    not self.word_filter.accept(box_pos, None):
+                continue
             box = Box(word, box_pos)
             self.boxes.append(box)
+            line_boxes.append(box)
+        if len(line_boxes) > 0:
+            line_position = self.__line_position
+            if line_position is None:
+                line_position = (
+                    (min(box.position[0][0] for box in line_boxes),
+                     min(box.position[0][1] for box in line_boxes)),
+                    (max(box.position[1][0] for box in line_boxes),
+                     max(box.position[1][1] for box in line_boxes)),
+                )
+            self.lines.append(LineBox(line_boxes, line_position))
         self.__line_text = None
 
     @staticmethod
@@ -553,69 +1520,576 @@ class _LineHTMLParser(HTMLParser):
         return "LineHTMLParser"
 
 
+_HOCR_BBOX_RE = re.compile(r"\bbbox\s+(-?\d+)\s+(-?\d+)\s+(-?\d+)\s+(-?\d+)")
+_HOCR_WCONF_RE = re.compile(r"\bx_wconf\s+(-?\d+(?:\.\d+)?)")
+_HOCR_WORD_CLASSES = frozenset(["ocr_word", "ocrx_word"])
+# same line class as _WordHTMLParser, so both parsers give the same lines
+_HOCR_LINE_CLASSES = frozenset(["ocr_line"])
+# first of them in the document tells its hOCR dialect
+_HOCR_MARKERS_RE = re.compile("ocr_cinfo|ocrx?_word")
+# same, but also tells apart ALTO documents (root element 'alto')
+_DOCUMENT_MARKERS_RE = re.compile(r"<(?:\w+:)?alto\b|ocr_cinfo|ocrx?_word")
+
+# Amount of characters read at once by iter_words() and iter_lines()
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class _HocrParser(object):
+    """
+    Fast parser for the Tesseract style of hOCR (see _WordHTMLParser), based
+    on expat. Only works with well-formed documents (XHTML): raises
+    xml.parsers.expat.ExpatError otherwise.
+    """
+
+    def __init__(self, word_filter=None):
+        self.word_filter = word_filter
+        self.boxes = []
+        self.lines = []
+
+        self.__spans = []  # hOCR class of each open span (None = ignored)
+        self.__word_text = None
+        self.__word_position = None
+        self.__word_confidence = 0
+        self.__line_position = None
+        self.__line_content = []
+
+        self.__parser = xml.parsers.expat.ParserCreate()
+        self.__parser.buffer_text = True
+        self.__parser.StartElementHandler = self.__start_element
+        self.__parser.EndElementHandler = self.__end_element
+        self.__parser.CharacterDataHandler = self.__data
+
+    def feed(self, data):
+        self.__parser.Parse(data, False)
+
+    def close(self):
+        self.__parser.Parse("", True)
+
+    def __start_element(self, tag, attrs):
+        if tag != "span":
+            return
+        span_class = attrs.get("class")
+        if span_class in _HOCR_WORD_CLASSES:
+            match = _HOCR_BBOX_RE.search(attrs.get("title", ""))
+            if match is None:
+                # invalid position --> old format --> we ignore this tag
+                span_class = None
+            else:
+                (x1, y1, x2, y2) = match.groups()
+                self.__word_position = ((int(x1), int(y1)),
+                                        (int(x2), int(y2)))
+                match = _HOCR_WCONF_RE.search(attrs["title"])
+                self.__word_confidence = (
+                    int(float(match.group(1))) if match is not None else 0
+                )
+                if self.word_filter is None or self.word_filter.accept(
+                        self.__word_position, self.__word_confidence):
+                    self.__word_text = []
+                else:
+                    span_class = None
+        elif span_class in _HOCR_LINE_CLASSES:
+            match = _HOCR_BBOX_RE.search(attrs.get("title", ""))
+            if match is None:
+                span_class = None
+            else:
+                (x1, y1, x2, y2) = match.groups()
+                self.__line_position = ((int(x1), int(y1)),
+                                        (int(x2), int(y2)))
+                self.__line_content = []
+        else:
+            span_class = None
+        self.__spans.append(span_class)
+
+    def __data(self, data):
+        if self.__word_text is not None:
+            self.__word_text.append(data)
+
+    def __end_element(self, tag):
+        if tag != "span" or len(self.__spans) <= 0:
+            return
+        span_class = self.__spans.pop()
+        if span_class is None:
+            return
+        if span_class in _HOCR_WORD_CLASSES:
+            box = Box(to_unicode("").join(self.__word_text),
+                      self.__word_position, self.__word_confidence)
+            self.boxes.append(box)
+            self.__line_content.append(box)
+            self.__word_text = None
+        else:
+            self.lines.append(LineBox(self.__line_content,
+                                      self.__line_position))
+            self.__line_content = []
+
+
+def _save_rejected(word_filter):
+    if word_filter is None:
+        return None
+    return dict(word_filter.rejected)
+
+
+def _restore_rejected(word_filter, rejected):
+    """
+    Forget the words rejected since _save_rejected() (when parsing again
+    with another parser)
+    """
+    if word_filter is not None:
+        word_filter.rejected.update(rejected)
+
+
+def _new_hocr_parser(html_str, word_filter=None):
+    """
+    Returns the parser matching the hOCR dialect (Tesseract or Cuneiform
+    style) of 'html_str' (whole document or beginning of the document).
+    """
+    match = _HOCR_MARKERS_RE.search(html_str)
+    if match is not None and match.group(0) == "ocr_cinfo":
+        return _LineHTMLParser(word_filter)
+    return _HocrParser(word_filter)
+
+
+def _parse_hocr(html_str, word_filter=None):
+    """
+    Parse hOCR with the parser matching its dialect (Tesseract or
+    Cuneiform style), detected once for the whole document.
+
+    Returns:
+        The parser, with the attributes 'boxes' (list of word Box) and
+        'lines' (list of LineBox).
+    """
+    parser = _new_hocr_parser(html_str, word_filter)
+    rejected = _save_rejected(word_filter)
+    try:
+        parser.feed(html_str)
+        parser.close()
+    except xml.parsers.expat.ExpatError as exc:
+        logger.debug("hOCR is not valid XML (%s). Will use HTMLParser", exc)
+        _restore_rejected(word_filter, rejected)
+        parser = _WordHTMLParser(word_filter)
+        parser.feed(html_str)
+    return parser
+
+
+_TSV_HEADER = to_unicode("level\tpage_num\t")
+_TSV_LEVEL_BLOCK = to_unicode("2")
+_TSV_LEVEL_PARAGRAPH = to_unicode("3")
+_TSV_LEVEL_LINE = to_unicode("4")
+_TSV_LEVEL_WORD = to_unicode("5")
+
+
+class _TsvParser(object):
+    """
+    Parser for the TSV output of Tesseract (>= 3.05): one row per page,
+    block, paragraph, line and word, with their position and confidence.
+
+    Lines are added to 'lines' once all their words have been parsed.
+    """
+
+    def __init__(self, word_filter=None):
+        self.word_filter = word_filter
+        self.boxes = []
+        self.lines = []
+        self.__header = True
+        self.__partial_row = to_unicode("")
+        self.__line = None
+
+    def feed(self, data):
+        rows = (self.__partial_row + data).split("\n")
+        self.__partial_row = rows.pop()
+        if self.__header and len(rows) > 0:
+            rows.pop(0)
+            self.__header = False
+        for row in rows:
+            self.__parse_row(row)
+
+    def close(self):
+        self.feed(to_unicode("\n"))
+        self.__end_line()
+
+    def __end_line(self):
+        if self.__line is not None:
+            self.lines.append(self.__line)
+            self.__line = None
+
+    def __parse_row(self, row):
+        fields = row.split("\t", 11)
+        if len(fields) < 12:
+            return
+        level = fields[0]
+        if level == _TSV_LEVEL_WORD:
+            left = int(fields[6])
+            top = int(fields[7])
+            position = ((left, top),
+                        (left + int(fields[8]), top + int(fields[9])))
+            confidence = int(float(fields[10]))
+            if self.word_filter is not None and \
+                    not self.word_filter.accept(position, confidence):
+                return
+            box = Box(fields[11], position, confidence)
+            self.boxes.append(box)
+            if self.__line is not None:
+                self.__line.word_boxes.append(box)
+            return
+        self.__end_line()
+        if level == _TSV_LEVEL_LINE:
+            left = int(fields[6])
+            top = int(fields[7])
+            position = ((left, top),
+                        (left + int(fields[8]), top + int(fields[9])))
+            self.__line = LineBox([], position)
+
+
+def _parse_tsv(tsv_str, word_filter=None):
+    """
+    Parse the TSV output of Tesseract (>= 3.05).
+
+    Returns:
+        (list of word Box, list of LineBox)
+    """
+    parser = _TsvParser(word_filter)
+    parser.feed(tsv_str)
+    parser.close()
+    return (parser.boxes, parser.lines)
+
+
+def _is_alto(header):
+    """
+    Indicates if 'header' (whole document or beginning of the document) is
+    ALTO XML rather than hOCR.
+    """
+    match = _DOCUMENT_MARKERS_RE.search(header)
+    return match is not None and match.group(0).startswith("<")
+
+
+def _alto_int(value):
+    try:
+        return int(value)
+    except ValueError:
+        # some tools write the dimensions as floats
+        return int(float(value))
+
+
+def _alto_position(attrs):
+    x1 = _alto_int(attrs.get("HPOS", 0))
+    y1 = _alto_int(attrs.get("VPOS", 0))
+    return ((x1, y1), (x1 + _alto_int(attrs.get("WIDTH", 0)),
+                       y1 + _alto_int(attrs.get("HEIGHT", 0))))
+
+
+class _AltoParser(object):
+    """
+    Parser for ALTO XML, based on expat: each TextLine gives a LineBox, each
+    String a word Box. Confidences (WC, from 0 to 1) are converted to the
+    0-100 scale of hOCR. Everything else (blocks, styles, hyphens, ...) is
+    ignored.
+
+    Lines are added to 'lines' once all their words have been parsed.
+    """
+
+    def __init__(self, word_filter=None):
+        self.word_filter = word_filter
+        self.boxes = []
+        self.lines = []
+        self.__line = None
+
+        self.__parser = xml.parsers.expat.ParserCreate()
+        self.__parser.StartElementHandler = self.__start_element
+        self.__parser.EndElementHandler = self.__end_element
+
+    def feed(self, data):
+        self.__parser.Parse(data, False)
+
+    def close(self):
+        self.__parser.Parse("", True)
+
+    def __start_element(self, tag, attrs):
+        tag = tag[tag.find(":") + 1:]  # namespace prefix, if any
+        if tag == "String":
+            confidence = attrs.get("WC")
+            confidence = (
+                int(round(float(confidence) * 100))
+                if confidence is not None else 0
+            )
+            position = _alto_position(attrs)
+            if self.word_filter is not None and \
+                    not self.word_filter.accept(position, confidence):
+                return
+            box = Box(attrs.get("CONTENT", to_unicode("")), position,
+                      confidence)
+            self.boxes.append(box)
+            if self.__line is not None:
+                self.__line.word_boxes.append(box)
+        elif tag == "TextLine":
+            self.__line = LineBox([], _alto_position(attrs))
+
+    def __end_element(self, tag):
+        if self.__line is not None and \
+                tag[tag.find(":") + 1:] == "TextLine":
+            self.lines.append(self.__line)
+            self.__line = None
+
+
+def _parse_alto(alto_str, word_filter=None):
+    """
+    Parse ALTO XML.
+
+    Returns:
+        (list of word Box, list of LineBox)
+    """
+    parser = _AltoParser(word_filter)
+    parser.feed(alto_str)
+    parser.close()
+    return (parser.boxes, parser.lines)
+
+
+def _tsv_block_events(tsv_str):
+    """
+    Returns the content of the TSV output of Tesseract (>= 3.05) as calls to
+    make on a BlockBuilder: tuples (method name, arguments...). TSV doesn't
+    tell the block types.
+    """
+    events = []
+    rows = tsv_str.split("\n")
+    for row in rows[1:]:
+        fields = row.split("\t", 11)
+        if len(fields) < 12:
+            continue
+        left = int(fields[6])
+        top = int(fields[7])
+        position = ((left, top),
+                    (left + int(fields[8]), top + int(fields[9])))
+        level = fields[0]
+        if level == _TSV_LEVEL_WORD:
+            events.append(("add_word", fields[11], position,
+                           int(float(fields[10]))))
+        elif level == _TSV_LEVEL_LINE:
+            events.append(("start_line", position))
+        elif level == _TSV_LEVEL_PARAGRAPH:
+            events.append(("start_paragraph", position))
+        elif level == _TSV_LEVEL_BLOCK:
+            events.append(("start_block", position, 0))
+    return events
+
+
+class _AltoBlockParser(object):
+    """
+    Parser for ALTO XML, based on expat. Gives the content of the document
+    as calls to make on a BlockBuilder ('events'): ComposedBlock --> block,
+    TextBlock --> paragraph (and block if not in a ComposedBlock), TextLine
+    --> line, String --> word.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.__composed_blocks = 0
+
+        self.__parser = xml.parsers.expat.ParserCreate()
+        self.__parser.StartElementHandler = self.__start_element
+        self.__parser.EndElementHandler = self.__end_element
+
+    def feed(self, data):
+        self.__parser.Parse(data, False)
+
+    def close(self):
+        self.__parser.Parse("", True)
+
+    def __start_element(self, tag, attrs):
+        tag = tag[tag.find(":") + 1:]
+        if tag == "String":
+            confidence = attrs.get("WC")
+            confidence = (
+                int(round(float(confidence) * 100))
+                if confidence is not None else 0
+            )
+            self.events.append(("add_word",
+                                attrs.get("CONTENT", to_unicode("")),
+                                _alto_position(attrs), confidence))
+        elif tag == "TextLine":
+            self.events.append(("start_line", _alto_position(attrs)))
+        elif tag == "TextBlock":
+            position = _alto_position(attrs)
+            if self.__composed_blocks <= 0:
+                self.events.append(("start_block", position, 0))
+            self.events.append(("start_paragraph", position))
+        elif tag == "ComposedBlock":
+            self.__composed_blocks += 1
+            block_type = attrs.get("TYPE")
+            block_type = (BLOCK_TYPE_NAMES.index(block_type)
+                          if block_type in BLOCK_TYPE_NAMES else 0)
+            self.events.append(("start_block", _alto_position(attrs),
+                                block_type))
+
+    def __end_element(self, tag):
+        if tag[tag.find(":") + 1:] == "ComposedBlock":
+            self.__composed_blocks -= 1
+
+
+def _read_chunks(file_descriptor):
+    while True:
+        chunk = file_descriptor.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _iter_parsed(file_descriptor, results, word_filter=None):
+    """
+    Parse 'file_descriptor' (hOCR, ALTO or Tesseract TSV) chunk by chunk, and
+    yield the results as soon as they are complete. Only the current chunk
+    and the current line are kept in memory.
+
+    Arguments:
+        results --- 'boxes' (yields word Box) or 'lines' (yields LineBox)
+    """
+    chunks = _read_chunks(file_descriptor)
+    header = to_unicode("")
+    for chunk in chunks:
+        header += chunk
+        if len(header) >= len(_TSV_HEADER) and (
+                header.startswith(_TSV_HEADER) or
+                _DOCUMENT_MARKERS_RE.search(header) is not None):
+            break
+    if header.startswith(_TSV_HEADER):
+        parser = _TsvParser(word_filter)
+    elif _is_alto(header):
+        parser = _AltoParser(word_filter)
+    else:
+        parser = _new_hocr_parser(header, word_filter)
+    rejected = _save_rejected(word_filter)
+    chunks = itertools.chain([header], chunks)
+
+    # kept until the first result is out, in case the document turns out
+    # not to be valid XML. Once results are out, they can't be taken back:
+    # the XML error is raised
+    consumed = []
+    while True:
+        try:
+            for chunk in chunks:
+                if consumed is not None:
+                    consumed.append(chunk)
+                parser.feed(chunk)
+                output = getattr(parser, results)
+                parser.boxes = []
+                parser.lines = []
+                if len(output) > 0:
+                    consumed = None
+                for result in output:
+                    yield result
+            parser.close()
+            for result in getattr(parser, results):
+                yield result
+            return
+        except xml.parsers.expat.ExpatError as exc:
+            if consumed is None or not isinstance(parser, _HocrParser):
+                raise
+            logger.debug("hOCR is not valid XML (%s). Will use HTMLParser",
+                         exc)
+            _restore_rejected(word_filter, rejected)
+            parser = _WordHTMLParser(word_filter)
+            chunks = itertools.chain(consumed, chunks)
+            consumed = None
+
+
 class WordBoxBuilder(BaseBuilder):
     """
     If passed to image_to_string(), image_to_string() will return an array of
     Box. Each box contains a word recognized in the image.
     """
 
-    def __init__(self, tesseract_layout=1):
-        file_ext = ["html", "hocr"]
+    def __init__(self, tesseract_layout=1, tesseract_tsv=False,
+                 min_confidence=None, min_size=0):
+        """
+        Arguments:
+            tesseract_layout --- Tesseract page segmentation mode
+            tesseract_tsv --- Get the results of Tesseract (shell) as TSV
+                instead of hOCR. TSV is much cheaper to parse, but requires
+                Tesseract >= 3.05.
+            min_confidence --- Drop the words whose confidence is below this
+                value (None = keep them all). Confidences depend on the OCR
+                tool (Cuneiform gives none: its words are kept).
+            min_size --- Drop the words whose box fits in a square of
+                min_size x min_size pixels (speckles)
+
+        The words dropped are counted in the attribute 'rejected_words'
+        ({"confidence": count, "size": count}). They are dropped while the
+        results are read, before any Box is created.
+        """
+        if tesseract_tsv:
+            file_ext = ["tsv"]
+            tess_conf = ["tsv"]
+        else:
+            file_ext = ["html", "hocr"]
+            tess_conf = ["hocr"]
         tess_flags = ["-psm", str(tesseract_layout)]
-        tess_conf = ["hocr"]
         cun_args = ["-f", "hocr"]
         super(WordBoxBuilder, self).__init__(file_ext, tess_flags, tess_conf,
                                              cun_args)
         self.word_boxes = []
         self.tesseract_layout = tesseract_layout
+        self.rejected_words = {"confidence": 0, "size": 0}
+        self.word_filter = _new_word_filter(min_confidence, min_size,
+                                            self.rejected_words)
 
     def read_file(self, file_descriptor):
         """
         Extract of set of Box from the lines of 'file_descriptor'
+        (hOCR, ALTO or Tesseract TSV)
 
         Return:
             An array of Box.
         """
-        parsers = [_WordHTMLParser(), _LineHTMLParser()]
         html_str = file_descriptor.read()
-
-        for p in parsers:
-            p.feed(html_str)
-            if len(p.boxes) > 0:
-                last_box = p.boxes[-1]
-                if last_box.content == to_unicode(""):
-                    # some parser leave an empty box at the end
-                    p.boxes.pop(-1)
-                return p.boxes
-        return []
+        if html_str.startswith(_TSV_HEADER):
+            boxes = _parse_tsv(html_str, self.word_filter)[0]
+        elif _is_alto(html_str):
+            boxes = _parse_alto(html_str, self.word_filter)[0]
+        else:
+            boxes = _parse_hocr(html_str, self.word_filter).boxes
+        if len(boxes) > 0 and boxes[-1].content == to_unicode(""):
+            # some parser leave an empty box at the end
+            boxes.pop(-1)
+        return boxes
+
+    def iter_words(self, file_descriptor):
+        """
+        Same as read_file(), but yields the Box one by one while
+        'file_descriptor' is being read, instead of returning them all at
+        the end.
+
+        hOCR that is not well-formed XML is read with HTMLParser (like
+        read_file() does) only if this is noticed before the first Box is
+        out. Otherwise xml.parsers.expat.ExpatError is raised: use
+        read_file() for such documents.
+        """
+        previous = None
+        for box in _iter_parsed(file_descriptor, "boxes",
+                                self.word_filter):
+            if previous is not None:
+                yield previous
+            previous = box
+        if previous is not None and previous.content != to_unicode(""):
+            # some parser leave an empty box at the end
+            yield previous
 
     @staticmethod
     def write_file(file_descriptor, boxes):
         """
         Write boxes in a box file. Output is a *very* *simplified* version
-        of hOCR.
+        of hOCR. Boxes are written as they come from 'boxes' (list or
+        generator).
 
         Warning:
             The file_descriptor must support UTF-8 ! (see module 'codecs')
         """
-        global _XHTML_HEADER
-
-        impl = xml.dom.minidom.getDOMImplementation()
-        newdoc = impl.createDocument(None, "root", None)
-
-        file_descriptor.write(_XHTML_HEADER)
-        file_descriptor.write(to_unicode("<body>\n"))
-        for box in boxes:
-            xml_str = to_unicode("%s") % box.get_xml_tag(newdoc).toxml()
-            file_descriptor.write(
-                to_unicode("<p>") + xml_str + to_unicode("</p>\n")
-            )
-        file_descriptor.write(to_unicode("</body>\n</html>\n"))
+        _write_hocr(file_descriptor, boxes)
 
     def start_line(self, box):
         pass
 
     def add_word(self, word, box, confidence=0):
+        if self.word_filter is not None and \
+                not self.word_filter.accept(box, confidence):
+            return
         self.word_boxes.append(Box(word, box, confidence))
 
     def end_line(self):
@@ -635,71 +2109,105 @@ class LineBoxBuilder(BaseBuilder):
     LineBox. Each LineBox contains a list of word boxes.
     """
 
-    def __init__(self, tesseract_layout=1):
-        file_ext = ["html", "hocr"]
+    def __init__(self, tesseract_layout=1, tesseract_tsv=False,
+                 min_confidence=None, min_size=0):
+        """
+        Arguments:
+            tesseract_layout --- Tesseract page segmentation mode
+            tesseract_tsv --- Get the results of Tesseract (shell) as TSV
+                instead of hOCR. TSV is much cheaper to parse, but requires
+                Tesseract >= 3.05.
+            min_confidence --- Drop the words whose confidence is below this
+                value (None = keep them all). Confidences depend on the OCR
+                tool (Cuneiform gives none: its words are kept).
+            min_size --- Drop the words whose box fits in a square of
+                min_size x min_size pixels (speckles)
+
+        The words dropped are counted in the attribute 'rejected_words'
+        ({"confidence": count, "size": count}). They are dropped while the
+        results are read, before any Box is created.
+        """
+        if tesseract_tsv:
+            file_ext = ["tsv"]
+            tess_conf = ["tsv"]
+        else:
+            file_ext = ["html", "hocr"]
+            tess_conf = ["hocr"]
         tess_flags = ["-psm", str(tesseract_layout)]
-        tess_conf = ["hocr"]
         cun_args = ["-f", "hocr"]
         super(LineBoxBuilder, self).__init__(file_ext, tess_flags, tess_conf,
                                              cun_args)
         self.lines = []
         self.tesseract_layout = tesseract_layout
+        self.rejected_words = {"confidence": 0, "size": 0}
+        self.word_filter = _new_word_filter(min_confidence, min_size,
+                                            self.rejected_words)
 
     def read_file(self, file_descriptor):
         """
         Extract of set of Box from the lines of 'file_descriptor'
+        (hOCR, ALTO or Tesseract TSV)
 
         Return:
             An array of LineBox.
         """
-        parsers = [
-            (_WordHTMLParser(), lambda parser: parser.lines),
-            (_LineHTMLParser(), lambda parser: [LineBox([box], box.position)
-                                                for box in parser.boxes]),
-        ]
         html_str = file_descriptor.read()
+        if html_str.startswith(_TSV_HEADER):
+            return _parse_tsv(html_str, self.word_filter)[1]
+        if _is_alto(html_str):
+            return _parse_alto(html_str, self.word_filter)[1]
+
+        parser = _parse_hocr(html_str, self.word_filter)
+        if len(parser.boxes) <= 0:
+            return []
+        return parser.lines
+
+    def iter_lines(self, file_descriptor):
+        """
+        Same as read_file(), but yields the LineBox one by one while
+        'file_descriptor' is being read, instead of returning them all at
+        the end.
 
-        for (parser, convertion) in parsers:
-            parser.feed(html_str)
-            if len(parser.boxes) > 0:
-                last_box = parser.boxes[-1]
-                if last_box.content == to_unicode(""):
-                    # some parser leave an empty box at the end
-                    parser.boxes.pop(-1)
-                return convertion(parser)
-        return []
+        Same limit as WordBoxBuilder.iter_words() with hOCR that is not
+        well-formed XML.
+        """
+        # lines are held back until a word has been found (see read_file())
+        pending = []
+        for line in _iter_parsed(file_descriptor, "lines",
+                                 self.word_filter):
+            if pending is None:
+                yield line
+                continue
+            pending.append(line)
+            if len(line.word_boxes) > 0:
+                for line in pending:
+                    yield line
+                pending = None
 
     @staticmethod
     def write_file(file_descriptor, boxes):
         """
         Write boxes in a box file. Output is a *very* *simplified* version
-        of hOCR.
+        of hOCR. Boxes are written as they come from 'boxes' (list or
+        generator).
 
         Warning:
             The file_descriptor must support UTF-8 ! (see module 'codecs')
         """
-        global _XHTML_HEADER
-
-        impl = xml.dom.minidom.getDOMImplementation()
-        newdoc = impl.createDocument(None, "root", None)
-
-        file_descriptor.write(_XHTML_HEADER)
-        file_descriptor.write(to_unicode("<body>\n"))
-        for box in boxes:
-            xml_str = box.get_xml_tag(newdoc).toxml()
-            xml_str = to_unicode(xml_str)
-            file_descriptor.write(
-                to_unicode("<p>") + xml_str + to_unicode("</p>\n")
-            )
-        file_descriptor.write(to_unicode("</body>\n</html>\n"))
+        _write_hocr(file_descriptor, boxes)
 
     def start_line(self, box):
-        # no empty line
-        if len(self.lines) > 0 and self.lines[-1].content == to_unicode(""):
-            return
+        # no empty line: a previous line left without words (for instance
+        # because the word filter dropped all of them) is replaced
+        if len(self.lines) > 0 and not any(
+                word.content.strip() for word in self.lines[-1].word_boxes):
+            self.lines.pop()
         self.lines.append(LineBox([], box))
 
     def add_word(self, word, box, confidence=0):
+        if self.word_filter is not None and \
+                not self.word_filter.accept(box, confidence):
+            return
         self.lines[-1].word_boxes.append(Box(word, box, confidence))
 
     def end_line(self):
@@ -713,6 +2221,139 @@ class LineBoxBuilder(BaseBuilder):
         return "Line boxes"
 
 
+class AltoBuilder(LineBoxBuilder):
+    """
+    Same as LineBoxBuilder (image_to_string() returns an array of LineBox),
+    but write_file() writes ALTO XML (v3) instead of hOCR.
+
+    With Libtesseract, the lines can be written as they are recognized:
+     > builder = AltoBuilder()
+     > lines = libtesseract.iter_lines(image, builder=builder)
+     > builder.write_file(file_descriptor, lines)
+
+    read_file() and iter_lines() read ALTO files too (like LineBoxBuilder
+    and WordBoxBuilder).
+    """
+
+    @staticmethod
+    def write_file(file_descriptor, boxes):
+        """
+        Write boxes (LineBox or Block) as ALTO XML. Each LineBox gets its
+        own TextBlock. Boxes are written as they come from 'boxes' (list or
+        generator).
+
+        Warning:
+            The file_descriptor must support UTF-8 ! (see module 'codecs')
+        """
+        _write_alto(file_descriptor, boxes)
+
+    @staticmethod
+    def __str__():
+        return "ALTO"
+
+
+class BlockBuilder(BaseBuilder):
+    """
+    If passed to image_to_string(), image_to_string() will return an array of
+    Block, in reading order. Each Block contains Paragraph, each Paragraph
+    contains LineBox.
+
+    Blocks and paragraphs are the ones found by the layout analysis of the
+    OCR tool. Only Libtesseract tells the type of the blocks. With Tesseract
+    (shell), the results are read from its TSV output (Tesseract >= 3.05).
+    """
+
+    def __init__(self, tesseract_layout=1, min_confidence=None, min_size=0):
+        """
+        Arguments:
+            tesseract_layout --- Tesseract page segmentation mode
+            min_confidence, min_size --- see LineBoxBuilder
+        """
+        file_ext = ["tsv"]
+        tess_flags = ["-psm", str(tesseract_layout)]
+        tess_conf = ["tsv"]
+        cun_args = []
+        super(BlockBuilder, self).__init__(file_ext, tess_flags, tess_conf,
+                                           cun_args)
+        self.blocks = []
+        self.tesseract_layout = tesseract_layout
+        self.rejected_words = {"confidence": 0, "size": 0}
+        self.word_filter = _new_word_filter(min_confidence, min_size,
+                                            self.rejected_words)
+        self.__paragraph = None
+        self.__line = None
+
+    def read_file(self, file_descriptor):
+        """
+        Extract the blocks from 'file_descriptor' (Tesseract TSV, or ALTO
+        as written by write_file())
+
+        Return:
+            An array of Block.
+        """
+        data = file_descriptor.read()
+        if data.startswith(_TSV_HEADER):
+            events = _tsv_block_events(data)
+        else:
+            parser = _AltoBlockParser()
+            parser.feed(data)
+            parser.close()
+            events = parser.events
+        builder = BlockBuilder()
+        builder.word_filter = self.word_filter
+        for event in events:
+            getattr(builder, event[0])(*event[1:])
+        return builder.get_output()
+
+    @staticmethod
+    def write_file(file_descriptor, blocks):
+        """
+        Write blocks as ALTO XML: a ComposedBlock per block, a TextBlock per
+        paragraph. Blocks are written as they come from 'blocks' (list or
+        generator).
+
+        Warning:
+            The file_descriptor must support UTF-8 ! (see module 'codecs')
+        """
+        _write_alto(file_descriptor, blocks)
+
+    def start_block(self, box, block_type=0):
+        self.blocks.append(Block([], box, block_type))
+        self.__paragraph = None
+        self.__line = None
+
+    def start_paragraph(self, box):
+        if len(self.blocks) <= 0:
+            self.start_block(box)
+        self.__paragraph = Paragraph([], box)
+        self.__line = None
+        self.blocks[-1].paragraphs.append(self.__paragraph)
+
+    def start_line(self, box):
+        if self.__paragraph is None:
+            self.start_paragraph(box)
+        self.__line = LineBox([], box)
+        self.__paragraph.lines.append(self.__line)
+
+    def add_word(self, word, box, confidence=0):
+        if self.word_filter is not None and \
+                not self.word_filter.accept(box, confidence):
+            return
+        if self.__line is None:
+            self.start_line(box)
+        self.__line.word_boxes.append(Box(word, box, confidence))
+
+    def end_line(self):
+        pass
+
+    def get_output(self):
+        return self.blocks
+
+    @staticmethod
+    def __str__():
+        return "Blocks"
+
+
 class DigitLineBoxBuilder(LineBoxBuilder):
     """
     If passed to image_to_string(), image_to_string() will return
@@ -726,6 +2367,9 @@ class DigitLineBoxBuilder(LineBoxBuilder):
     def __str__():
         return "Digit line boxes"
 
-    def __init__(self, tesseract_layout=1):
-        super(DigitLineBoxBuilder, self).__init__(tesseract_layout)
+    def __init__(self, tesseract_layout=1, tesseract_tsv=False,
+                 min_confidence=None, min_size=0):
+        super(DigitLineBoxBuilder, self).__init__(tesseract_layout,
+                                                  tesseract_tsv,
+                                                  min_confidence, min_size)
         self.tesseract_configs.append("digits")
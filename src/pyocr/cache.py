@@ -0,0 +1,492 @@
+"""
+Caches of OCR results (opt-in).
+
+With a ResultCache (persistent), image_to_string() of all the tools returns
+the output of the builder stored in the cache instead of running the OCR
+again on the same image with the same settings.
+
+USAGE:
+ > from pyocr import cache
+ > cache.set_cache(cache.ResultCache("/var/cache/myapp/ocr.sqlite"))
+ > # first call: OCR, then stored in the cache
+ > txt = tool.image_to_string(image, lang="fra")
+ > # same pixels, tool, version, language and builder settings: read from
+ > # the cache
+ > txt = tool.image_to_string(image, lang="fra")
+
+Results are looked up by a hash of the decoded pixels of the image (the same
+image read from a PNG file or from a TIFF file gives the same key), the
+tool, its version, the language, the type of builder and its settings.
+
+Results are stored compressed (zlib) in a SQLite database. The least
+recently used results are dropped when the database gets bigger than
+'max_size'. Results are pickled: only use a cache file that no one else
+can write.
+
+When the result comes from the cache, the builder is not used at all. Its
+attribute 'rejected_words' is still updated: the numbers of words the OCR
+dropped are stored with the result.
+
+EventCache keeps in memory the results of Libtesseract for the last images
+as the calls it makes on the builders (start_line(), add_word(), end_line(),
+...). The same image can then be read with other builders (TextBuilder,
+WordBoxBuilder, LineBoxBuilder, ...) without running the OCR again:
+ > cache.set_event_cache(cache.EventCache(max_size=64 * 1024 * 1024))
+ > txt = pyocr.libtesseract.image_to_string(image, lang="fra")
+ > # no OCR
+ > boxes = pyocr.libtesseract.image_to_string(
+ >     image, lang="fra", builder=pyocr.builders.LineBoxBuilder()
+ > )
+
+COPYRIGHT:
+PyOCR is released under the GPL v3.
+https://github.com/openpaperwork/pyocr#readme
+"""
+
+import functools
+import hashlib
+import logging
+import pickle
+import sqlite3
+import sys
+import collections
+import threading
+import time
+import zlib
+
+import six
+
+from . import builders
+from . import util
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    'EventCache',
+    'ResultCache',
+    'cached',
+    'cached_events',
+    'get_cache',
+    'get_event_cache',
+    'set_cache',
+    'set_event_cache',
+]
+
+# Changes each time the content of the cache entries changes
+KEY_VERSION = 3
+PICKLE_PROTOCOL = 2
+
+# builder attributes that change the output of the OCR tools
+_BUILDER_SETTINGS = (
+    "file_extensions",
+    "tesseract_flags",
+    "tesseract_configs",
+    "cuneiform_args",
+    "tesseract_layout",
+)
+
+_HASH = getattr(hashlib, "blake2b", hashlib.sha1)
+
+g_cache = None
+g_cache_lock = threading.Lock()
+g_event_cache = None
+
+
+def _hash_frame(hasher, image):
+    hasher.update(("%s %d %d\n" % ((image.mode,) + image.size)).encode())
+    if image.mode == "P":
+        hasher.update(bytes(bytearray(image.getpalette() or [])))
+    hasher.update(image.tobytes())
+
+
+def _hash_pixels(image, all_frames=False):
+    """
+    Returns the hash of the decoded pixels of the Pillow image 'image': of
+    its current frame, or of all its frames if 'all_frames'.
+    """
+    hasher = _HASH()
+    nb_frames = getattr(image, "n_frames", 1) if all_frames else 1
+    if nb_frames <= 1:
+        _hash_frame(hasher, image)
+        return hasher.hexdigest()
+    current = image.tell()
+    try:
+        for frame in range(nb_frames):
+            image.seek(frame)
+            _hash_frame(hasher, image)
+    finally:
+        image.seek(current)
+    return hasher.hexdigest()
+
+
+def _hash_image(image):
+    """
+    Returns (hash of the pixels of 'image', image to give to the OCR tool).
+    Paths and seekable file objects are still given as-is to the OCR tool
+    (see util.get_image_source()), which then reads all their frames (pages
+    of a TIFF file): all of them are hashed.
+    """
+    if isinstance(image, six.string_types):
+        return (_hash_pixels(util.load_image(image), True), image)
+    if hasattr(image, 'read'):
+        try:
+            position = image.tell()
+        except (AttributeError, IOError, OSError):
+            image = util.load_image(image)
+            return (_hash_pixels(image), image)
+        pixels = util.load_image(image)
+        pixels.load()
+        pixels_hash = _hash_pixels(pixels, True)
+        image.seek(position)
+        return (pixels_hash, image)
+    return (_hash_pixels(image), image)
+
+
+def _get_builder_settings(builder):
+    settings = [(name, getattr(builder, name, None))
+                for name in _BUILDER_SETTINGS]
+    word_filter = getattr(builder, "word_filter", None)
+    if word_filter is not None:
+        settings.append(("word_filter", (word_filter.min_confidence,
+                                         word_filter.min_size)))
+    return settings
+
+
+def _get_rejected(builder, before):
+    """
+    Returns the number of words 'builder' has dropped since its
+    'rejected_words' were 'before', or None if it does not count them.
+    """
+    rejected_words = getattr(builder, "rejected_words", None)
+    if rejected_words is None:
+        return None
+    return dict((reason, count - before.get(reason, 0))
+                for (reason, count) in rejected_words.items())
+
+
+def _add_rejected(builder, rejected):
+    rejected_words = getattr(builder, "rejected_words", None)
+    if rejected_words is None or rejected is None:
+        return
+    for (reason, count) in rejected.items():
+        rejected_words[reason] = rejected_words.get(reason, 0) + count
+
+
+class ResultCache(object):
+    """
+    Results of image_to_string() stored in a SQLite database.
+    """
+
+    def __init__(self, path, max_size=256 * 1024 * 1024,
+                 compression_level=6):
+        """
+        Arguments:
+            path --- path of the SQLite database (created if required)
+            max_size --- maximum size of the results stored (in bytes,
+                compressed)
+            compression_level --- zlib compression level (1-9)
+        """
+        self.path = path
+        self.max_size = max_size
+        self.compression_level = compression_level
+        self.hits = 0
+        self.misses = 0
+        with self.__connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " data BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_access REAL NOT NULL"
+                ")"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_last_access"
+                " ON results (last_access)"
+            )
+
+    def __connect(self):
+        # one connection per operation: the cache can be used from many
+        # threads and processes at once
+        return _Connection(sqlite3.connect(self.path, timeout=30))
+
+    @staticmethod
+    def get_key(tool, image, lang, builder):
+        """
+        Returns (key, image): the key of the result of 'tool' on 'image'
+        with 'lang' and 'builder', and the image to give to the OCR tool.
+        """
+        (pixels_hash, image) = _hash_image(image)
+        key = repr((
+            KEY_VERSION, tool.get_name(), tuple(tool.get_version()), lang,
+            type(builder).__module__, type(builder).__name__,
+            _get_builder_settings(builder), pixels_hash,
+        ))
+        return (_HASH(key.encode("utf-8")).hexdigest(), image)
+
+    def get(self, key):
+        """
+        Returns the result stored for 'key', or None.
+        """
+        with self.__connect() as connection:
+            row = connection.execute(
+                "SELECT data FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            try:
+                result = pickle.loads(zlib.decompress(bytes(row[0])))
+            except Exception as exc:
+                # corrupted, or written by another version of PyOCR (builder
+                # classes renamed, etc)
+                logger.warning("Dropping unreadable OCR result from the"
+                               " cache: %s", exc)
+                connection.execute("DELETE FROM results WHERE key = ?",
+                                   (key,))
+                self.misses += 1
+                return None
+            connection.execute(
+                "UPDATE results SET last_access = ? WHERE key = ?",
+                (time.time(), key)
+            )
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        """
+        Stores 'result', and drops the least recently used results if the
+        cache is too big.
+        """
+        data = zlib.compress(pickle.dumps(result, PICKLE_PROTOCOL),
+                             self.compression_level)
+        if len(data) > self.max_size:
+            return
+        with self.__connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO results (key, data, size, last_access)"
+                " VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(data), len(data), time.time())
+            )
+            (total,) = connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+            if total <= self.max_size:
+                return
+            evicted = []
+            for (old_key, size) in connection.execute(
+                    "SELECT key, size FROM results ORDER BY last_access"):
+                if total <= self.max_size:
+                    break
+                evicted.append((old_key,))
+                total -= size
+            connection.executemany("DELETE FROM results WHERE key = ?",
+                                   evicted)
+            logger.debug("OCR result cache: %d results dropped",
+                         len(evicted))
+
+    def get_size(self):
+        """
+        Returns (number of results, total size in bytes).
+        """
+        with self.__connect() as connection:
+            return tuple(connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone())
+
+    def clear(self):
+        with self.__connect() as connection:
+            connection.execute("DELETE FROM results")
+
+
+class _Connection(object):
+    """
+    Commits (or rolls back) and closes a SQLite connection.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self.connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.connection.commit()
+            else:
+                self.connection.rollback()
+        finally:
+            self.connection.close()
+
+
+class EventCache(object):
+    """
+    Results of Libtesseract (calls to make on the builders) for the last
+    images, in memory. The results are stored pickled: 'max_size' is the
+    number of bytes they take.
+    """
+
+    def __init__(self, max_size=64 * 1024 * 1024):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self._results = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(tool, image, lang, builder):
+        """
+        Returns (key, image): the key of the results of 'tool' on 'image'
+        with 'lang', and the image to give to the OCR tool. Only the
+        settings of 'builder' used to configure Tesseract matter.
+        """
+        (pixels_hash, image) = _hash_image(image)
+        key = (
+            tool.get_name(), lang, getattr(builder, "tesseract_layout", None),
+            "digits" in getattr(builder, "tesseract_configs", ()),
+            pixels_hash,
+        )
+        return (key, image)
+
+    def get(self, key):
+        """
+        Returns the events stored for 'key' (list of tuples (method name,
+        arguments...)), or None.
+        """
+        with self._lock:
+            data = self._results.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            # most recently used last
+            del self._results[key]
+            self._results[key] = data
+            self.hits += 1
+        return pickle.loads(data)
+
+    def put(self, key, events):
+        data = pickle.dumps(events, pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_size:
+            return
+        with self._lock:
+            if key in self._results:
+                self.size -= len(self._results.pop(key))
+            self._results[key] = data
+            self.size += len(data)
+            while self.size > self.max_size:
+                (_, old_data) = self._results.popitem(last=False)
+                self.size -= len(old_data)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._results)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self.size = 0
+
+
+def get_cache():
+    """
+    Returns the ResultCache used by image_to_string(), or None (default: no
+    cache).
+    """
+    with g_cache_lock:
+        return g_cache
+
+
+def set_cache(result_cache):
+    """
+    Select the ResultCache used by the image_to_string() function of all
+    the tools (None = no cache).
+    """
+    global g_cache
+    with g_cache_lock:
+        g_cache = result_cache
+
+
+def get_event_cache():
+    """
+    Returns the EventCache used by Libtesseract, or None (default: no
+    cache).
+    """
+    with g_cache_lock:
+        return g_event_cache
+
+
+def set_event_cache(event_cache):
+    """
+    Select the EventCache used by Libtesseract (None = no cache).
+    """
+    global g_event_cache
+    with g_cache_lock:
+        g_event_cache = event_cache
+
+
+def cached(image_to_string):
+    """
+    Decorator of the image_to_string() function of the tools: returns the
+    result stored in the current cache (see set_cache()) if there is one,
+    and stores the results of the OCR in it.
+    """
+    @functools.wraps(image_to_string)
+    def _image_to_string(image, lang=None, builder=None):
+        result_cache = get_cache()
+        if result_cache is None:
+            return image_to_string(image, lang, builder)
+        if builder is None:
+            builder = builders.TextBuilder()
+        tool = sys.modules[image_to_string.__module__]
+        try:
+            (key, image) = result_cache.get_key(tool, image, lang, builder)
+            entry = result_cache.get(key)
+        except sqlite3.Error as exc:
+            logger.warning("OCR result cache unavailable: %s", exc)
+            return image_to_string(image, lang, builder)
+        if entry is not None:
+            (result, rejected) = entry
+            _add_rejected(builder, rejected)
+            return result
+        before = dict(getattr(builder, "rejected_words", None) or {})
+        result = image_to_string(image, lang, builder)
+        rejected = _get_rejected(builder, before)
+        try:
+            result_cache.put(key, (result, rejected))
+        except sqlite3.Error as exc:
+            logger.warning("Failed to store the OCR result in the cache: %s",
+                           exc)
+        return result
+    return _image_to_string
+
+
+def cached_events(iter_results):
+    """
+    Decorator of the generators yielding the results of the OCR as calls to
+    make on the builder (see libtesseract._iter_results()): yields the
+    events stored in the current event cache (see set_event_cache()) if
+    there are some, and stores the events of the OCR in it once the
+    generator has yielded all of them.
+    """
+    @functools.wraps(iter_results)
+    def _iter_results(image, lang, builder):
+        event_cache = get_event_cache()
+        if event_cache is None:
+            for event in iter_results(image, lang, builder):
+                yield event
+            return
+        tool = sys.modules[iter_results.__module__]
+        (key, image) = event_cache.get_key(tool, image, lang, builder)
+        events = event_cache.get(key)
+        if events is not None:
+            for event in events:
+                yield event
+            return
+        events = []
+        for event in iter_results(image, lang, builder):
+            events.append(event)
+            yield event
+        event_cache.put(key, events)
+    return _iter_results
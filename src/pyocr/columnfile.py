@@ -0,0 +1,170 @@
+"""
+Helpers shared by the binary file formats of PyOCR (pyocr.boxfile,
+pyocr.textindex): files made of little-endian columns of numbers, starting
+on 8 bytes boundaries, and of a table of UTF-8 strings. Files are mapped in
+memory (mmap) and the columns are read without copying them.
+
+USAGE:
+ > (file_descriptor, mapping, buffer) = columnfile.map_source(path)
+ > (column, offset) = columnfile.read_column(buffer, offset,
+ >                                           columnfile.UINT32, count)
+ > ...
+ > columnfile.release([column, buffer])
+ > columnfile.unmap(file_descriptor, mapping)
+
+COPYRIGHT:
+PyOCR is released under the GPL v3.
+https://github.com/openpaperwork/pyocr#readme
+"""
+
+import array
+import mmap
+import sys
+
+import six
+
+from .error import PyocrException
+
+__all__ = [
+    'ALIGNMENT',
+    'FLOAT64',
+    'INT32',
+    'StringTable',
+    'UINT32',
+    'UINT8',
+    'map_source',
+    'padding',
+    'read_column',
+    'release',
+    'to_bytes',
+    'unmap',
+]
+
+ALIGNMENT = 8
+
+# array typecodes of the column types
+INT32 = "i" if array.array("i").itemsize == 4 else "l"
+UINT32 = "I" if array.array("I").itemsize == 4 else "L"
+FLOAT64 = "d"
+UINT8 = "B"
+
+
+def padding(size):
+    """
+    Returns the number of bytes to add after 'size' bytes to reach the next
+    section boundary.
+    """
+    return (-size) % ALIGNMENT
+
+
+def to_bytes(column):
+    """
+    Returns the content of the array 'column' as little-endian bytes.
+    """
+    if sys.byteorder != "little":
+        column = array.array(column.typecode, column)
+        column.byteswap()
+    if hasattr(column, "tobytes"):
+        return column.tobytes()
+    return column.tostring()
+
+
+def map_source(source):
+    """
+    Returns (file, mmap, memoryview) for 'source' (path of a file, or
+    bytes-like object). File and mmap are None if there is nothing to close.
+    """
+    if not isinstance(source, six.string_types):
+        return (None, None, memoryview(source))
+    file_descriptor = open(source, 'rb')
+    try:
+        mapping = mmap.mmap(file_descriptor.fileno(), 0,
+                            access=mmap.ACCESS_READ)
+    except ValueError:
+        # empty file
+        return (file_descriptor, None, memoryview(b""))
+    return (file_descriptor, mapping, memoryview(mapping))
+
+
+def release(columns):
+    """
+    Releases the views on the mapping among 'columns' (see read_column()).
+    """
+    for column in columns:
+        if isinstance(column, memoryview) and hasattr(column, "release"):
+            column.release()
+
+
+def unmap(file_descriptor, mapping):
+    """
+    Closes the file and the mapping returned by map_source(). All the views
+    on the mapping must have been released (see release()): mmap raises
+    BufferError otherwise. The file is closed in any case.
+    """
+    try:
+        if mapping is not None:
+            mapping.close()
+    finally:
+        if file_descriptor is not None:
+            file_descriptor.close()
+
+
+def read_column(buffer, offset, typecode, count):
+    """
+    Returns a view on the section of 'buffer' at 'offset' (or a copy on
+    big-endian systems), and the offset of the end of the section.
+    """
+    offset += padding(offset)
+    size = count * array.array(typecode).itemsize
+    view = buffer[offset:offset + size]
+    if len(view) != size:
+        release([view])
+        raise PyocrException("Truncated file")
+    if sys.byteorder == "little" and hasattr(view, "cast"):
+        return (view.cast(typecode), offset + size)
+    column = array.array(typecode)
+    if hasattr(column, "frombytes"):
+        column.frombytes(bytes(view))
+    else:
+        column.fromstring(bytes(view))
+    if sys.byteorder != "little":
+        column.byteswap()
+    return (column, offset + size)
+
+
+class StringTable(object):
+    """
+    Table of strings stored in a file, decoded when accessed.
+    """
+
+    def __init__(self, index, data):
+        """
+        Arguments:
+            index --- offset of each string in 'data' (nb strings + 1)
+            data --- UTF-8 strings, one after the other
+        """
+        self.index = index
+        self.data = data
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.index) - 1
+
+    def __getitem__(self, string_id):
+        string = self.cache.get(string_id)
+        if string is None:
+            start = self.index[string_id]
+            end = self.index[string_id + 1]
+            string = bytes(self.data[start:end]).decode("utf-8")
+            self.cache[string_id] = string
+        return string
+
+    def __iter__(self):
+        for string_id in range(len(self)):
+            yield self[string_id]
+
+    def get_columns(self):
+        """
+        Returns the columns of the table, to release them (see release()).
+        """
+        return [self.index, self.data]
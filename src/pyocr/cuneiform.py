@@ -21,8 +21,12 @@ import os
 import re
 import subprocess
 import tempfile
+import threading
+
+import six
 
 from . import builders
+from . import cache
 from . import error
 from . import util
 
@@ -35,9 +39,27 @@ CUNEIFORM_DATA_POSSIBLE_PATHS = [
     "/usr/share/cuneiform",
 ]
 
+# Intermediate image format piped to Cuneiform (see util.IMAGE_FORMATS).
+# Cuneiform builds without ImageMagick only read BMP (1, 8 or 24 bits).
+IMAGE_FORMAT = "bmp"
+
+# Image file formats that Cuneiform can read by itself. Images given as file
+# names or file objects in one of these formats are not decoded by PyOCR.
+# Only BMP by default (see IMAGE_FORMAT). If your Cuneiform build has
+# ImageMagick support, you can extend it to
+# ("bmp", "gif", "jpeg", "png", "pnm", "tiff").
+PASSTHROUGH_FORMATS = ("bmp",)
+
 LANGUAGES_LINE_PREFIX = "Supported languages: "
 LANGUAGES_SPLIT_RE = re.compile("[^a-z]")
-VERSION_LINE_RE = re.compile("Cuneiform for \w+ (\d+).(\d+).(\d+)")
+VERSION_LINE_RE = re.compile(r"Cuneiform for \w+ (\d+).(\d+).(\d+)")
+
+# Results are read directly from the standard output of Cuneiform when the
+# system allows it, instead of going through a temporary file
+OUTPUT_TO_STDOUT = (os.name != "nt")
+
+g_versions = {}  # CUNEIFORM_CMD --> version
+g_languages = {}  # CUNEIFORM_CMD --> languages
 
 __all__ = [
     'can_detect_orientation',
@@ -63,6 +85,8 @@ def get_available_builders():
     return [
         builders.TextBuilder,
         builders.WordBoxBuilder,
+        builders.LineBoxBuilder,
+        builders.AltoBuilder,
     ]
 
 
@@ -75,8 +99,10 @@ class CuneiformError(error.PyocrException):
 
 
 def temp_file(suffix):
-    ''' Returns a temporary file '''
-    return tempfile.NamedTemporaryFile(prefix='cuneiform_', suffix=suffix)
+    ''' Returns a temporary file, in the workspace (see util.get_workspace())
+    '''
+    return tempfile.NamedTemporaryFile(prefix='cuneiform_', suffix=suffix,
+                                       dir=util.get_workspace().get_path())
 
 
 def cleanup(filename):
@@ -87,32 +113,56 @@ def cleanup(filename):
         pass
 
 
+@cache.cached
 def image_to_string(image, lang=None, builder=None):
+    '''
+    Runs Cuneiform on the specified image.
+
+    Arguments:
+        image --- image to OCR: Pillow image, or path to / file object of an
+            image file. Image files in one of the PASSTHROUGH_FORMATS are
+            given as-is to Cuneiform.
+        lang --- Cuneiform language to use.
+        builder --- builder used to configure Cuneiform and read its result
+            (default: TextBuilder)
+    '''
     if builder is None:
         builder = builders.TextBuilder()
     if "digits" in builder.tesseract_configs:
         raise NotImplementedError(
             "Numerical only : This option is not available with Cuneiform"
         )
-    with temp_file(builder.file_extensions[0]) as output_file:
-        cmd = [CUNEIFORM_CMD]
-        if lang is not None:
-            cmd += ["-l", lang]
-        cmd += builder.cuneiform_args
-        cmd += ["-o", output_file.name]
-        cmd += ["-"]  # stdin
-
-        if image.mode != "RGB":
-            image = image.convert("RGB")
-
+    cmd = [CUNEIFORM_CMD]
+    if lang is not None:
+        cmd += ["-l", lang]
+    cmd += builder.cuneiform_args
+
+    (image_format, image) = util.get_image_source(image, PASSTHROUGH_FORMATS)
+    if isinstance(image, six.string_types):
+        img_arg = image
+        img_data = None
+    elif image_format is not None:
+        img_arg = "-"  # stdin
+        img_data = image.read()
+    else:
+        img_arg = "-"  # stdin
+        (image, fmt) = util.choose_image_format(image, IMAGE_FORMAT)
         img_data = BytesIO()
-        image.save(img_data, format="BMP")
+        util.save_image(image, fmt, img_data)
+        img_data = img_data.getvalue()
 
+    if OUTPUT_TO_STDOUT:
+        return _run_to_stdout(cmd + ["-o", "/dev/stdout", img_arg],
+                              img_data, builder)
+
+    with temp_file(builder.file_extensions[0]) as output_file:
+        cmd += ["-o", output_file.name, img_arg]
         proc = subprocess.Popen(cmd,
                                 stdin=subprocess.PIPE,
                                 stdout=subprocess.PIPE,
                                 stderr=subprocess.STDOUT)
-        proc.stdin.write(img_data.getvalue())
+        if img_data is not None:
+            proc.stdin.write(img_data)
         proc.stdin.close()
         output = proc.stdout.read().decode('utf-8')
         retcode = proc.wait()
@@ -124,11 +174,65 @@ def image_to_string(image, lang=None, builder=None):
         return results
 
 
+def _read_output(builder, file_descriptor):
+    """
+    Word and line boxes are parsed chunk by chunk as the output of Cuneiform
+    comes (see iter_words() and iter_lines()). Other builders read all of it
+    before parsing it.
+    """
+    if isinstance(builder, builders.LineBoxBuilder):
+        return list(builder.iter_lines(file_descriptor))
+    if isinstance(builder, builders.WordBoxBuilder):
+        return list(builder.iter_words(file_descriptor))
+    return builder.read_file(file_descriptor)
+
+
+def _run_to_stdout(cmd, img_data, builder):
+    """
+    Run Cuneiform with its output file set to its standard output, and parse
+    the output stream while Cuneiform is writing it (see _read_output()).
+    """
+    proc = subprocess.Popen(cmd,
+                            stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE)
+    # stderr must be emptied while the builder reads stdout, or Cuneiform
+    # may get stuck
+    errors = []
+    errors_reader = threading.Thread(
+        target=lambda: errors.append(proc.stderr.read())
+    )
+    errors_reader.daemon = True
+    errors_reader.start()
+
+    if img_data is not None:
+        proc.stdin.write(img_data)
+    proc.stdin.close()
+
+    reader = codecs.getreader('utf-8')(proc.stdout, errors='replace')
+    try:
+        results = _read_output(builder, reader)
+    finally:
+        proc.stdout.read()  # whatever the builder didn't need
+        retcode = proc.wait()
+        errors_reader.join()
+    if retcode:
+        raise CuneiformError(retcode,
+                             b"".join(errors).decode('utf-8', 'replace'))
+    return results
+
+
 def is_available():
     return util.is_on_path(CUNEIFORM_CMD)
 
 
 def get_available_languages():
+    """
+    Returns the list of languages that Cuneiform knows how to handle.
+    Cuneiform is only run the first time: the list is then cached.
+    """
+    if CUNEIFORM_CMD in g_languages:
+        return list(g_languages[CUNEIFORM_CMD])
     proc = subprocess.Popen([CUNEIFORM_CMD, "-l"], stdout=subprocess.PIPE,
                             stderr=subprocess.STDOUT)
     output = proc.stdout.read().decode('utf-8')
@@ -142,18 +246,28 @@ def get_available_languages():
             if language == "":
                 continue
             languages.append(language)
-    return languages
+    g_languages[CUNEIFORM_CMD] = languages
+    return list(languages)
 
 
 def get_version():
+    """
+    Returns Cuneiform version as a tuple (for instance (1, 1, 0)), or None
+    if it can't be found. Cuneiform is only run the first time: the version
+    is then cached.
+    """
+    if CUNEIFORM_CMD in g_versions:
+        return g_versions[CUNEIFORM_CMD]
     proc = subprocess.Popen([CUNEIFORM_CMD], stdout=subprocess.PIPE,
                             stderr=subprocess.STDOUT)
     output = proc.stdout.read().decode('utf-8')
     proc.wait()
     for line in output.split("\n"):
         m = VERSION_LINE_RE.match(line)
+        if m is None:
+            continue
         g = m.groups()
-        if m is not None:
-            ver = (int(g[0]), int(g[1]), int(g[2]))
-            return ver
+        ver = (int(g[0]), int(g[1]), int(g[2]))
+        g_versions[CUNEIFORM_CMD] = ver
+        return ver
     return None
@@ -0,0 +1,189 @@
+"""
+Multi-page documents: multi-page image files (TIFF, GIF, ...) or lists of
+pages (image files or Pillow images), decoded page by page. The next page
+is decoded in a background thread while the current one goes through the
+OCR, and no more than 'max_pages' pages are in memory at once.
+
+USAGE:
+ > from pyocr import document
+ > for (page_idx, txt) in enumerate(
+ >         document.iter_results(tool, "scan.tiff", lang="fra")):
+ >     print(page_idx, txt)
+ > # or, page by page
+ > for page in document.iter_pages(["page1.png", "page2.png"]):
+ >     txt = tool.image_to_string(page, lang="fra")
+
+COPYRIGHT:
+PyOCR is released under the GPL v3.
+https://github.com/openpaperwork/pyocr#readme
+"""
+
+import copy
+import logging
+import sys
+import threading
+
+from PIL import Image
+import six
+from six.moves import queue
+
+from . import util
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    'iter_pages',
+    'iter_results',
+]
+
+# timeout (seconds) of the waits of the decoding thread, so that it stops
+# even if no one reads the pages anymore
+POLL_INTERVAL = 0.5
+
+
+def _is_multi_page(source):
+    return (isinstance(source, (six.string_types, Image.Image)) or
+            hasattr(source, 'read'))
+
+
+def _decode_frames(source):
+    """
+    Yields the frames of the multi-page image 'source' (path, file object or
+    Pillow image), decoded.
+    """
+    image = util.load_image(source)
+    # Pillow image given by the caller: left on its current frame
+    current_frame = image.tell() if image is source else None
+    try:
+        for frame_idx in range(getattr(image, "n_frames", 1)):
+            image.seek(frame_idx)
+            # copy(): the frame stays valid once the image moves to the next
+            # frame
+            yield image.copy()
+    finally:
+        if image is not source:
+            image.close()
+        else:
+            image.seek(current_frame)
+
+
+def _decode_pages(pages):
+    for page in pages:
+        image = util.load_image(page)
+        image.load()
+        yield image
+        # not kept while the next page is decoded
+        page = image = None
+
+
+class _Prefetcher(object):
+    """
+    Decodes the pages in a background thread. 'slots' holds one token for
+    each page that may still be decoded: one is taken before decoding a
+    page, and given back when the reader is done with the page.
+    """
+
+    def __init__(self, pages, max_pages):
+        self.pages = pages
+        self.slots = queue.Queue()
+        for _ in range(max_pages):
+            self.slots.put(None)
+        self.decoded = queue.Queue()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _take_slot(self):
+        while not self.stopped.is_set():
+            try:
+                self.slots.get(timeout=POLL_INTERVAL)
+                return True
+            except queue.Empty:
+                pass
+        return False
+
+    def _run(self):
+        try:
+            while self._take_slot():
+                try:
+                    page = next(self.pages)
+                except StopIteration:
+                    break
+                self.decoded.put((page, None))
+                page = None
+        except Exception:
+            self.decoded.put((None, sys.exc_info()))
+            return
+        finally:
+            self.pages.close()
+        self.decoded.put((None, None))
+
+    def __iter__(self):
+        try:
+            while True:
+                (page, exc_info) = self.decoded.get()
+                if exc_info is not None:
+                    six.reraise(*exc_info)
+                if page is None:
+                    return
+                yield page
+                page = None
+                self.slots.put(None)
+        finally:
+            self.stopped.set()
+
+
+def iter_pages(source, max_pages=2):
+    """
+    Returns an iterator over the pages of a document as Pillow images,
+    decoded one by one.
+
+    Arguments:
+        source --- multi-page image (path, file object or Pillow image) or
+            list of pages (paths, file objects or Pillow images). Lists
+            can be any iterable (generators, etc).
+        max_pages --- maximum number of pages decoded at once: the page
+            currently used plus the pages decoded in advance in a
+            background thread. 1 = no page decoded in advance.
+
+    A page should not be used anymore once the next page has been
+    requested: the thread then starts decoding another page. Pages still
+    referenced by the caller at that point (for instance by the variable
+    of a 'for' loop, until the next page is returned) stay in memory on
+    top of 'max_pages'.
+    """
+    if max_pages < 1:
+        raise ValueError("max_pages must be at least 1")
+    if _is_multi_page(source):
+        pages = _decode_frames(source)
+    else:
+        pages = _decode_pages(iter(source))
+    return _iter_prefetched(pages, max_pages)
+
+
+def _iter_prefetched(pages, max_pages):
+    # the decoding thread only starts once the first page is requested
+    for page in _Prefetcher(pages, max_pages):
+        yield page
+        # not kept while the next page is decoded
+        page = None
+
+
+def iter_results(tool, source, lang=None, builder=None, max_pages=2):
+    """
+    Runs tool.image_to_string() on each page of a document (see
+    iter_pages()) and yields the results page by page. The next page is
+    decoded while the OCR runs on the current one.
+
+    Arguments:
+        tool --- OCR tool (see pyocr.get_available_tools())
+        source --- see iter_pages()
+        lang --- language to use
+        builder --- builder to use (default: TextBuilder). Each page goes
+            through a copy of it: builder options apply to all the pages.
+        max_pages --- see iter_pages()
+    """
+    for page in iter_pages(source, max_pages):
+        page_builder = copy.deepcopy(builder)
+        yield tool.image_to_string(page, lang=lang, builder=page_builder)
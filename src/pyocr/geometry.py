@@ -0,0 +1,325 @@
+"""
+Geometry on whole sets of boxes at once, with NumPy (required by this
+module only): transforms (scale, translation, rotation), areas, IoU matrix,
+non-maximum suppression, intersections and unions.
+
+Positions are handled as int32 arrays of shape (N, 4): x1, y1, x2, y2 (see
+to_array()). Results go back to Box, LineBox and BoxArray with
+from_array() or transform().
+
+USAGE:
+ > from pyocr import geometry
+ > # results of OCR on a copy of the image downscaled by 2, back to the
+ > # coordinates of the original image
+ > line_boxes = geometry.transform(line_boxes, geometry.scaling(2))
+ > # transforms are combined with numpy.dot() (last applied first)
+ > matrix = geometry.translation(10, 0).dot(geometry.rotation(90))
+
+COPYRIGHT:
+PyOCR is released under the GPL v3.
+https://github.com/openpaperwork/pyocr#readme
+"""
+
+import array
+import math
+
+import numpy
+
+from . import builders
+
+__all__ = [
+    'areas',
+    'bounding_box',
+    'from_array',
+    'intersection',
+    'iou_matrix',
+    'merge_overlapping',
+    'nms',
+    'rotation',
+    'scaling',
+    'to_array',
+    'transform',
+    'transform_positions',
+    'translation',
+    'union',
+]
+
+# rows of the IoU matrix computed at once by merge_overlapping()
+CHUNK_SIZE = 1024
+
+
+def to_array(boxes):
+    """
+    Returns the positions of the boxes (Box, LineBox, BoxArray, ...) as an
+    int32 array of shape (N, 4): x1, y1, x2, y2.
+    """
+    if isinstance(boxes, builders.BoxArray):
+        return boxes.to_numpy()[0]
+    positions = [box.position[0] + box.position[1] for box in boxes]
+    return numpy.array(positions, dtype=numpy.int32).reshape(-1, 4)
+
+
+def _to_position(row):
+    (x1, y1, x2, y2) = row
+    return ((x1, y1), (x2, y2))
+
+
+def from_array(boxes, positions):
+    """
+    Returns copies of the boxes (list of Box or LineBox, or BoxArray) with
+    the positions 'positions' (see to_array()). The word boxes of LineBox
+    are kept as they are (see transform()).
+    """
+    positions = numpy.asarray(positions)
+    if len(positions) != len(boxes):
+        raise ValueError("%d positions for %d boxes" % (
+            len(positions), len(boxes)
+        ))
+    if isinstance(boxes, builders.BoxArray):
+        result = builders.BoxArray(boxes)
+        for (idx, name) in enumerate(("x1", "y1", "x2", "y2")):
+            column = array.array(builders.BoxArray.COORDINATE_TYPE)
+            data = numpy.ascontiguousarray(positions[:, idx],
+                                           dtype=numpy.int32).tobytes()
+            if hasattr(column, "frombytes"):
+                column.frombytes(data)
+            else:
+                column.fromstring(data)
+            setattr(result, name, column)
+        return result
+    # tolist(): positions are made of Python integers, like everywhere else
+    result = []
+    for (box, row) in zip(boxes, positions.tolist()):
+        if isinstance(box, builders.LineBox):
+            result.append(builders.LineBox(box.word_boxes,
+                                           _to_position(row)))
+        else:
+            result.append(builders.Box(box.content, _to_position(row),
+                                       box.confidence))
+    return result
+
+
+def scaling(factor_x, factor_y=None):
+    """
+    Returns the 3x3 matrix of a scaling, to use with transform().
+    """
+    if factor_y is None:
+        factor_y = factor_x
+    return numpy.array([[factor_x, 0, 0], [0, factor_y, 0], [0, 0, 1]],
+                       dtype=numpy.float64)
+
+
+def translation(offset_x, offset_y):
+    """
+    Returns the 3x3 matrix of a translation, to use with transform().
+    """
+    return numpy.array([[1, 0, offset_x], [0, 1, offset_y], [0, 0, 1]],
+                       dtype=numpy.float64)
+
+
+def rotation(angle, center=(0, 0)):
+    """
+    Returns the 3x3 matrix of a rotation of 'angle' degrees
+    counter-clockwise around 'center' (like PIL.Image.rotate(); the y axis
+    goes down), to use with transform().
+    """
+    angle = math.radians(angle)
+    (cos, sin) = (math.cos(angle), math.sin(angle))
+    # exact rotations of multiples of 90 degrees
+    (cos, sin) = (round(cos, 12), round(sin, 12))
+    (center_x, center_y) = center
+    matrix = numpy.array([[cos, sin, 0], [-sin, cos, 0], [0, 0, 1]],
+                         dtype=numpy.float64)
+    return translation(center_x, center_y).dot(matrix).dot(
+        translation(-center_x, -center_y)
+    )
+
+
+def transform_positions(positions, matrix):
+    """
+    Applies the affine transform 'matrix' (3x3, see scaling(),
+    translation(), rotation(); combine them with numpy.dot()) to the
+    positions. Returns the boxes around the transformed corners, rounded to
+    the nearest integers.
+    """
+    positions = numpy.asarray(positions, dtype=numpy.float64)
+    matrix = numpy.asarray(matrix, dtype=numpy.float64)
+    # corners: (N, 4 corners, x and y)
+    corners = positions[:, [[0, 1], [2, 1], [0, 3], [2, 3]]]
+    corners = corners.dot(matrix[:2, :2].T) + matrix[:2, 2]
+    result = numpy.concatenate([corners.min(axis=1), corners.max(axis=1)],
+                               axis=1)
+    return numpy.rint(result).astype(numpy.int32)
+
+
+def transform(boxes, matrix):
+    """
+    Returns copies of the boxes (list of Box or LineBox, or BoxArray)
+    transformed by 'matrix' (see transform_positions()). The word boxes of
+    LineBox are transformed too.
+    """
+    if isinstance(boxes, builders.BoxArray):
+        return from_array(boxes, transform_positions(to_array(boxes),
+                                                     matrix))
+    boxes = list(boxes)
+    words = [box for line in boxes if isinstance(line, builders.LineBox)
+             for box in line.word_boxes]
+    words = iter(from_array(
+        words, transform_positions(to_array(words), matrix)
+    ))
+    result = from_array(boxes, transform_positions(to_array(boxes), matrix))
+    for line in result:
+        if isinstance(line, builders.LineBox):
+            line.word_boxes = [next(words) for _ in line.word_boxes]
+    return result
+
+
+def areas(positions):
+    """
+    Returns the areas of the boxes (float64 array of shape (N,)). Boxes
+    with a negative width or height have an area of 0.
+    """
+    positions = numpy.asarray(positions, dtype=numpy.float64)
+    return (numpy.clip(positions[:, 2] - positions[:, 0], 0, None) *
+            numpy.clip(positions[:, 3] - positions[:, 1], 0, None))
+
+
+def intersection(positions_a, positions_b):
+    """
+    Returns the intersections of the boxes of 'positions_a' with the boxes
+    of 'positions_b', one by one (same shape). Boxes that do not overlap
+    give empty boxes (x2 <= x1 or y2 <= y1).
+    """
+    positions_a = numpy.asarray(positions_a)
+    positions_b = numpy.asarray(positions_b)
+    return numpy.concatenate([
+        numpy.maximum(positions_a[:, :2], positions_b[:, :2]),
+        numpy.minimum(positions_a[:, 2:], positions_b[:, 2:]),
+    ], axis=1)
+
+
+def union(positions_a, positions_b):
+    """
+    Returns the boxes around the boxes of 'positions_a' and the boxes of
+    'positions_b', one by one (same shape).
+    """
+    positions_a = numpy.asarray(positions_a)
+    positions_b = numpy.asarray(positions_b)
+    return numpy.concatenate([
+        numpy.minimum(positions_a[:, :2], positions_b[:, :2]),
+        numpy.maximum(positions_a[:, 2:], positions_b[:, 2:]),
+    ], axis=1)
+
+
+def bounding_box(positions):
+    """
+    Returns the box around all the boxes (array of shape (4,)).
+    """
+    positions = numpy.asarray(positions)
+    return numpy.concatenate([positions[:, :2].min(axis=0),
+                              positions[:, 2:].max(axis=0)])
+
+
+def iou_matrix(positions_a, positions_b=None):
+    """
+    Returns the intersection over union of each box of 'positions_a' with
+    each box of 'positions_b' (float64 array of shape (N, M)). By default,
+    'positions_b' is 'positions_a'.
+    """
+    positions_a = numpy.asarray(positions_a, dtype=numpy.float64)
+    if positions_b is None:
+        positions_b = positions_a
+    positions_b = numpy.asarray(positions_b, dtype=numpy.float64)
+    width = numpy.clip(
+        numpy.minimum(positions_a[:, None, 2], positions_b[None, :, 2]) -
+        numpy.maximum(positions_a[:, None, 0], positions_b[None, :, 0]),
+        0, None
+    )
+    height = numpy.clip(
+        numpy.minimum(positions_a[:, None, 3], positions_b[None, :, 3]) -
+        numpy.maximum(positions_a[:, None, 1], positions_b[None, :, 1]),
+        0, None
+    )
+    inter = width * height
+    total = (areas(positions_a)[:, None] + areas(positions_b)[None, :] -
+             inter)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        return numpy.where(total > 0, inter / total, 0.0)
+
+
+def nms(positions, scores, max_iou=0.5):
+    """
+    Non-maximum suppression: goes through the boxes from the highest score
+    to the lowest, and drops the boxes overlapping a box already kept with
+    an IoU above 'max_iou'.
+
+    Returns:
+        The indexes of the boxes kept (int array), highest score first
+    """
+    positions = numpy.asarray(positions, dtype=numpy.float64)
+    scores = numpy.asarray(scores)
+    # stable: boxes with the same score are kept in their order
+    order = numpy.argsort(-scores, kind="stable")
+    box_areas = areas(positions)
+    kept = []
+    while len(order) > 0:
+        idx = order[0]
+        kept.append(idx)
+        rest = order[1:]
+        width = numpy.clip(
+            numpy.minimum(positions[idx, 2], positions[rest, 2]) -
+            numpy.maximum(positions[idx, 0], positions[rest, 0]), 0, None
+        )
+        height = numpy.clip(
+            numpy.minimum(positions[idx, 3], positions[rest, 3]) -
+            numpy.maximum(positions[idx, 1], positions[rest, 1]), 0, None
+        )
+        inter = width * height
+        total = box_areas[idx] + box_areas[rest] - inter
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            iou = numpy.where(total > 0, inter / total, 0.0)
+        order = rest[iou <= max_iou]
+    return numpy.array(kept, dtype=numpy.intp)
+
+
+def merge_overlapping(positions, min_iou=0.0):
+    """
+    Merges the boxes overlapping each other (IoU above 'min_iou'), directly
+    or through other boxes.
+
+    Returns:
+        (merged positions, labels): the boxes around each group of boxes,
+        in the order of their first box, and the index of the group of each
+        box
+    """
+    positions = numpy.asarray(positions)
+    nb_boxes = len(positions)
+    parents = list(range(nb_boxes))
+
+    def find(idx):
+        while parents[idx] != idx:
+            parents[idx] = parents[parents[idx]]
+            idx = parents[idx]
+        return idx
+
+    for start in range(0, nb_boxes, CHUNK_SIZE):
+        iou = iou_matrix(positions[start:start + CHUNK_SIZE], positions)
+        (rows, columns) = numpy.nonzero(iou > min_iou)
+        for (row, column) in zip((rows + start).tolist(), columns.tolist()):
+            if row >= column:
+                continue
+            (root_a, root_b) = (find(row), find(column))
+            if root_a != root_b:
+                parents[max(root_a, root_b)] = min(root_a, root_b)
+
+    roots = numpy.array([find(idx) for idx in range(nb_boxes)],
+                        dtype=numpy.intp)
+    # each root is the first box of its group
+    (unique_roots, labels) = numpy.unique(roots, return_inverse=True)
+    labels = labels.reshape(-1)
+    merged = positions[unique_roots].copy()
+    numpy.minimum.at(merged[:, 0], labels, positions[:, 0])
+    numpy.minimum.at(merged[:, 1], labels, positions[:, 1])
+    numpy.maximum.at(merged[:, 2], labels, positions[:, 2])
+    numpy.maximum.at(merged[:, 3], labels, positions[:, 3])
+    return (merged, labels)
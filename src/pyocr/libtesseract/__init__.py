@@ -16,6 +16,8 @@ https://github.com/openpaperwork/pyocr#readme
 '''
 from os import devnull
 from .. import builders
+from .. import cache
+from .. import util
 from . import tesseract_raw
 from ..error import TesseractError
 from ..util import digits_only
@@ -33,6 +35,8 @@ __all__ = [
     'get_version',
     'image_to_string',
     'is_available',
+    'iter_lines',
+    'iter_words',
     'TesseractError',
 ]
 
@@ -42,6 +46,7 @@ def can_detect_orientation():
 
 
 def detect_orientation(image, lang=None):
+    image = util.load_image(image)
     handle = tesseract_raw.init(lang=lang)
     try:
         tesseract_raw.set_page_seg_mode(
@@ -75,6 +80,8 @@ def get_available_builders():
     return [
         builders.TextBuilder,
         builders.WordBoxBuilder,
+        builders.AltoBuilder,
+        builders.BlockBuilder,
     ]
 
 
@@ -85,11 +92,24 @@ def _tess_box_to_pyocr_box(box):
     )
 
 
-def image_to_string(image, lang=None, builder=None):
-    if builder is None:
-        builder = builders.TextBuilder()
+@cache.cached_events
+def _iter_results(image, lang, builder):
+    """
+    Run the OCR on 'image' and yield the results as Tesseract's result
+    iterator reaches them. Results are the calls to make on the builder:
+    tuples (method name, arguments...).
+
+    'builder' is only used to configure Tesseract.
+
+    The words are surrounded by the events 'start_block' (with the block
+    type, see tesseract_raw.PolyBlockType), 'start_paragraph' and
+    'start_line', and 'end_line', 'end_paragraph' and 'end_block'.
+    """
+    image = util.load_image(image)
     handle = tesseract_raw.init(lang=lang)
 
+    lvl_block = tesseract_raw.PageIteratorLevel.BLOCK
+    lvl_para = tesseract_raw.PageIteratorLevel.PARA
     lvl_line = tesseract_raw.PageIteratorLevel.TEXTLINE
     lvl_word = tesseract_raw.PageIteratorLevel.WORD
 
@@ -126,6 +146,27 @@ def image_to_string(image, lang=None, builder=None):
         )
 
         while True:
+            if tesseract_raw.page_iterator_is_at_beginning_of(
+                    page_iterator, lvl_block):
+                (r, box) = tesseract_raw.page_iterator_bounding_box(
+                    page_iterator, lvl_block
+                )
+                assert r
+                box = _tess_box_to_pyocr_box(box)
+                block_type = tesseract_raw.page_iterator_block_type(
+                    page_iterator
+                )
+                yield ("start_block", box, block_type)
+
+            if tesseract_raw.page_iterator_is_at_beginning_of(
+                    page_iterator, lvl_para):
+                (r, box) = tesseract_raw.page_iterator_bounding_box(
+                    page_iterator, lvl_para
+                )
+                assert r
+                box = _tess_box_to_pyocr_box(box)
+                yield ("start_paragraph", box)
+
             if tesseract_raw.page_iterator_is_at_beginning_of(
                     page_iterator, lvl_line):
                 (r, box) = tesseract_raw.page_iterator_bounding_box(
@@ -133,11 +174,19 @@ def image_to_string(image, lang=None, builder=None):
                 )
                 assert(r)
                 box = _tess_box_to_pyocr_box(box)
-                builder.start_line(box)
+                yield ("start_line", box)
 
             last_word_in_line = tesseract_raw.page_iterator_is_at_final_element(
                 page_iterator, lvl_line, lvl_word
             )
+            last_word_in_para = \
+                tesseract_raw.page_iterator_is_at_final_element(
+                    page_iterator, lvl_para, lvl_word
+                )
+            last_word_in_block = \
+                tesseract_raw.page_iterator_is_at_final_element(
+                    page_iterator, lvl_block, lvl_word
+                )
 
             word = tesseract_raw.result_iterator_get_utf8_text(
                 res_iterator, lvl_word
@@ -153,10 +202,15 @@ def image_to_string(image, lang=None, builder=None):
                 )
                 assert(r)
                 box = _tess_box_to_pyocr_box(box)
-                builder.add_word(word, box, confidence)
+                yield ("add_word", word, box, confidence)
 
                 if last_word_in_line:
-                    builder.end_line()
+                    yield ("end_line",)
+
+            if last_word_in_para:
+                yield ("end_paragraph",)
+            if last_word_in_block:
+                yield ("end_block",)
 
             if not tesseract_raw.page_iterator_next(page_iterator, lvl_word):
                 break
@@ -164,9 +218,54 @@ def image_to_string(image, lang=None, builder=None):
     finally:
         tesseract_raw.cleanup(handle)
 
+
+@cache.cached
+def image_to_string(image, lang=None, builder=None):
+    if builder is None:
+        builder = builders.TextBuilder()
+    for result in _iter_results(image, lang, builder):
+        getattr(builder, result[0])(*result[1:])
     return builder.get_output()
 
 
+def iter_words(image, lang=None, builder=None):
+    """
+    Same as image_to_string() with a WordBoxBuilder, but yields the word
+    boxes one by one as Tesseract's result iterator reaches them. Tesseract
+    resources are released as soon as the generator is closed.
+    """
+    if builder is None:
+        builder = builders.WordBoxBuilder()
+    for result in _iter_results(image, lang, builder):
+        getattr(builder, result[0])(*result[1:])
+        boxes = builder.word_boxes
+        builder.word_boxes = []
+        for box in boxes:
+            yield box
+
+
+def iter_lines(image, lang=None, builder=None):
+    """
+    Same as image_to_string() with a LineBoxBuilder, but yields the line
+    boxes one by one as Tesseract's result iterator completes them.
+    Tesseract resources are released as soon as the generator is closed.
+    """
+    if builder is None:
+        builder = builders.LineBoxBuilder()
+    for result in _iter_results(image, lang, builder):
+        getattr(builder, result[0])(*result[1:])
+        if len(builder.lines) > 1:
+            # all the lines but the current one are complete
+            lines = builder.lines[:-1]
+            del builder.lines[:-1]
+            for line in lines:
+                yield line
+    lines = builder.lines
+    builder.lines = []
+    for line in lines:
+        yield line
+
+
 def image_to_pdf(image, output_file, lang=None, input_file="stdin", textonly=False):
     '''
     Creates pdf file with embeded text based on OCR from an image
@@ -16,6 +16,7 @@ Copyright (c) Jerome Flesch, 2011-2016
 https://github.com/openpaperwork/pyocr#readme
 '''
 
+import array
 import codecs
 import logging
 import os
@@ -25,7 +26,11 @@ import tempfile
 import contextlib
 import shutil
 
+from PIL import Image
+import six
+
 from . import builders
+from . import cache
 from . import util
 from .builders import DigitBuilder  # backward compatibility
 from .error import TesseractError  # backward compatibility
@@ -36,16 +41,27 @@ TESSERACT_CMD = 'tesseract.exe' if os.name == 'nt' else 'tesseract'
 
 TESSDATA_EXTENSION = ".traineddata"
 
+# Intermediate image format used to give the image to Tesseract (see
+# util.IMAGE_FORMATS). None means it is chosen based on the image mode and
+# size.
+IMAGE_FORMAT = None
+
+# Image file formats that Tesseract can read by itself. Images given as file
+# names or file objects in one of these formats are not decoded by PyOCR.
+PASSTHROUGH_FORMATS = ("bmp", "gif", "jpeg", "png", "pnm", "tiff")
+
 logger = logging.getLogger(__name__)
 
 g_subprocess_startup_info = None
 g_creation_flags = 0
+g_versions = {}  # TESSERACT_CMD --> version
 
 __all__ = [
     'CharBoxBuilder',
     'DigitBuilder',
     'can_detect_orientation',
     'detect_orientation',
+    'detect_orientations',
     'get_available_builders',
     'get_available_languages',
     'get_name',
@@ -56,6 +72,57 @@ __all__ = [
 ]
 
 
+_BOX_LINE_FORMAT = six.u("%s %d %d %d %d 0\n")
+
+
+def _parse_box_lines(boxes, lines):
+    """
+    Parse lines of a box file ("<char> <x1> <y1> <x2> <y2> <page>") and
+    add them to the BoxArray 'boxes'.
+    """
+    nb_lines = len(lines) - lines.count("")
+    if nb_lines <= 0:
+        return
+    chunk = "\n".join(lines)
+    fields = chunk.split()
+    if (len(fields) == 6 * nb_lines and "  " not in chunk and
+            "\n " not in chunk and " \n" not in chunk and
+            not chunk.startswith(" ") and not chunk.endswith(" ") and
+            set(line.count(" ") for line in lines if line != "") == {5}):
+        # regular box file (6 fields separated by single spaces on every
+        # line): parse the fields column by column
+        try:
+            columns = [array.array(boxes.COORDINATE_TYPE,
+                                   [int(value) for value in fields[idx::6]])
+                       for idx in range(1, 5)]
+        except ValueError:
+            columns = None
+        if columns is not None:
+            boxes.x1.extend(columns[0])
+            boxes.y1.extend(columns[1])
+            boxes.x2.extend(columns[2])
+            boxes.y2.extend(columns[3])
+            boxes.confidences.extend(
+                array.array(boxes.CONFIDENCE_TYPE, [0]) * nb_lines
+            )
+            boxes.contents.extend(array.array(
+                boxes.COORDINATE_TYPE,
+                [boxes.intern(content) for content in fields[0::6]]
+            ))
+            return
+
+    for line in lines:
+        line = line.strip()
+        if line == "":
+            continue
+        elements = line.split(" ")
+        if len(elements) < 6:
+            continue
+        position = ((int(elements[1]), int(elements[2])),
+                    (int(elements[3]), int(elements[4])))
+        boxes.add(elements[0], position)
+
+
 class CharBoxBuilder(builders.BaseBuilder):
     """
     If passed to image_to_string(), image_to_string() will return an array of
@@ -79,18 +146,26 @@ class CharBoxBuilder(builders.BaseBuilder):
         Return:
             An array of Box.
         """
-        boxes = []  # note that the order of the boxes may matter to the caller
-        for line in file_descriptor.readlines():
-            line = line.strip()
-            if line == "":
-                continue
-            elements = line.split(" ")
-            if len(elements) < 6:
-                continue
-            position = ((int(elements[1]), int(elements[2])),
-                        (int(elements[3]), int(elements[4])))
-            box = builders.Box(elements[0], position)
-            boxes.append(box)
+        # note that the order of the boxes may matter to the caller
+        return CharBoxBuilder.read_box_array(file_descriptor).to_boxes()
+
+    @staticmethod
+    def read_box_array(file_descriptor):
+        """
+        Same as read_file(), but returns the boxes as a builders.BoxArray
+        (see BoxArray.to_numpy() for NumPy arrays). The file is parsed
+        chunk by chunk.
+        """
+        boxes = builders.BoxArray()
+        partial_line = ""
+        while True:
+            chunk = file_descriptor.read(builders.STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            lines = (partial_line + chunk).split("\n")
+            partial_line = lines.pop()
+            _parse_box_lines(boxes, lines)
+        _parse_box_lines(boxes, [partial_line])
         return boxes
 
     @staticmethod
@@ -102,8 +177,34 @@ class CharBoxBuilder(builders.BaseBuilder):
         Warning:
             The file_descriptor must support UTF-8 ! (see module 'codecs')
         """
+        CharBoxBuilder.write_box_array(file_descriptor, boxes)
+
+    @staticmethod
+    def write_box_array(file_descriptor, boxes):
+        """
+        Same as write_file(), but much faster with a builders.BoxArray.
+        """
+        if isinstance(boxes, builders.BoxArray):
+            get_string = boxes.strings.__getitem__
+            for start in range(0, len(boxes), builders.WRITE_BATCH_SIZE):
+                end = start + builders.WRITE_BATCH_SIZE
+                rows = zip(map(get_string, boxes.contents[start:end]),
+                           boxes.x1[start:end], boxes.y1[start:end],
+                           boxes.x2[start:end], boxes.y2[start:end])
+                file_descriptor.write(
+                    "".join(map(_BOX_LINE_FORMAT.__mod__, rows))
+                )
+            return
+
+        batch = []
         for box in boxes:
-            file_descriptor.write(box.get_unicode_string() + " 0\n")
+            ((x1, y1), (x2, y2)) = box.position
+            batch.append(_BOX_LINE_FORMAT % (box.content, x1, y1, x2, y2))
+            if len(batch) >= builders.WRITE_BATCH_SIZE:
+                file_descriptor.write("".join(batch))
+                batch = []
+        if len(batch) > 0:
+            file_descriptor.write("".join(batch))
 
     @staticmethod
     def __str__():
@@ -161,10 +262,90 @@ def can_detect_orientation():
     )
 
 
+# Keys of the orientation and script detection output of Tesseract
+_OSD_KEYS = frozenset([
+    "Page number",
+    "Orientation",
+    "Orientation in degrees",
+    "Rotate",
+    "Orientation confidence",
+    "Script",
+    "Script confidence",
+])
+
+
+def _orientation_command(input_file_name, lang):
+    command = [TESSERACT_CMD, input_file_name, 'stdout', "-psm", "0"]
+    version = get_version()
+    if version[0] >= 4:
+        # XXX: temporary fix to remove once Tesseract 4 is stable
+        command += ["--oem", "0"]
+    if lang is not None:
+        command += ['-l', lang]
+    return command
+
+
+def _run_orientation_detection(command, cwd):
+    proc = subprocess.Popen(command, stdin=subprocess.PIPE, shell=False,
+                            startupinfo=g_subprocess_startup_info,
+                            creationflags=g_creation_flags,
+                            cwd=cwd,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT)
+    proc.stdin.close()
+    output = proc.stdout.read()
+    proc.wait()
+
+    output = output.decode("utf-8")
+    output = output.strip()
+
+    if "Could not initialize tesseract" in output:
+        raise TesseractError(-1, "Error initializing tesseract: %s" % output)
+    return output
+
+
+def _split_osd_output(output):
+    """
+    Split the orientation and script detection output of Tesseract in one
+    dict per page.
+    """
+    pages = []
+    page = {}
+    for line in output.split("\n"):
+        if ": " not in line:
+            continue
+        (key, value) = line.split(": ", 1)
+        key = key.strip()
+        if key not in _OSD_KEYS:
+            continue
+        if key in page or (key == "Page number" and len(page) > 0):
+            pages.append(page)
+            page = {}
+        page[key] = value.strip()
+    if len(page) > 0:
+        pages.append(page)
+    return pages
+
+
+def _osd_to_orientation(osd):
+    if 'Rotate' in osd:
+        angle = int(osd['Rotate'])
+    else:
+        angle = int(osd['Orientation in degrees'])
+    # Tesseract reports the angle in the opposite direction the one we
+    # want
+    angle = (360 - angle) % 360
+    return {
+        'angle': angle,
+        'confidence': float(osd['Orientation confidence']),
+    }
+
+
 def detect_orientation(image, lang=None):
     """
     Arguments:
-        image --- Pillow image to analyze
+        image --- Pillow image to analyze, or path to / file object of an
+            image file
         lang --- lang to specify to tesseract
 
     Returns:
@@ -177,50 +358,104 @@ def detect_orientation(image, lang=None):
         TesseractError --- if no script detected on the image
     """
     _set_environment()
-    with temp_dir() as tmpdir:
-        command = [TESSERACT_CMD, "input.bmp", 'stdout', "-psm", "0"]
-        version = get_version()
-        if version[0] >= 4:
-            # XXX: temporary fix to remove once Tesseract 4 is stable
-            command += ["--oem", "0"]
-        if lang is not None:
-            command += ['-l', lang]
-
-        if image.mode != "RGB":
-            image = image.convert("RGB")
-        image.save(os.path.join(tmpdir, "input.bmp"))
-
-        proc = subprocess.Popen(command, stdin=subprocess.PIPE, shell=False,
-                                startupinfo=g_subprocess_startup_info,
-                                creationflags=g_creation_flags,
-                                cwd=tmpdir,
-                                stdout=subprocess.PIPE,
-                                stderr=subprocess.STDOUT)
-        proc.stdin.close()
-        original_output = proc.stdout.read()
-        proc.wait()
-
-        original_output = original_output.decode("utf-8")
-        original_output = original_output.strip()
-
-        if "Could not initialize tesseract" in original_output:
-            raise TesseractError(-1, "Error initializing tesseract: %s" % original_output)
+    workspace = util.get_workspace()
+    with workspace.get_files() as files:
+        input_file_name = _write_input_image(image, files)
+        command = _orientation_command(input_file_name, lang)
+        original_output = _run_orientation_detection(
+            command, workspace.get_path()
+        )
 
         try:
-            output = original_output.split("\n")
-            output = [line.split(": ", 1) for line in output if (": " in line)]
-            output = {x: y for (x, y) in output}
-            angle = int(output.get('Rotate', output['Orientation in degrees']))
-            # Tesseract reports the angle in the opposite direction the one we
-            # want
-            angle = (360 - angle) % 360
-            return {
-                'angle': angle,
-                'confidence': float(output['Orientation confidence']),
-            }
+            return _osd_to_orientation(_split_osd_output(original_output)[0])
         except Exception as ex:
             raise TesseractError(-1, "No script found in image (%s - %s)"
-                                 % (ex.message, original_output))
+                                 % (str(ex), original_output))
+
+
+def _downscale(image, max_size):
+    if isinstance(image, six.string_types) or hasattr(image, 'read'):
+        image = util.load_image(image)
+        # (JPEG only) let the decoder do most of the downscaling
+        image.draft("L", (max_size, max_size))
+    if image.mode != "L":
+        image = image.convert("L")
+    (width, height) = image.size
+    ratio = float(max_size) / max(width, height)
+    if ratio < 1.0:
+        size = (max(1, int(width * ratio)), max(1, int(height * ratio)))
+        image = image.resize(size, Image.BILINEAR)
+    return image
+
+
+def detect_orientations(images, lang=None, max_size=2048, batch_size=50):
+    """
+    Detect the orientation of many pages at once. Tesseract is run only once
+    for each 'batch_size' pages, on downscaled grayscale copies of the pages.
+
+    Arguments:
+        images --- list of images (see detect_orientation())
+        lang --- lang to specify to tesseract
+        max_size --- the pages are downscaled so that none of their sides
+            is longer than this (in pixels). None = no downscaling (image
+            files are then handed over as-is to Tesseract).
+        batch_size --- maximum number of pages per Tesseract run
+
+    Returns:
+        A list with, for each page, the same dict than detect_orientation(),
+        or None if no script was found on the page.
+    """
+    _set_environment()
+    workspace = util.get_workspace()
+    images = list(images)
+    results = []
+    for batch_start in range(0, len(images), batch_size):
+        batch = images[batch_start:batch_start + batch_size]
+        with workspace.get_files() as files:
+            input_file_names = []
+            for (page_idx, image) in enumerate(batch):
+                if max_size is not None:
+                    image = _downscale(image, max_size)
+                input_file_names.append(
+                    _write_input_image(image, files, "in%d" % page_idx)
+                )
+            list_file_name = files.get(".list.txt")
+            with codecs.open(list_file_name, 'w', encoding='utf-8') as fd:
+                fd.write("\n".join(input_file_names) + "\n")
+
+            command = _orientation_command(list_file_name, lang)
+            output = _run_orientation_detection(command,
+                                                workspace.get_path())
+            results += _batch_orientations(output, input_file_names, lang)
+    return results
+
+
+def _batch_orientations(output, input_file_names, lang):
+    pages = _split_osd_output(output)
+    if all("Page number" in osd for osd in pages):
+        by_page = {int(osd["Page number"]): osd for osd in pages}
+        pages = [by_page.get(page_idx)
+                 for page_idx in range(len(input_file_names))]
+    elif len(pages) != len(input_file_names):
+        # pages without script are skipped silently by Tesseract: without
+        # page numbers, we can't tell which ones
+        logger.info("Unable to match orientation results to pages. Will"
+                    " check them one by one")
+        results = []
+        for input_file_name in input_file_names:
+            try:
+                results.append(detect_orientation(input_file_name, lang))
+            except TesseractError:
+                results.append(None)
+        return results
+
+    results = []
+    for osd in pages:
+        try:
+            results.append(_osd_to_orientation(osd) if osd else None)
+        except (KeyError, ValueError):
+            results.append(None)
+    return results
 
 
 def get_name():
@@ -230,6 +465,8 @@ def get_name():
 def get_available_builders():
     return [
         builders.LineBoxBuilder,
+        builders.AltoBuilder,
+        builders.BlockBuilder,
         builders.TextBuilder,
         builders.WordBoxBuilder,
         CharBoxBuilder,
@@ -302,10 +539,8 @@ class ReOpenableTempfile(object):
     It returns `tempfile.NamedTemporaryFile` compatible object.
     """
     def __init__(self, suffix):
-        self.name = None
-        with tempfile.NamedTemporaryFile(prefix='tess_', suffix=suffix,
-                                         delete=False) as fp:
-            self.name = fp.name
+        self.name = util.get_workspace().get_files().get(suffix)
+        open(self.name, 'wb').close()
 
     def __enter__(self):
         return self
@@ -315,7 +550,7 @@ class ReOpenableTempfile(object):
 
     def close(self):
         if self.name is not None:
-            os.remove(self.name)
+            cleanup(self.name)
             self.name = None
 
 
@@ -323,6 +558,8 @@ class ReOpenableTempfile(object):
 def temp_dir():
     """
     A context manager for maintaining a temporary directory
+
+    Obsolete. The workspace (see util.get_workspace()) is used instead.
     """
     # NOTE: Drop this as soon as we don't support Python 2.7 anymore, because
     # since Python 3.2 there is a context manager called TemporaryDirectory().
@@ -333,6 +570,35 @@ def temp_dir():
         shutil.rmtree(path)
 
 
+def _write_input_image(image, files, name="in"):
+    """
+    Make the image available to Tesseract. Image files in a format Tesseract
+    can read are handed over as-is. Anything else is decoded and written in
+    the workspace using the intermediate format selected by IMAGE_FORMAT.
+
+    Arguments:
+        image --- see image_to_string()
+        files --- util.WorkspaceFiles in which the image may be written
+        name --- name of the image in 'files'
+
+    Returns:
+        The path of the file to give to Tesseract
+    """
+    (image_format, image) = util.get_image_source(image, PASSTHROUGH_FORMATS)
+    if image_format is None:
+        (image, fmt) = util.choose_image_format(image, IMAGE_FORMAT)
+        file_name = files.get(".%s.%s" % (name, fmt.extension))
+        util.save_image(image, fmt, file_name)
+        return file_name
+    if isinstance(image, six.string_types):
+        return os.path.abspath(image)
+    file_name = files.get(".%s.%s" % (name, image_format))
+    with open(file_name, 'wb') as file_desc:
+        shutil.copyfileobj(image, file_desc)
+    return file_name
+
+
+@cache.cached
 def image_to_string(image, lang=None, builder=None):
     '''
     Runs tesseract on the specified image. First, the image is written to disk,
@@ -340,7 +606,9 @@ def image_to_string(image, lang=None, builder=None):
     read, and the temporary files are erased.
 
     Arguments:
-        image --- image to OCR.
+        image --- image to OCR: Pillow image, or path to / file object of an
+            image file. Image files in one of the PASSTHROUGH_FORMATS are
+            given as-is to Tesseract.
         lang --- tesseract language to use.
         builder --- builder used to configure Tesseract and read its result.
             The builder is used to specify the type of output expected.
@@ -354,11 +622,13 @@ def image_to_string(image, lang=None, builder=None):
 
     if builder is None:
         builder = builders.TextBuilder()
-    with temp_dir() as tmpdir:
-        if image.mode != "RGB":
-            image = image.convert("RGB")
-        image.save(os.path.join(tmpdir, "input.bmp"))
-        (status, errors) = run_tesseract("input.bmp", "output", cwd=tmpdir,
+    workspace = util.get_workspace()
+    with workspace.get_files() as files:
+        input_file_name = _write_input_image(image, files)
+        output_file_names = [files.get(".out." + file_extension)
+                             for file_extension in builder.file_extensions]
+        (status, errors) = run_tesseract(input_file_name, files.base + ".out",
+                                         cwd=workspace.get_path(),
                                          lang=lang,
                                          flags=builder.tesseract_flags,
                                          configs=builder.tesseract_configs)
@@ -366,20 +636,12 @@ def image_to_string(image, lang=None, builder=None):
             raise TesseractError(status, errors)
 
         output_file_name = "ERROR"
-        for file_extension in builder.file_extensions:
-            output_file_name = ('%s.%s' % (os.path.join(tmpdir, "output"),
-                                           file_extension))
+        for output_file_name in output_file_names:
             if not os.access(output_file_name, os.F_OK):
                 continue
-
-            try:
-                with codecs.open(output_file_name, 'r', encoding='utf-8',
-                                 errors='replace') as file_desc:
-                    results = builder.read_file(file_desc)
-                return results
-            finally:
-                cleanup(output_file_name)
-            break
+            with codecs.open(output_file_name, 'r', encoding='utf-8',
+                             errors='replace') as file_desc:
+                return builder.read_file(file_desc)
         raise TesseractError(-1, "Unable to find output file"
                              " last name tried: %s" % output_file_name)
 
@@ -414,7 +676,8 @@ def get_available_languages():
 
 def get_version():
     """
-    Returns Tesseract version.
+    Returns Tesseract version. Tesseract is only run the first time: the
+    version is then cached.
 
     Returns:
         A tuple corresponding to the version (for instance, (3, 0, 1) for 3.01)
@@ -423,6 +686,8 @@ def get_version():
         TesseractError --- Unable to run tesseract or to parse the version
     """
     _set_environment()
+    if TESSERACT_CMD in g_versions:
+        return g_versions[TESSERACT_CMD]
 
     command = [TESSERACT_CMD, "-v"]
 
@@ -450,6 +715,7 @@ def get_version():
         upd = 0
         if len(els) >= 3:
             upd = els[2]
+        g_versions[TESSERACT_CMD] = (major, minor, upd)
         return (major, minor, upd)
     except IndexError:
         raise TesseractError(
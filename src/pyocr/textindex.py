@@ -0,0 +1,376 @@
+"""
+Full-text index over OCR results: finds the words matching a word, a prefix
+or a phrase in many pages without going through their boxes, for searching
+and highlighting.
+
+USAGE:
+ > from pyocr import textindex
+ > writer = textindex.IndexWriter()
+ > for page in pages:  # output of WordBoxBuilder or LineBoxBuilder
+ >     writer.add_page(page)
+ > with open('results.idx', 'wb') as file_descriptor:
+ >     writer.write(file_descriptor)
+ > with textindex.TextIndex('results.idx') as index:
+ >     for (page_idx, first_word, last_word) in index.search(u"lorem ips*"):
+ >         print(page_idx, first_word, last_word)
+
+Words are numbered like in pyocr.boxfile: for pages of lines, the words of
+all the lines one after the other (see BoxFile.get_words()). A word may
+give several tokens (see tokenize()): "l'été" is indexed as "l" and "ete".
+
+Files are mapped in memory (mmap): queries only read the terms and postings
+they need (binary search in the sorted terms).
+
+FORMAT (version 1):
+All integers are little-endian. Sections start on 8 bytes boundaries.
+    - header: magic "PYOCRIDX", version, number of pages, terms and
+      postings (uint32)
+    - page index: position of the first token of each page
+      (nb pages + 1 uint32). Positions are counted across all the pages,
+      with an unused position after each page so phrases never span two
+      pages.
+    - term index: first posting of each term (nb terms + 1 uint32)
+    - posting positions: position of the token (uint32), sorted for each
+      term
+    - posting words: index of the word of the token in its page (uint32)
+    - term string index: offset of each term in the term data
+      (nb terms + 1 uint32). Terms are sorted.
+    - term data: UTF-8
+
+COPYRIGHT:
+PyOCR is released under the GPL v3.
+https://github.com/openpaperwork/pyocr#readme
+"""
+
+import array
+import bisect
+import re
+import struct
+import unicodedata
+
+import six
+
+from . import builders
+from .columnfile import StringTable
+from .columnfile import UINT32
+from .columnfile import map_source
+from .columnfile import padding
+from .columnfile import read_column
+from .columnfile import release
+from .columnfile import to_bytes
+from .columnfile import unmap
+from .error import PyocrException
+
+__all__ = [
+    'IndexWriter',
+    'TextIndex',
+    'dump',
+    'dumps',
+    'tokenize',
+]
+
+MAGIC = b"PYOCRIDX"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sIIII")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    """
+    Returns the normalized tokens of 'text': in lower case, without
+    accents, split on everything that is not a letter or a digit.
+    Queries and indexed words are normalized the same way.
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    if any(unicodedata.combining(char) for char in text):
+        text = u"".join(
+            char for char in text if not unicodedata.combining(char)
+        )
+    return _TOKEN_RE.findall(text)
+
+
+def _iter_words(boxes):
+    boxes = list(boxes)
+    if len(boxes) > 0 and isinstance(boxes[0], builders.LineBox):
+        for line in boxes:
+            for box in line.word_boxes:
+                yield box
+    else:
+        for box in boxes:
+            yield box
+
+
+class IndexWriter(object):
+    """
+    Indexes pages one by one (in memory), then writes the index.
+    """
+
+    def __init__(self):
+        self.page_positions = array.array(UINT32, [0])
+        # term --> (positions, words)
+        self.postings = {}
+        # word content --> tokens
+        self.__tokens = {}
+
+    def __len__(self):
+        return len(self.page_positions) - 1
+
+    def add_page(self, boxes):
+        """
+        Arguments:
+            boxes --- list of Box (output of WordBoxBuilder) or list of
+                LineBox (output of LineBoxBuilder)
+
+        Returns:
+            The index of the page
+        """
+        position = self.page_positions[-1]
+        for (word_idx, box) in enumerate(_iter_words(boxes)):
+            tokens = self.__tokens.get(box.content)
+            if tokens is None:
+                tokens = tokenize(box.content)
+                self.__tokens[box.content] = tokens
+            for token in tokens:
+                postings = self.postings.get(token)
+                if postings is None:
+                    postings = (array.array(UINT32), array.array(UINT32))
+                    self.postings[token] = postings
+                postings[0].append(position)
+                postings[1].append(word_idx)
+                position += 1
+        # unused position: phrases can't span two pages
+        self.page_positions.append(position + 1)
+        return len(self) - 1
+
+    def write(self, file_descriptor):
+        """
+        Write the index in 'file_descriptor' (opened in binary mode).
+        """
+        terms = sorted(self.postings)
+        term_index = array.array(UINT32, [0])
+        positions = array.array(UINT32)
+        words = array.array(UINT32)
+        for term in terms:
+            (term_positions, term_words) = self.postings[term]
+            positions.extend(term_positions)
+            words.extend(term_words)
+            term_index.append(len(positions))
+        strings = [term.encode("utf-8") for term in terms]
+        string_index = array.array(UINT32, [0])
+        for string in strings:
+            string_index.append(string_index[-1] + len(string))
+
+        file_descriptor.write(_HEADER.pack(
+            MAGIC, VERSION, len(self), len(terms), len(positions)
+        ))
+        size = _HEADER.size
+        sections = [self.page_positions, term_index, positions, words,
+                    string_index]
+        for section in sections:
+            data = b"\0" * padding(size) + to_bytes(section)
+            file_descriptor.write(data)
+            size += len(data)
+        file_descriptor.write(b"\0" * padding(size))
+        file_descriptor.write(b"".join(strings))
+
+
+def dump(pages, file_descriptor):
+    """
+    Index OCR results and write the index in 'file_descriptor' (opened in
+    binary mode).
+
+    Arguments:
+        pages --- iterable of pages. Each page is a list of Box (output of
+            WordBoxBuilder) or a list of LineBox (output of LineBoxBuilder)
+    """
+    writer = IndexWriter()
+    for page in pages:
+        writer.add_page(page)
+    writer.write(file_descriptor)
+
+
+def dumps(pages):
+    """
+    Same as dump(), but returns the index as bytes.
+    """
+    output = six.BytesIO()
+    dump(pages, output)
+    return output.getvalue()
+
+
+class TextIndex(object):
+    """
+    Read-only access to an index written by IndexWriter or dump(), without
+    loading the whole file.
+    """
+
+    def __init__(self, source):
+        """
+        Arguments:
+            source --- path of the file, or bytes-like object
+        """
+        (self.__file, self.__mmap, self.__buffer) = map_source(source)
+        self.page_positions = None
+        self.term_index = None
+        self.positions = None
+        self.words = None
+        self.terms = None
+        try:
+            self.__read_header()
+        except Exception:
+            self.close()
+            raise
+
+    def __read_header(self):
+        if len(self.__buffer) < _HEADER.size:
+            raise PyocrException("Not an index file (too short)")
+        (magic, version, nb_pages, nb_terms, nb_postings) = \
+            _HEADER.unpack(bytes(self.__buffer[:_HEADER.size]))
+        if magic != MAGIC:
+            raise PyocrException("Not an index file")
+        if version != VERSION:
+            raise PyocrException(
+                "Unsupported index file version: %d" % version
+            )
+        self.nb_pages = nb_pages
+
+        self.__offset = _HEADER.size
+        self.page_positions = self.__read_column(nb_pages + 1)
+        self.term_index = self.__read_column(nb_terms + 1)
+        self.positions = self.__read_column(nb_postings)
+        self.words = self.__read_column(nb_postings)
+        string_index = self.__read_column(nb_terms + 1)
+        self.__offset += padding(self.__offset)
+        self.terms = StringTable(string_index,
+                                 self.__buffer[self.__offset:])
+
+    def __read_column(self, count):
+        (column, self.__offset) = read_column(self.__buffer, self.__offset,
+                                              UINT32, count)
+        return column
+
+    def __len__(self):
+        return self.nb_pages
+
+    def __get_terms(self, token, prefix=False):
+        """
+        Returns the range of terms equal to 'token' or starting with it.
+        """
+        start = bisect.bisect_left(self.terms, token)
+        if prefix:
+            end = bisect.bisect_left(self.terms, token + u"\U0010ffff",
+                                     start)
+        elif start < len(self.terms) and self.terms[start] == token:
+            end = start + 1
+        else:
+            end = start
+        return (start, end)
+
+    def __get_postings(self, token, prefix=False):
+        """
+        Returns the positions (sorted) and the words of the tokens matching
+        'token'.
+        """
+        (start, end) = self.__get_terms(token, prefix)
+        first = self.term_index[start]
+        last = self.term_index[end]
+        positions = self.positions[first:last]
+        words = self.words[first:last]
+        if end - start > 1:
+            # postings of several terms: merge them
+            postings = sorted(zip(positions, words))
+            positions = [position for (position, _) in postings]
+            words = [word for (_, word) in postings]
+        return (positions, words)
+
+    def get_terms(self, prefix=u""):
+        """
+        Returns the indexed terms starting with 'prefix' (not normalized),
+        sorted.
+        """
+        (start, end) = self.__get_terms(prefix, prefix=True)
+        return [self.terms[term_idx] for term_idx in range(start, end)]
+
+    def search(self, query, max_hits=None):
+        """
+        Finds the words matching 'query'.
+
+        Arguments:
+            query --- normalized like the indexed words (see tokenize()).
+                If it contains several tokens, they must follow each other
+                in a page (phrase). If it ends with '*', its last token is
+                a prefix.
+            max_hits --- stop after this number of hits
+
+        Returns:
+            A list of (page index, index of the first word, index of the
+            last word), in the order of the pages and words.
+        """
+        tokens = tokenize(query)
+        if len(tokens) <= 0:
+            return []
+        prefix = query.rstrip().endswith(u"*")
+        postings = [
+            self.__get_postings(token, prefix and idx == len(tokens) - 1)
+            for (idx, token) in enumerate(tokens)
+        ]
+        # go through the occurrences of the rarest token, and look for the
+        # others around them
+        rarest = min(range(len(tokens)),
+                     key=lambda idx: len(postings[idx][0]))
+        (rarest_positions, rarest_words) = postings[rarest]
+
+        others = [(idx, positions, words)
+                  for (idx, (positions, words)) in enumerate(postings)
+                  if idx != rarest]
+
+        hits = []
+        found = [0] * len(tokens)
+        page_positions = self.page_positions
+        page_idx = 0
+        next_page = page_positions[1]
+        for (position, word) in zip(rarest_positions, rarest_words):
+            start = position - rarest
+            found[rarest] = word
+            for (idx, positions, words) in others:
+                posting_idx = bisect.bisect_left(positions, start + idx)
+                if posting_idx >= len(positions) or \
+                        positions[posting_idx] != start + idx:
+                    break
+                found[idx] = words[posting_idx]
+            else:
+                if start >= next_page:
+                    page_idx = bisect.bisect_right(page_positions, start,
+                                                   page_idx) - 1
+                    next_page = page_positions[page_idx + 1]
+                hits.append((page_idx, found[0], found[-1]))
+                if max_hits is not None and len(hits) >= max_hits:
+                    break
+        return hits
+
+    def close(self):
+        """
+        Unmaps and closes the file.
+        """
+        columns = [self.page_positions, self.term_index, self.positions,
+                   self.words, self.__buffer]
+        if self.terms is not None:
+            columns += self.terms.get_columns()
+        self.page_positions = None
+        self.term_index = None
+        self.positions = None
+        self.words = None
+        self.terms = None
+        self.__buffer = None
+        release(columns)
+        unmap(self.__file, self.__mmap)
+        self.__mmap = None
+        self.__file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,249 @@
+"""
+OCR of very large images (engineering drawings, newspaper scans, ...) tile
+by tile: the image is cut into overlapping tiles, the tiles go through the
+OCR in parallel (threads: Tesseract and Cuneiform run outside of Python),
+and the word boxes are moved back to the coordinates of the image. Words
+found twice in the overlaps are dropped.
+
+Only one tile per worker is copied out of the image at once: the OCR tools
+never get the whole image.
+
+USAGE:
+ > from pyocr import tiling
+ > line_boxes = tiling.image_to_string(
+ >     tool, image, lang="eng", builder=pyocr.builders.LineBoxBuilder(),
+ >     tile_size=4096, overlap=256
+ > )
+
+The words are found by the OCR tool, but the lines are built from the
+words of all the tiles (see builders.build_lines()).
+
+COPYRIGHT:
+PyOCR is released under the GPL v3.
+https://github.com/openpaperwork/pyocr#readme
+"""
+
+import copy
+import logging
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+
+from . import builders
+from . import util
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    'get_tiles',
+    'image_to_string',
+]
+
+DEFAULT_TILE_SIZE = 4096
+DEFAULT_OVERLAP = 256
+
+# words of two tiles are the same word if the intersection of their boxes
+# covers at least this part of the smallest one
+MIN_DUPLICATE_OVERLAP = 0.5
+
+
+def _split(length, tile_size, overlap):
+    """
+    Returns the tiles along one axis: (start, end, core start, core end).
+    The cores (middle of the overlaps between tiles) cover the whole length
+    without overlapping each other.
+    """
+    step = tile_size - overlap
+    starts = list(range(0, max(length - overlap, 1), step))
+    tiles = []
+    for (idx, start) in enumerate(starts):
+        core_start = 0 if idx == 0 else start + overlap // 2
+        if idx == len(starts) - 1:
+            core_end = length
+        else:
+            core_end = starts[idx + 1] + overlap // 2
+        tiles.append((start, min(start + tile_size, length), core_start,
+                      core_end))
+    return tiles
+
+
+def get_tiles(size, tile_size=DEFAULT_TILE_SIZE, overlap=DEFAULT_OVERLAP):
+    """
+    Cuts an image of 'size' pixels (width, height) into tiles of
+    'tile_size' x 'tile_size' pixels at most, overlapping each other by
+    'overlap' pixels.
+
+    Returns:
+        A list of (tile position, core position), rows from top to bottom,
+        tiles of a row from left to right. The words whose center is in the
+        core of a tile belong to this tile: the cores cover the whole image
+        without overlapping each other.
+    """
+    if overlap < 0 or overlap >= tile_size:
+        raise ValueError("overlap must be between 0 and tile_size - 1")
+    (width, height) = size
+    tiles = []
+    for (y1, y2, core_y1, core_y2) in _split(height, tile_size, overlap):
+        for (x1, x2, core_x1, core_x2) in _split(width, tile_size, overlap):
+            tiles.append((((x1, y1), (x2, y2)),
+                          ((core_x1, core_y1), (core_x2, core_y2))))
+    return tiles
+
+
+def _get_word_builder(builder):
+    """
+    Returns the builder to copy for each tile: the words of the tiles are
+    merged before being turned into the output of 'builder'.
+    """
+    if isinstance(builder, builders.WordBoxBuilder):
+        word_builder = copy.deepcopy(builder)
+        word_builder.word_boxes = []
+        for reason in word_builder.rejected_words:
+            word_builder.rejected_words[reason] = 0
+        return word_builder
+    if not isinstance(builder, (builders.TextBuilder,
+                                builders.LineBoxBuilder)):
+        raise NotImplementedError(
+            "Tiled OCR is only available with TextBuilder, WordBoxBuilder"
+            " and LineBoxBuilder"
+        )
+    word_builder = builders.WordBoxBuilder(
+        builder.tesseract_layout,
+        tesseract_tsv=("tsv" in builder.tesseract_configs)
+    )
+    word_builder.tesseract_configs += [
+        config for config in builder.tesseract_configs if config == "digits"
+    ]
+    word_filter = getattr(builder, "word_filter", None)
+    if word_filter is not None:
+        word_builder.word_filter = builders._WordFilter(
+            word_filter.min_confidence, word_filter.min_size,
+            word_builder.rejected_words
+        )
+    return word_builder
+
+
+def _run_tile(tool, image, tile, lang, word_builder):
+    """
+    Returns the words of the tile that belong to it (see get_tiles()), in
+    the coordinates of the image, and the words rejected by the builder.
+    """
+    (((x1, y1), (x2, y2)), ((core_x1, core_y1), (core_x2, core_y2))) = tile
+    word_builder = copy.deepcopy(word_builder)
+    words = tool.image_to_string(image.crop((x1, y1, x2, y2)), lang=lang,
+                                 builder=word_builder)
+    result = []
+    for word in words:
+        ((wx1, wy1), (wx2, wy2)) = word.position
+        (wx1, wy1, wx2, wy2) = (wx1 + x1, wy1 + y1, wx2 + x1, wy2 + y1)
+        # center (x2): no rounding
+        if not (2 * core_x1 <= wx1 + wx2 < 2 * core_x2 and
+                2 * core_y1 <= wy1 + wy2 < 2 * core_y2):
+            continue
+        result.append(builders.Box(word.content, ((wx1, wy1), (wx2, wy2)),
+                                   word.confidence))
+    return (result, word_builder.rejected_words)
+
+
+def _get_area(position):
+    ((x1, y1), (x2, y2)) = position
+    return max(x2 - x1, 0) * max(y2 - y1, 0)
+
+
+def _drop_duplicates(words, tile_indexes):
+    """
+    Drops the words found by two tiles: words cut by the border of a tile
+    are kept by the tile owning their center, even if the other tile has
+    the whole word. Among words of different tiles overlapping each other,
+    the biggest ones are kept (then the most confident ones, then the
+    first ones).
+    """
+    index = builders.BoxIndex(words)
+    indexes = dict((id(word), idx) for (idx, word) in enumerate(words))
+    areas = [_get_area(word.position) for word in words]
+    order = sorted(range(len(words)), key=lambda idx: (
+        -areas[idx], -words[idx].confidence, idx
+    ))
+    dropped = [False] * len(words)
+    for idx in order:
+        if dropped[idx]:
+            continue
+        ((x1, y1), (x2, y2)) = words[idx].position
+        for other in index.find_in_rect(words[idx].position):
+            other_idx = indexes[id(other)]
+            if dropped[other_idx] or \
+                    tile_indexes[other_idx] == tile_indexes[idx]:
+                continue
+            ((ox1, oy1), (ox2, oy2)) = other.position
+            inter = _get_area(((max(x1, ox1), max(y1, oy1)),
+                               (min(x2, ox2), min(y2, oy2))))
+            smallest = min(areas[idx], areas[other_idx])
+            if smallest > 0 and \
+                    inter >= MIN_DUPLICATE_OVERLAP * smallest:
+                dropped[other_idx] = True
+    return [word for (idx, word) in enumerate(words) if not dropped[idx]]
+
+
+def image_to_string(tool, image, lang=None, builder=None,
+                    tile_size=DEFAULT_TILE_SIZE, overlap=DEFAULT_OVERLAP,
+                    max_workers=None):
+    """
+    Same as tool.image_to_string(), but tile by tile (see get_tiles()).
+
+    Arguments:
+        tool --- OCR tool (see pyocr.get_available_tools())
+        image --- image to OCR: Pillow image, or path to / file object of an
+            image file
+        lang --- language to use
+        builder --- TextBuilder, WordBoxBuilder or LineBoxBuilder (or one of
+            their subclasses). Default: TextBuilder
+        tile_size --- maximum width and height of the tiles (pixels)
+        overlap --- overlap between the tiles (pixels). Should be bigger
+            than the widest words: words cut by the border of a tile may be
+            read wrong.
+        max_workers --- number of tiles going through the OCR at once
+            (default: number of CPUs)
+
+    Returns:
+        Depends of the builder: text, word boxes or line boxes. Boxes are in
+        reading order (see builders.build_lines()).
+    """
+    if builder is None:
+        builder = builders.TextBuilder()
+    word_builder = _get_word_builder(builder)
+    image = util.load_image(image)
+    image.load()
+    tiles = get_tiles(image.size, tile_size, overlap)
+    if max_workers is None:
+        max_workers = multiprocessing.cpu_count()
+    max_workers = max(min(max_workers, len(tiles)), 1)
+    logger.debug("%dx%d image: %d tiles, %d workers", image.size[0],
+                 image.size[1], len(tiles), max_workers)
+
+    pool = ThreadPool(max_workers)
+    try:
+        # imap(): results in the order of the tiles
+        results = list(pool.imap(
+            lambda tile: _run_tile(tool, image, tile, lang, word_builder),
+            tiles
+        ))
+    finally:
+        pool.terminate()
+        pool.join()
+
+    words = []
+    tile_indexes = []
+    rejected_words = getattr(builder, "rejected_words", None)
+    for (tile_idx, (tile_words, tile_rejected)) in enumerate(results):
+        words += tile_words
+        tile_indexes += [tile_idx] * len(tile_words)
+        if rejected_words is not None:
+            for (reason, count) in tile_rejected.items():
+                rejected_words[reason] += count
+    words = _drop_duplicates(words, tile_indexes)
+
+    lines = builders.build_lines(words)
+    if isinstance(builder, builders.WordBoxBuilder):
+        return [word for line in lines for word in line.word_boxes]
+    if isinstance(builder, builders.LineBoxBuilder):
+        return lines
+    return u"\n".join(line.content for line in lines)
@@ -1,10 +1,70 @@
 #!/usr/bin/env python
 
+import atexit
+import collections
+import errno
+import io
+import itertools
+import logging
 import os
+import shutil
+import tempfile
+import threading
+import time
 
 import re
 import six
 
+logger = logging.getLogger(__name__)
+
+
+ImageFormat = collections.namedtuple(
+    "ImageFormat", ["pillow_format", "extension", "params", "modes"]
+)
+
+# Lossless formats that can be used to hand images over to the OCR tools.
+# 'modes' are the Pillow image modes each format can store as-is.
+IMAGE_FORMATS = {
+    "bmp": ImageFormat("BMP", "bmp", {}, ("1", "L", "P", "RGB")),
+    "png": ImageFormat("PNG", "png", {"compress_level": 1},
+                       ("1", "L", "LA", "P", "RGB", "RGBA")),
+    "pnm": ImageFormat("PPM", "pnm", {}, ("1", "L", "RGB")),
+    "tiff-g4": ImageFormat("TIFF", "tif", {"compression": "group4"},
+                           ("1",)),
+}
+
+# Bilevel images bigger than this (in pixels) are stored as CCITT G4 TIFF
+# instead of PBM: G4 is slower to encode, but the PBM of a very large scan
+# costs more to write and read back than to compress.
+G4_MIN_PIXELS = 16 * 1000 * 1000
+
+
+# Signatures used to recognize the image files that the OCR tools can read
+# by themselves (see get_image_source())
+_IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"BM", "bmp"),
+]
+_PNM_SIGNATURE_RE = re.compile(b"^P[1-6]\\s")
+
+# Directories where the workspace (see get_workspace()) is created, in
+# preference order. tempfile.gettempdir() is used if none of them is
+# writable. /dev/shm is RAM-backed on most GNU/Linux systems.
+WORKSPACE_ROOTS = ["/dev/shm"]
+WORKSPACE_PREFIX = "tess_"
+_WORKSPACE_PID_RE = re.compile(r"^%s(\d+)_" % WORKSPACE_PREFIX)
+# Leftovers of the workspaces whose owner can't be checked (no PID in their
+# name, or no way to check PIDs) are removed after this delay (in seconds)
+STALE_WORKSPACE_AGE = 24 * 3600
+
+g_workspace = None
+g_workspace_lock = threading.Lock()
+
 
 def digits_only(string):
     """Return all digits that the given string starts with."""
@@ -35,3 +95,294 @@ def is_on_path(exec_name):
         if os.path.exists(path) and os.access(path, os.X_OK):
             return True
     return False
+
+
+def _has_libtiff():
+    try:
+        from PIL import features
+    except ImportError:
+        return False
+    return features.check("libtiff")
+
+
+def _normalize_mode(image):
+    if image.mode == "LA":
+        return image.convert("L")
+    if image.mode not in ("1", "L", "P", "RGB"):
+        return image.convert("RGB")
+    return image
+
+
+def _auto_image_format(image):
+    (width, height) = image.size
+    if image.mode == "1":
+        if width * height >= G4_MIN_PIXELS and _has_libtiff():
+            return "tiff-g4"
+        return "pnm"  # PBM
+    if image.mode == "L":
+        return "pnm"  # PGM
+    if image.mode == "P":
+        return "png"  # keeps the palette, no RGB expansion
+    return "bmp"
+
+
+def choose_image_format(image, image_format=None):
+    """
+    Pick the intermediate encoding used to hand an image over to an OCR
+    tool, and convert the image if that encoding cannot store its mode.
+
+    Arguments:
+        image --- Pillow image
+        image_format --- name of one of the IMAGE_FORMATS. If None, or if
+            the format cannot store the image, the format is chosen based on
+            the image mode and size.
+
+    Returns:
+        (image, ImageFormat)
+    """
+    if image_format is not None:
+        fmt = IMAGE_FORMATS[image_format]
+        if image.mode not in fmt.modes:
+            image = _normalize_mode(image)
+        if image.mode in fmt.modes:
+            return (image, fmt)
+        logger.debug("Image format %s cannot store mode %s. Will use"
+                     " automatic choice", image_format, image.mode)
+
+    image = _normalize_mode(image)
+    return (image, IMAGE_FORMATS[_auto_image_format(image)])
+
+
+def save_image(image, fmt, output):
+    """
+    Write 'image' in 'output' (file name or file object) using the
+    ImageFormat 'fmt' (see choose_image_format()).
+    """
+    image.save(output, format=fmt.pillow_format, **fmt.params)
+
+
+def guess_image_format(header):
+    """
+    Guess the format of an image file from its first bytes.
+
+    Returns:
+        'png', 'tiff', 'jpeg', 'gif', 'bmp', 'pnm', or None if unknown.
+    """
+    for (signature, image_format) in _IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    if _PNM_SIGNATURE_RE.match(header):
+        return "pnm"
+    return None
+
+
+def get_image_source(image, passthrough_formats):
+    """
+    Figure out if an image can be handed over as-is to an OCR tool, without
+    decoding and re-encoding it.
+
+    Arguments:
+        image --- Pillow image, path to an image file, or file object opened
+            in binary mode
+        passthrough_formats --- image formats (see guess_image_format())
+            that the OCR tool can read by itself
+
+    Returns:
+        (image_format, image): if 'image' is a file name or a file object
+        whose format is in 'passthrough_formats', 'image_format' is its format
+        and 'image' is returned unchanged (non-seekable file objects are
+        buffered). Otherwise, 'image_format' is None and 'image' is a Pillow
+        image.
+    """
+    if isinstance(image, six.string_types):
+        with open(image, 'rb') as file_desc:
+            header = file_desc.read(16)
+    elif hasattr(image, 'read'):
+        try:
+            position = image.tell()
+            header = image.read(16)
+            image.seek(position)
+        except (AttributeError, IOError, OSError):
+            image = io.BytesIO(image.read())
+            header = image.getvalue()[:16]
+    else:
+        return (None, image)
+
+    image_format = guess_image_format(header)
+    if image_format in passthrough_formats:
+        return (image_format, image)
+    return (None, load_image(image))
+
+
+def load_image(image):
+    """
+    Returns 'image' as a Pillow image. 'image' can already be a Pillow
+    image, a path to an image file or a file object.
+    """
+    if isinstance(image, six.string_types) or hasattr(image, 'read'):
+        from PIL import Image
+        image = Image.open(image)
+    return image
+
+
+def _is_process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as exc:
+        return exc.errno != errno.ESRCH
+    return True
+
+
+def reap_workspaces(root):
+    """
+    Remove the workspaces (and the temporary files of older versions of
+    PyOCR) left in 'root' by processes that crashed or were killed.
+    """
+    now = time.time()
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return
+    for name in names:
+        if not name.startswith(WORKSPACE_PREFIX):
+            continue
+        path = os.path.join(root, name)
+        match = _WORKSPACE_PID_RE.match(name)
+        try:
+            if match is not None and os.name != "nt":
+                if _is_process_alive(int(match.group(1))):
+                    continue
+            elif now - os.path.getmtime(path) < STALE_WORKSPACE_AGE:
+                continue
+            logger.info("Removing stale workspace %s", path)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except OSError as exc:
+            # may belong to another user or be removed concurrently
+            logger.debug("Failed to remove %s: %s", path, exc)
+
+
+class WorkspaceFiles(object):
+    """
+    Set of files of a workspace used for one call to an OCR tool.
+    All the files obtained with get() are removed by cleanup().
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.files = []
+
+    def get(self, suffix):
+        """
+        Returns a unique file path in the workspace, ending with 'suffix'.
+        """
+        path = self.base + suffix
+        self.files.append(path)
+        return path
+
+    def cleanup(self):
+        for path in self.files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
+
+
+class Workspace(object):
+    """
+    Directory where the shell OCR tools read and write their files.
+
+    It is created once per process, on first use, and then reused: every
+    call gets unique file names in it instead of a temporary directory of
+    its own. Workspaces left behind by dead processes are removed when a new
+    one is created.
+    """
+
+    def __init__(self, root=None):
+        """
+        Arguments:
+            root --- directory in which the workspace must be created. If
+                None, the first writable directory of WORKSPACE_ROOTS (or
+                the system temporary directory) is used.
+        """
+        self.root = root
+        self.path = None
+        self.pid = None
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+
+    @staticmethod
+    def _find_root():
+        for root in WORKSPACE_ROOTS:
+            if os.path.isdir(root) and os.access(root, os.W_OK | os.X_OK):
+                return root
+        return tempfile.gettempdir()
+
+    def get_path(self):
+        """
+        Returns the path of the workspace directory, and creates it if
+        required (first call, or first call after a fork()).
+        """
+        with self._lock:
+            if self.path is None or self.pid != os.getpid():
+                root = self.root if self.root is not None \
+                    else self._find_root()
+                reap_workspaces(root)
+                prefix = "%s%d_" % (WORKSPACE_PREFIX, os.getpid())
+                self.path = tempfile.mkdtemp(prefix=prefix, dir=root)
+                self.pid = os.getpid()
+                if not self._atexit_registered:
+                    atexit.register(self.cleanup)
+                    self._atexit_registered = True
+            return self.path
+
+    def get_files(self):
+        """
+        Returns a WorkspaceFiles giving unique file names in the workspace.
+        """
+        path = self.get_path()
+        with self._lock:
+            index = next(self._counter)
+        return WorkspaceFiles(os.path.join(path, "%d" % index))
+
+    def cleanup(self):
+        """
+        Remove the workspace directory. It will be recreated if used again.
+        """
+        with self._lock:
+            if self.path is not None and self.pid == os.getpid():
+                shutil.rmtree(self.path, ignore_errors=True)
+            self.path = None
+
+
+def get_workspace():
+    """
+    Returns the Workspace of the current process.
+    """
+    global g_workspace
+    with g_workspace_lock:
+        if g_workspace is None:
+            g_workspace = Workspace()
+        return g_workspace
+
+
+def set_workspace_root(root):
+    """
+    Select the directory in which the workspace of the current process must
+    be created (None = automatic). The current workspace is removed.
+    """
+    global g_workspace
+    with g_workspace_lock:
+        if g_workspace is not None:
+            g_workspace.cleanup()
+        g_workspace = Workspace(root)
@@ -9,6 +9,14 @@ from pyocr import builders
 from pyocr import tesseract
 
 
+def read_hocr(builder, path):
+    """
+    Reads the file 'path' (hOCR, ALTO or TSV) with 'builder'
+    """
+    with codecs.open(path, 'r', encoding='utf-8') as file_descriptor:
+        return builder.read_file(file_descriptor)
+
+
 class BaseTest(object):
     tool = None
 
@@ -0,0 +1,154 @@
+import gc
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+import warnings
+
+from pyocr import boxfile
+from pyocr import builders
+from pyocr import PyocrException
+from . import tests_base as base
+
+
+def _word(box):
+    return (box.content, box.position, box.confidence)
+
+
+def _line(line):
+    return (line.position, [_word(box) for box in line.word_boxes])
+
+
+class TestBoxFile(unittest.TestCase):
+    """
+    These tests make sure that OCR results are stored and read back
+    as-is in box files.
+    """
+    lines_path = os.path.join("tests", "output", "real", "tesseract",
+                              "basic_doc.words")
+    words_path = os.path.join("tests", "output", "specific", "tesseract",
+                              "test.words")
+
+    def setUp(self):
+        self.lines = base.read_hocr(builders.LineBoxBuilder(), self.lines_path)
+        self.words = base.read_hocr(builders.WordBoxBuilder(), self.words_path)
+        self.pages = [self.lines, self.words, [], self.lines[:3]]
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "results.box")
+        with open(self.path, 'wb') as file_descriptor:
+            boxfile.dump(self.pages, file_descriptor)
+
+    def test_round_trip(self):
+        with open(self.path, 'rb') as file_descriptor:
+            pages = boxfile.load(file_descriptor)
+        self.assertEqual(len(pages), len(self.pages))
+        self.assertEqual([_line(line) for line in pages[0]],
+                         [_line(line) for line in self.lines])
+        self.assertEqual([_word(box) for box in pages[1]],
+                         [_word(box) for box in self.words])
+        self.assertEqual(pages[2], [])
+        self.assertEqual(boxfile.dumps(pages), boxfile.dumps(self.pages))
+
+    def test_random_access(self):
+        with boxfile.BoxFile(self.path) as box_file:
+            self.assertEqual(len(box_file), 4)
+            self.assertEqual(box_file.get_nb_lines(0), len(self.lines))
+            self.assertEqual(box_file.get_nb_lines(1), 0)
+            self.assertEqual(_line(box_file.get_line(3, 2)),
+                             _line(self.lines[2]))
+            self.assertEqual(_line(box_file.get_line(-4, 10)),
+                             _line(self.lines[10]))
+            self.assertRaises(IndexError, box_file.get_line, 0,
+                              len(self.lines))
+            self.assertRaises(IndexError, box_file.get_page, 4)
+
+    def test_words(self):
+        with boxfile.BoxFile(self.path) as box_file:
+            words = box_file.get_words(1)
+            self.assertEqual(words, builders.BoxArray(self.words))
+            self.assertEqual(_word(words[-1]), _word(self.words[-1]))
+            words = pickle.loads(pickle.dumps(words))
+        self.assertEqual(words, builders.BoxArray(self.words))
+
+    def test_invalid(self):
+        with open(self.path, 'rb') as file_descriptor:
+            data = file_descriptor.read()
+        self.assertRaises(PyocrException, boxfile.loads, b"not a box file")
+        self.assertRaises(PyocrException, boxfile.loads,
+                          data[:8] + b"\xff" + data[9:])
+        self.assertRaises(PyocrException, boxfile.loads, data[:100])
+        with open(self.path, 'wb') as file_descriptor:
+            file_descriptor.write(data[:100])
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            self.assertRaises(PyocrException, boxfile.BoxFile, self.path)
+            gc.collect()
+        # the file is closed, not left to the garbage collector
+        self.assertEqual([warning for warning in caught
+                          if warning.category.__name__ == "ResourceWarning"],
+                         [])
+
+    def test_close(self):
+        box_file = boxfile.BoxFile(self.path)
+        mapping = box_file._BoxFile__mmap
+        box_file.get_page(0)
+        box_file.get_page(1)
+        words = box_file.get_words(1)
+        self.assertRaises(BufferError, box_file.close)
+        self.assertFalse(mapping.closed)
+        del words
+        box_file.close()
+        self.assertTrue(mapping.closed)
+
+    def test_pickle(self):
+        lines = pickle.loads(pickle.dumps(self.lines))
+        self.assertEqual([_line(line) for line in lines],
+                         [_line(line) for line in self.lines])
+        box_array = builders.BoxArray(self.words)
+        self.assertEqual(pickle.loads(pickle.dumps(box_array)), box_array)
+
+    def test_pickle_legacy(self):
+        # Box and LineBox pickled by PyOCR 0.5 (protocols 0 and 2)
+        payloads = [
+            b"ccopy_reg\n_reconstructor\np0\n(cpyocr.builders\nLineBox\n"
+            b"p1\nc__builtin__\nobject\np2\nNtp3\nRp4\n(dp5\n"
+            b"Vword_boxes\np6\n(lp7\ng0\n(cpyocr.builders\nBox\np8\ng2\n"
+            b"Ntp9\nRp10\n(dp11\nVcontent\np12\nVabc\np13\nsVposition\n"
+            b"p14\n((I1\nI2\ntp15\n(I3\nI4\ntp16\ntp17\nsVconfidence\n"
+            b"p18\nI91\nsbasg14\n(g15\n(I30\nI40\ntp19\ntp20\nsb.",
+            b"\x80\x02cpyocr.builders\nLineBox\nq\x00)\x81q\x01}q\x02("
+            b"X\n\x00\x00\x00word_boxesq\x03]q\x04cpyocr.builders\nBox\n"
+            b"q\x05)\x81q\x06}q\x07(X\x07\x00\x00\x00contentq\x08X\x03"
+            b"\x00\x00\x00abcq\tX\x08\x00\x00\x00positionq\nK\x01K\x02"
+            b"\x86q\x0bK\x03K\x04\x86q\x0c\x86q\rX\n\x00\x00\x00"
+            b"confidenceq\x0eK[ubah\nh\x0bK\x1eK(\x86q\x0f\x86q\x10ub.",
+        ]
+        for payload in payloads:
+            line = pickle.loads(payload)
+            self.assertEqual(_line(line),
+                             (((1, 2), (30, 40)),
+                              [(u"abc", ((1, 2), (3, 4)), 91)]))
+            box = pickle.loads(pickle.dumps(line.word_boxes[0]))
+            self.assertEqual(_word(box), (u"abc", ((1, 2), (3, 4)), 91))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+
+def get_all_tests():
+    all_tests = unittest.TestSuite()
+
+    test_names = [
+        'test_round_trip',
+        'test_random_access',
+        'test_words',
+        'test_invalid',
+        'test_close',
+        'test_pickle',
+        'test_pickle_legacy',
+    ]
+    tests = unittest.TestSuite(map(TestBoxFile, test_names))
+    all_tests.addTest(tests)
+
+    return all_tests
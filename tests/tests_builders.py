@@ -0,0 +1,988 @@
+import codecs
+import io
+import os
+import unittest
+import xml.dom.minidom
+import xml.parsers.expat
+
+from pyocr import builders
+from pyocr import libtesseract
+from . import tests_base as base
+
+
+def _to_tsv(lines):
+    """
+    Generate what Tesseract would have written in TSV for these lines
+    """
+    rows = [u"level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\t"
+            u"left\ttop\twidth\theight\tconf\ttext",
+            u"1\t1\t0\t0\t0\t0\t0\t0\t640\t480\t-1\t"]
+    for (line_idx, line) in enumerate(lines):
+        ((x1, y1), (x2, y2)) = line.position
+        rows.append(u"4\t1\t1\t1\t%d\t0\t%d\t%d\t%d\t%d\t-1\t" % (
+            line_idx + 1, x1, y1, x2 - x1, y2 - y1
+        ))
+        for (word_idx, box) in enumerate(line.word_boxes):
+            ((x1, y1), (x2, y2)) = box.position
+            rows.append(u"5\t1\t1\t1\t%d\t%d\t%d\t%d\t%d\t%d\t%d\t%s" % (
+                line_idx + 1, word_idx + 1, x1, y1, x2 - x1, y2 - y1,
+                box.confidence, box.content
+            ))
+    return u"\n".join(rows) + u"\n"
+
+
+class TestTsv(unittest.TestCase):
+    """
+    These tests make sure that parsing Tesseract TSV output gives the same
+    boxes than parsing its hOCR output.
+    """
+    hocr_paths = [
+        os.path.join("tests", "output", "specific", "tesseract",
+                     "test.words"),
+        os.path.join("tests", "output", "real", "tesseract",
+                     "basic_doc.words"),
+    ]
+
+    def test_word_boxes(self):
+        builder = builders.WordBoxBuilder(tesseract_tsv=True)
+        self.assertEqual(builder.tesseract_configs, ["tsv"])
+        self.assertEqual(builder.file_extensions, ["tsv"])
+        for path in self.hocr_paths:
+            lines = base.read_hocr(builders.LineBoxBuilder(), path)
+            expected = base.read_hocr(builders.WordBoxBuilder(), path)
+            boxes = builder.read_file(io.StringIO(_to_tsv(lines)))
+            self.assertTrue(len(boxes) > 0)
+            self.assertEqual(len(boxes), len(expected))
+            for (box, expected_box) in zip(boxes, expected):
+                self.assertEqual(box.content, expected_box.content)
+                self.assertEqual(box.position, expected_box.position)
+                self.assertEqual(box.confidence, expected_box.confidence)
+
+    def test_line_boxes(self):
+        builder = builders.LineBoxBuilder(tesseract_tsv=True)
+        for path in self.hocr_paths:
+            expected = base.read_hocr(builders.LineBoxBuilder(), path)
+            lines = builder.read_file(io.StringIO(_to_tsv(expected)))
+            self.assertTrue(len(lines) > 0)
+            self.assertEqual(len(lines), len(expected))
+            for (line, expected_line) in zip(lines, expected):
+                self.assertEqual(line.position, expected_line.position)
+                self.assertEqual(line.content, expected_line.content)
+                self.assertEqual(len(line.word_boxes),
+                                 len(expected_line.word_boxes))
+
+
+class TestCuneiformHocr(unittest.TestCase):
+    """
+    These tests make sure that line boxes are rebuilt from the hOCR output
+    of Cuneiform.
+    """
+    hocr_path = os.path.join("tests", "output", "specific", "cuneiform",
+                             "test-french.lines")
+
+    def test_line_boxes(self):
+        lines = base.read_hocr(builders.LineBoxBuilder(), self.hocr_path)
+        self.assertEqual(
+            [line.content for line in lines],
+            [u"Phrase en fran\xe7ais.", u"avec des accents",
+             u"\xe9ph\xe9m\xe8re"]
+        )
+        self.assertEqual(lines[0].position, ((23, 37), (186, 56)))
+        self.assertEqual(len(lines[0].word_boxes), 3)
+        self.assertEqual(lines[0].word_boxes[1].position,
+                         ((87, 42), (108, 52)))
+
+    def test_word_boxes(self):
+        lines = base.read_hocr(builders.LineBoxBuilder(), self.hocr_path)
+        words = base.read_hocr(builders.WordBoxBuilder(), self.hocr_path)
+        self.assertEqual(
+            [box.position for line in lines for box in line.word_boxes],
+            [box.position for box in words]
+        )
+
+
+class TestHocrParser(unittest.TestCase):
+    """
+    These tests make sure that the expat-based hOCR parser gives the same
+    boxes than the HTMLParser-based one.
+    """
+    hocr_paths = [
+        os.path.join("tests", "output", "specific", "tesseract",
+                     "test.words"),
+        os.path.join("tests", "output", "specific", "tesseract",
+                     "test-european.words"),
+        os.path.join("tests", "output", "real", "tesseract",
+                     "basic_doc.words"),
+    ]
+
+    def _parse(self, parser, path):
+        with codecs.open(path, 'r', encoding='utf-8') as file_descriptor:
+            parser.feed(file_descriptor.read())
+        return parser
+
+    def test_same_boxes(self):
+        for path in self.hocr_paths:
+            expected = self._parse(builders._WordHTMLParser(), path)
+            parser = self._parse(builders._HocrParser(), path)
+            parser.close()
+            self.assertTrue(len(parser.boxes) > 0)
+            self.assertEqual(
+                [(box.content, box.position, box.confidence)
+                 for box in parser.boxes],
+                [(box.content, box.position, box.confidence)
+                 for box in expected.boxes]
+            )
+            self.assertEqual(
+                [(line.content, line.position) for line in parser.lines],
+                [(line.content, line.position) for line in expected.lines]
+            )
+
+    def test_line_classes(self):
+        hocr = (u"<html><body><div class='ocr_page'>"
+                u"<span class='ocr_header' title='bbox 1 2 30 40'>"
+                u"<span class='ocrx_word' title='bbox 1 2 10 40; x_wconf 91'>"
+                u"Title</span></span>"
+                u"<span class='ocr_line' title='bbox 1 50 30 90'>"
+                u"<span class='ocrx_word' title='bbox 1 50 10 90; x_wconf 90'>"
+                u"text</span></span>"
+                u"</div></body></html>")
+        expected = builders._WordHTMLParser()
+        expected.feed(hocr)
+        parser = builders._HocrParser()
+        parser.feed(hocr)
+        parser.close()
+        self.assertEqual(
+            [(line.content, line.position) for line in parser.lines],
+            [(line.content, line.position) for line in expected.lines]
+        )
+        self.assertEqual(len(parser.lines), 1)
+
+    def test_not_xml(self):
+        hocr = (u"<html><body><div class='ocr_page'>"
+                u"<span class='ocr_line' title='bbox 1 2 30 40'>"
+                u"<span class='ocrx_word' title='bbox 1 2 10 40; x_wconf 91'>"
+                u"a&nbsp;b</span><br>"
+                u"</span></div></body></html>")
+        boxes = builders.WordBoxBuilder().read_file(io.StringIO(hocr))
+        self.assertEqual(len(boxes), 1)
+        self.assertEqual(boxes[0].position, ((1, 2), (10, 40)))
+        self.assertEqual(boxes[0].confidence, 91)
+
+
+class TestStreaming(unittest.TestCase):
+    """
+    These tests make sure that iter_words() and iter_lines() give the same
+    boxes than read_file(), whatever the size of the chunks read.
+    """
+    paths = [
+        os.path.join("tests", "output", "specific", "tesseract",
+                     "test.words"),
+        os.path.join("tests", "output", "specific", "cuneiform",
+                     "test-french.lines"),
+        os.path.join("tests", "output", "specific", "libtesseract",
+                     "test.lines"),
+        os.path.join("tests", "output", "real", "tesseract",
+                     "basic_doc.words"),
+    ]
+
+    def setUp(self):
+        self.chunk_size = builders.STREAM_CHUNK_SIZE
+        self.docs = []
+        for path in self.paths:
+            with codecs.open(path, 'r', encoding='utf-8') as file_descriptor:
+                self.docs.append(file_descriptor.read())
+        lines = base.read_hocr(builders.LineBoxBuilder(), self.paths[0])
+        self.docs.append(_to_tsv(lines))
+
+    def test_iter_words(self):
+        builder = builders.WordBoxBuilder()
+        for chunk_size in (7, 512, self.chunk_size):
+            builders.STREAM_CHUNK_SIZE = chunk_size
+            for doc in self.docs:
+                expected = builder.read_file(io.StringIO(doc))
+                boxes = list(builder.iter_words(io.StringIO(doc)))
+                self.assertTrue(len(boxes) > 0)
+                self.assertEqual(
+                    [(box.content, box.position, box.confidence)
+                     for box in boxes],
+                    [(box.content, box.position, box.confidence)
+                     for box in expected]
+                )
+
+    def test_iter_lines(self):
+        builder = builders.LineBoxBuilder()
+        for chunk_size in (7, 512, self.chunk_size):
+            builders.STREAM_CHUNK_SIZE = chunk_size
+            for doc in self.docs:
+                expected = builder.read_file(io.StringIO(doc))
+                lines = list(builder.iter_lines(io.StringIO(doc)))
+                self.assertTrue(len(lines) > 0)
+                self.assertEqual(
+                    [(line.content, line.position) for line in lines],
+                    [(line.content, line.position) for line in expected]
+                )
+
+    def test_early_stop(self):
+        builders.STREAM_CHUNK_SIZE = 512
+        file_descriptor = io.StringIO(self.docs[0])
+        for box in builders.WordBoxBuilder().iter_words(file_descriptor):
+            break
+        self.assertEqual(box.content, u"This")
+        self.assertTrue(file_descriptor.tell() < len(self.docs[0]))
+
+    def test_not_xml(self):
+        builders.STREAM_CHUNK_SIZE = 512
+        doc = self.docs[0].replace(u"</body>", u"<br></body>")
+        builder = builders.WordBoxBuilder()
+        self.assertTrue(len(builder.read_file(io.StringIO(doc))) > 0)
+        # not well-formed past the first boxes: can't be read progressively
+        self.assertRaises(xml.parsers.expat.ExpatError, list,
+                          builder.iter_words(io.StringIO(doc)))
+        builders.STREAM_CHUNK_SIZE = len(doc)
+        self.assertEqual(
+            [(box.content, box.position)
+             for box in builder.iter_words(io.StringIO(doc))],
+            [(box.content, box.position)
+             for box in builder.read_file(io.StringIO(doc))]
+        )
+
+    def tearDown(self):
+        builders.STREAM_CHUNK_SIZE = self.chunk_size
+
+
+class TestBoxArray(unittest.TestCase):
+    """
+    These tests make sure that boxes stored in a BoxArray behave like Box.
+    """
+    def setUp(self):
+        self.boxes = base.read_hocr(
+            builders.WordBoxBuilder(),
+            os.path.join("tests", "output", "specific", "tesseract",
+                         "test.words")
+        )
+        self.array = builders.BoxArray(self.boxes)
+
+    def test_round_trip(self):
+        self.assertEqual(len(self.array), len(self.boxes))
+        self.assertTrue(len(self.array.strings) < len(self.boxes))
+        for (box, expected_box) in zip(self.array.to_boxes(), self.boxes):
+            self.assertEqual(type(box), builders.Box)
+            self.assertEqual(box.content, expected_box.content)
+            self.assertEqual(box.position, expected_box.position)
+            self.assertEqual(box.confidence, expected_box.confidence)
+        self.assertEqual(builders.BoxArray(self.array), self.array)
+
+    def test_view(self):
+        box = self.array[-1]
+        self.assertTrue(isinstance(box, builders.Box))
+        self.assertEqual(box, self.boxes[-1])
+        self.assertEqual(box.get_unicode_string(),
+                         self.boxes[-1].get_unicode_string())
+        box.content = u"caf\xe9"
+        box.position = ((1, 2), (3, 4))
+        self.assertEqual(self.array.to_boxes()[-1].get_unicode_string(),
+                         u"caf\xe9 1 2 3 4")
+        self.assertEqual(sorted(self.array)[0].position, ((1, 2), (3, 4)))
+
+    def test_slice(self):
+        array = self.array[2:5]
+        self.assertEqual(len(array), 3)
+        self.assertEqual([box.content for box in array],
+                         [box.content for box in self.boxes[2:5]])
+        array.append(self.boxes[0])
+        self.assertEqual(len(array), 4)
+        self.assertEqual(len(self.array), len(self.boxes))
+
+    def test_hash(self):
+        # used to be hashed on the 8 lowest bits of each coordinate
+        box_a = builders.Box(u"a", ((1, 2), (3, 4)))
+        box_b = builders.Box(u"a", ((257, 2), (3, 4)))
+        self.assertNotEqual(hash(box_a), hash(box_b))
+        self.assertEqual(len(set([box_a, box_b])), 2)
+        self.assertEqual(hash(box_a), hash(builders.Box(u"b", box_a.position)))
+        self.assertEqual(hash(box_a), hash(builders.BoxArray([box_a])[0]))
+
+
+class TestLineContent(unittest.TestCase):
+    """
+    These tests make sure that the text of the lines is built correctly.
+    """
+    position = ((0, 0), (10, 10))
+
+    def test_line_content(self):
+        line = builders.LineBox([builders.Box(u"a", self.position),
+                                 builders.Box(u" ", self.position)],
+                                self.position)
+        self.assertEqual(line.content, u"a")
+        line.word_boxes.append(builders.Box(u"b", self.position))
+        self.assertEqual(line.content, u"a   b")
+        line.word_boxes = [builders.Box(u"c", self.position)]
+        self.assertEqual(line.content, u"c")
+        line.word_boxes[0] = builders.Box(u"d", self.position)
+        self.assertEqual(line.content, u"d")
+        line.word_boxes[0].content = u"e"
+        self.assertEqual(line.content, u"e")
+
+    def test_text_builder(self):
+        builder = builders.TextBuilder()
+        builder.start_line(self.position)
+        for word in (u"", u"a", u"", u"b"):
+            builder.add_word(word, self.position)
+        builder.end_line()
+        builder.start_line(self.position)
+        builder.start_line(self.position)
+        builder.add_word(u"c", self.position)
+        self.assertEqual(builder.get_output(), u"a  b\n\nc")
+        self.assertEqual(builder.built_text, [u"a  b", u"", u"c"])
+        builder.add_word(u"d", self.position)
+        self.assertEqual(builder.get_output(), u"a  b\n\nc d")
+
+
+class TestHocrWriter(unittest.TestCase):
+    """
+    These tests make sure that write_file() writes the same hOCR than
+    xml.dom.minidom used to.
+    """
+    hocr_path = os.path.join("tests", "output", "specific", "tesseract",
+                             "test.words")
+
+    def setUp(self):
+        self.lines = base.read_hocr(builders.LineBoxBuilder(), self.hocr_path)
+        self.lines[0].word_boxes[0].content = u"<a> & \"b\" \xe9"
+        self.lines.append(builders.LineBox([], ((1, 2), (3, 4))))
+
+    def _write_minidom(self, boxes):
+        doc = xml.dom.minidom.getDOMImplementation().createDocument(
+            None, "root", None
+        )
+        return u"".join(
+            [builders._XHTML_HEADER, u"<body>\n"] +
+            [u"<p>%s</p>\n" % box.get_xml_tag(doc).toxml() for box in boxes] +
+            [u"</body>\n</html>\n"]
+        )
+
+    def test_word_boxes(self):
+        boxes = [box for line in self.lines for box in line.word_boxes]
+        output = io.StringIO()
+        builders.WordBoxBuilder.write_file(output, boxes)
+        self.assertEqual(output.getvalue(), self._write_minidom(boxes))
+
+    def test_line_boxes(self):
+        output = io.StringIO()
+        builders.LineBoxBuilder.write_file(output, self.lines)
+        self.assertEqual(output.getvalue(), self._write_minidom(self.lines))
+
+    def test_streaming(self):
+        builder = builders.LineBoxBuilder()
+        expected = base.read_hocr(builder, self.hocr_path)
+        output = io.StringIO()
+        with codecs.open(self.hocr_path, 'r', encoding='utf-8') as fdesc:
+            builder.write_file(output, builder.iter_lines(fdesc))
+        output.seek(0)
+        lines = builder.read_file(output)
+        self.assertEqual(
+            [(line.content, line.position) for line in lines],
+            [(line.content, line.position) for line in expected]
+        )
+
+
+class TestAlto(unittest.TestCase):
+    """
+    These tests make sure that AltoBuilder writes ALTO that can be read back
+    by AltoBuilder and by other XML parsers.
+    """
+    hocr_path = os.path.join("tests", "output", "specific", "tesseract",
+                             "test.words")
+
+    def setUp(self):
+        self.lines = base.read_hocr(builders.LineBoxBuilder(), self.hocr_path)
+        self.lines[0].word_boxes[0].content = u"<a> & \"b\" \xe9"
+        self.lines.append(builders.LineBox([], ((1, 2), (3, 4))))
+
+    def _write(self, boxes):
+        output = io.StringIO()
+        builders.AltoBuilder.write_file(output, boxes)
+        return output.getvalue()
+
+    def test_round_trip(self):
+        alto = self._write(self.lines)
+        lines = builders.AltoBuilder().read_file(io.StringIO(alto))
+        self.assertEqual(lines, self.lines)
+        for (line, expected) in zip(lines, self.lines):
+            self.assertEqual(line.word_boxes, expected.word_boxes)
+            self.assertEqual(
+                [box.confidence for box in line.word_boxes],
+                [box.confidence for box in expected.word_boxes]
+            )
+
+    def test_valid_xml(self):
+        doc = xml.dom.minidom.parseString(
+            self._write(self.lines).encode("utf-8")
+        )
+        strings = doc.getElementsByTagName("String")
+        self.assertEqual(strings[0].getAttribute("CONTENT"),
+                         u"<a> & \"b\" \xe9")
+        self.assertEqual(len(doc.getElementsByTagName("TextLine")),
+                         len(self.lines))
+
+    def test_streaming(self):
+        alto = self._write(iter(self.lines))
+        chunk_size = builders.STREAM_CHUNK_SIZE
+        builders.STREAM_CHUNK_SIZE = 17
+        try:
+            lines = list(builders.AltoBuilder().iter_lines(io.StringIO(alto)))
+            boxes = list(
+                builders.WordBoxBuilder().iter_words(io.StringIO(alto))
+            )
+        finally:
+            builders.STREAM_CHUNK_SIZE = chunk_size
+        self.assertEqual(lines, self.lines)
+        self.assertEqual(
+            boxes, [box for line in self.lines for box in line.word_boxes]
+        )
+
+    def test_callbacks(self):
+        # the way Libtesseract fills the builders
+        builder = builders.AltoBuilder()
+        for line in self.lines:
+            builder.start_line(line.position)
+            for box in line.word_boxes:
+                builder.add_word(box.content, box.position, box.confidence)
+            builder.end_line()
+        self.assertEqual(builder.get_output(), self.lines)
+
+    def test_libtesseract(self):
+        self.assertTrue(builders.AltoBuilder in
+                        libtesseract.get_available_builders())
+        # events as yielded by libtesseract, blocks and paragraphs included
+        events = [("start_block", ((0, 0), (100, 100)), 1),
+                  ("start_paragraph", ((0, 0), (100, 100)))]
+        for line in self.lines:
+            events.append(("start_line", line.position))
+            for box in line.word_boxes:
+                events.append(("add_word", box.content, box.position,
+                               box.confidence))
+            events.append(("end_line",))
+        events += [("end_paragraph",), ("end_block",)]
+        builder = builders.AltoBuilder()
+        for event in events:
+            getattr(builder, event[0])(*event[1:])
+        output = io.StringIO()
+        builder.write_file(output, builder.get_output())
+        lines = builders.AltoBuilder().read_file(
+            io.StringIO(output.getvalue())
+        )
+        self.assertEqual(
+            [(line.content, line.position) for line in lines],
+            [(line.content, line.position) for line in self.lines]
+        )
+
+    def test_other_writers(self):
+        alto = (
+            u'<?xml version="1.0" encoding="UTF-8"?>\n'
+            u'<alto:alto'
+            u' xmlns:alto="http://www.loc.gov/standards/alto/ns-v4#">'
+            u'<alto:Layout><alto:Page><alto:PrintSpace>'
+            u'<alto:TextBlock><alto:TextLine HPOS="10.0" VPOS="20" WIDTH="100"'
+            u' HEIGHT="30"><alto:String HPOS="10" VPOS="20" WIDTH="40"'
+            u' HEIGHT="30" CONTENT="foo" WC="0.5"/><alto:SP/>'
+            u'<alto:String HPOS="60" VPOS="20" WIDTH="50" HEIGHT="30"'
+            u' CONTENT="bar"/></alto:TextLine></alto:TextBlock>'
+            u'</alto:PrintSpace></alto:Page></alto:Layout></alto:alto>'
+        )
+        lines = builders.LineBoxBuilder().read_file(io.StringIO(alto))
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0].position, ((10, 20), (110, 50)))
+        self.assertEqual(lines[0].content, u"foo bar")
+        self.assertEqual(
+            [box.confidence for box in lines[0].word_boxes], [50, 0]
+        )
+
+
+class TestBlockBuilder(unittest.TestCase):
+    """
+    These tests make sure that BlockBuilder builds the block tree from the
+    events of Libtesseract, and writes and reads it back as ALTO.
+    """
+    hocr_path = os.path.join("tests", "output", "specific", "tesseract",
+                             "test.words")
+
+    def setUp(self):
+        lines = base.read_hocr(builders.LineBoxBuilder(), self.hocr_path)
+        self.blocks = [
+            builders.Block([
+                builders.Paragraph(lines[:2], ((36, 92), (580, 160))),
+                builders.Paragraph(lines[2:4], ((36, 170), (580, 240))),
+            ], ((36, 92), (580, 240)), 2),
+            builders.Block([
+                builders.Paragraph(lines[4:], ((36, 250), (580, 480))),
+            ], ((36, 250), (580, 480)), 1),
+        ]
+
+    def _fill(self, builder):
+        # the way Libtesseract fills the builders
+        for block in self.blocks:
+            builder.start_block(block.position, block.block_type)
+            for paragraph in block.paragraphs:
+                builder.start_paragraph(paragraph.position)
+                for line in paragraph.lines:
+                    builder.start_line(line.position)
+                    for box in line.word_boxes:
+                        builder.add_word(box.content, box.position,
+                                         box.confidence)
+                    builder.end_line()
+                builder.end_paragraph()
+            builder.end_block()
+        return builder.get_output()
+
+    def test_callbacks(self):
+        blocks = self._fill(builders.BlockBuilder())
+        self.assertEqual(blocks, self.blocks)
+        self.assertEqual(
+            blocks[0].content,
+            u"%s\n%s\n\n%s\n%s" % tuple(
+                line.content for line in blocks[0].iter_lines()
+            )
+        )
+        # other builders ignore blocks and paragraphs
+        lines = self._fill(builders.LineBoxBuilder())
+        self.assertEqual(
+            lines, [line for block in self.blocks
+                    for line in block.iter_lines()]
+        )
+
+    def test_missing_events(self):
+        builder = builders.BlockBuilder()
+        builder.add_word(u"a", ((0, 0), (10, 10)))
+        builder.start_line(((0, 20), (10, 30)))
+        builder.add_word(u"b", ((0, 20), (10, 30)))
+        builder.start_block(((0, 40), (10, 50)), 6)
+        builder.add_word(u"c", ((0, 40), (10, 50)))
+        blocks = builder.get_output()
+        self.assertEqual(len(blocks), 2)
+        self.assertEqual(blocks[0].content, u"a\nb")
+        self.assertEqual(blocks[1].block_type, 6)
+        self.assertEqual(blocks[1].content, u"c")
+
+    def test_alto(self):
+        output = io.StringIO()
+        builders.BlockBuilder.write_file(output, iter(self.blocks))
+        alto = output.getvalue()
+        self.assertEqual(
+            builders.BlockBuilder().read_file(io.StringIO(alto)),
+            self.blocks
+        )
+        lines = builders.AltoBuilder().read_file(io.StringIO(alto))
+        self.assertEqual(
+            lines, [line for block in self.blocks
+                    for line in block.iter_lines()]
+        )
+
+    def test_alto_without_blocks(self):
+        lines = [line for block in self.blocks
+                 for line in block.iter_lines()]
+        output = io.StringIO()
+        builders.AltoBuilder.write_file(output, lines)
+        output.seek(0)
+        blocks = builders.BlockBuilder().read_file(output)
+        self.assertEqual(len(blocks), len(lines))
+        self.assertEqual(
+            [list(block.iter_lines()) for block in blocks],
+            [[line] for line in lines]
+        )
+
+    def test_tsv(self):
+        lines = [line for block in self.blocks
+                 for line in block.iter_lines()]
+        rows = _to_tsv(lines).split(u"\n")
+        # _to_tsv() puts all the lines in the same block and paragraph
+        rows.insert(2, u"2\t1\t1\t0\t0\t0\t36\t92\t544\t388\t-1\t")
+        rows.insert(3, u"3\t1\t1\t1\t0\t0\t36\t92\t544\t388\t-1\t")
+        blocks = builders.BlockBuilder().read_file(
+            io.StringIO(u"\n".join(rows))
+        )
+        self.assertEqual(len(blocks), 1)
+        self.assertEqual(blocks[0].position, ((36, 92), (580, 480)))
+        self.assertEqual(blocks[0].block_type, 0)
+        self.assertEqual(len(blocks[0].paragraphs), 1)
+        self.assertEqual(list(blocks[0].iter_lines()), lines)
+
+
+class TestWordFilter(unittest.TestCase):
+    """
+    These tests make sure that the builders drop the words below the
+    confidence and size thresholds, whatever the source of the words.
+    """
+    hocr_path = os.path.join("tests", "output", "specific", "tesseract",
+                             "test.words")
+    min_confidence = 90
+    min_size = 25
+
+    def setUp(self):
+        self.lines = base.read_hocr(builders.LineBoxBuilder(), self.hocr_path)
+        self.expected = {"confidence": 0, "size": 0}
+        self.kept = []
+        for line in self.lines:
+            for box in line.word_boxes:
+                ((x1, y1), (x2, y2)) = box.position
+                if box.confidence < self.min_confidence:
+                    self.expected["confidence"] += 1
+                elif x2 - x1 < self.min_size and y2 - y1 < self.min_size:
+                    self.expected["size"] += 1
+                else:
+                    self.kept.append(box)
+        self.assertTrue(self.expected["confidence"] > 0)
+        self.assertTrue(self.expected["size"] > 0)
+        self.assertTrue(len(self.kept) > 0)
+
+    def _new_builder(self, builder_cls=builders.WordBoxBuilder):
+        return builder_cls(min_confidence=self.min_confidence,
+                           min_size=self.min_size)
+
+    def _check(self, builder, boxes):
+        self.assertEqual(
+            [(box.content, box.position, box.confidence) for box in boxes],
+            [(box.content, box.position, box.confidence)
+             for box in self.kept]
+        )
+        self.assertEqual(builder.rejected_words, self.expected)
+
+    def test_hocr(self):
+        builder = self._new_builder()
+        self._check(builder, base.read_hocr(builder, self.hocr_path))
+        builder = self._new_builder(builders.LineBoxBuilder)
+        lines = base.read_hocr(builder, self.hocr_path)
+        self.assertEqual(lines, self.lines)
+        self._check(builder, [box for line in lines
+                              for box in line.word_boxes])
+
+    def test_not_xml(self):
+        with codecs.open(self.hocr_path, 'r', encoding='utf-8') as fdesc:
+            hocr = fdesc.read().replace(u"</body>", u"<br></body>")
+        builder = self._new_builder()
+        self._check(builder, builder.read_file(io.StringIO(hocr)))
+        builder = self._new_builder()
+        self._check(builder, list(builder.iter_words(io.StringIO(hocr))))
+
+    def test_tsv(self):
+        builder = self._new_builder()
+        self._check(builder,
+                    builder.read_file(io.StringIO(_to_tsv(self.lines))))
+
+    def test_alto(self):
+        output = io.StringIO()
+        builders.AltoBuilder.write_file(output, self.lines)
+        builder = self._new_builder(builders.AltoBuilder)
+        lines = list(builder.iter_lines(io.StringIO(output.getvalue())))
+        self._check(builder, [box for line in lines
+                              for box in line.word_boxes])
+        builder = self._new_builder(builders.BlockBuilder)
+        blocks = builder.read_file(io.StringIO(output.getvalue()))
+        self._check(builder, [box for block in blocks
+                              for line in block.iter_lines()
+                              for box in line.word_boxes])
+
+    def test_callbacks(self):
+        for builder_cls in (builders.WordBoxBuilder, builders.LineBoxBuilder,
+                            builders.BlockBuilder):
+            builder = self._new_builder(builder_cls)
+            for line in self.lines:
+                builder.start_line(line.position)
+                for box in line.word_boxes:
+                    builder.add_word(box.content, box.position,
+                                     box.confidence)
+                builder.end_line()
+            output = builder.get_output()
+            if builder_cls is builders.LineBoxBuilder:
+                output = [box for line in output for box in line.word_boxes]
+            elif builder_cls is builders.BlockBuilder:
+                output = [box for block in output
+                          for line in block.iter_lines()
+                          for box in line.word_boxes]
+            self._check(builder, output)
+
+    def test_filtered_line(self):
+        builder = self._new_builder(builders.LineBoxBuilder)
+        builder.start_line(((0, 0), (5, 5)))
+        builder.add_word(u"noise", ((0, 0), (5, 5)), 95)
+        builder.end_line()
+        builder.start_line(((10, 10), (200, 40)))
+        builder.add_word(u"Hello", ((10, 10), (100, 40)), 95)
+        builder.add_word(u"world", ((110, 10), (200, 40)), 95)
+        builder.end_line()
+        lines = builder.get_output()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0].position, ((10, 10), (200, 40)))
+        self.assertEqual(lines[0].content, u"Hello world")
+
+    def test_cuneiform(self):
+        path = os.path.join("tests", "output", "specific", "cuneiform",
+                            "test-french.lines")
+        words = base.read_hocr(builders.WordBoxBuilder(), path)
+        builder = builders.WordBoxBuilder(min_size=25)
+        filtered = base.read_hocr(builder, path)
+        self.assertTrue(0 < len(filtered) < len(words))
+        self.assertEqual(builder.rejected_words,
+                         {"confidence": 0, "size": len(words) - len(filtered)})
+        # no confidence with Cuneiform: min_confidence drops nothing
+        builder = builders.LineBoxBuilder(min_confidence=50, min_size=25)
+        lines = base.read_hocr(builder, path)
+        self.assertEqual([box for line in lines for box in line.word_boxes],
+                         filtered)
+        self.assertEqual(builder.rejected_words,
+                         {"confidence": 0, "size": len(words) - len(filtered)})
+
+
+class TestBoxIndex(unittest.TestCase):
+    """
+    These tests make sure that BoxIndex finds the same boxes as going
+    through all of them.
+    """
+    def setUp(self):
+        self.boxes = base.read_hocr(
+            builders.WordBoxBuilder(),
+            os.path.join("tests", "output", "specific", "tesseract",
+                         "test.words")
+        )
+        # a box covering the whole page
+        self.boxes.append(builders.Box(u"page", ((0, 0), (10000, 10000))))
+        self.index = builders.BoxIndex(self.boxes)
+
+    @staticmethod
+    def _distance(box, point):
+        ((x1, y1), (x2, y2)) = box.position
+        dx = max(x1 - point[0], 0, point[0] - x2)
+        dy = max(y1 - point[1], 0, point[1] - y2)
+        return dx * dx + dy * dy
+
+    def test_find_in_rect(self):
+        self.assertEqual(len(self.index), len(self.boxes))
+        for rect in (((0, 0), (100, 100)), ((250, 300), (900, 420)),
+                     ((-50, -50), (-10, -10)), ((0, 0), (20000, 20000))):
+            ((qx1, qy1), (qx2, qy2)) = rect
+            expected = [
+                box for box in self.boxes
+                if box.position[0][0] <= qx2 and box.position[0][1] <= qy2 and
+                box.position[1][0] >= qx1 and box.position[1][1] >= qy1
+            ]
+            self.assertEqual(self.index.find_in_rect(rect), expected)
+            expected = [
+                box for box in self.boxes
+                if box.position[0][0] >= qx1 and box.position[0][1] >= qy1 and
+                box.position[1][0] <= qx2 and box.position[1][1] <= qy2
+            ]
+            self.assertEqual(self.index.find_in_rect(rect, contained=True),
+                             expected)
+
+    def test_find_at(self):
+        box = self.boxes[3]
+        found = self.index.find_at(box.position[0])
+        self.assertTrue(box in found)
+        self.assertTrue(self.boxes[-1] in found)
+        self.assertEqual(self.index.find_at((-1, -1)), [])
+
+    def test_find_nearest(self):
+        for point in ((0, 0), (400, 380), (5000, 20000), (-300, 12000)):
+            expected = sorted(
+                range(len(self.boxes)),
+                key=lambda idx: (self._distance(self.boxes[idx], point), idx)
+            )
+            expected = [self.boxes[idx] for idx in expected[:5]]
+            self.assertEqual(self.index.find_nearest(point, k=5), expected)
+        self.assertEqual(self.index.find_nearest((0, 0), k=0), [])
+        self.assertEqual(len(self.index.find_nearest((0, 0), k=10000)),
+                         len(self.boxes))
+
+    def test_other_boxes(self):
+        lines = base.read_hocr(
+            builders.LineBoxBuilder(),
+            os.path.join("tests", "output", "specific", "tesseract",
+                         "test.lines")
+        )
+        index = builders.BoxIndex(lines)
+        self.assertEqual(index.find_at(lines[1].word_boxes[0].position[0]),
+                         [lines[1]])
+        array = builders.BoxArray(self.boxes)
+        index = builders.BoxIndex(array, cell_size=10)
+        self.assertEqual(index.find_nearest((400, 380), k=5),
+                         self.index.find_nearest((400, 380), k=5))
+        index = builders.BoxIndex([])
+        self.assertEqual(index.find_in_rect(((0, 0), (10, 10))), [])
+        self.assertEqual(index.find_nearest((0, 0)), [])
+
+
+class TestReadingOrder(unittest.TestCase):
+    """
+    These tests make sure that lines are rebuilt from word boxes alone, in
+    reading order.
+    """
+    def _make_column(self, left, top, contents):
+        lines = []
+        for line_contents in contents:
+            words = []
+            x = left
+            for content in line_contents:
+                width = 10 * len(content)
+                words.append(builders.Box(content, ((x, top),
+                                                    (x + width, top + 20))))
+                x += width + 10
+            lines.append(builders.LineBox(
+                words, ((left, top), (x - 10, top + 20))
+            ))
+            top += 30
+        return lines
+
+    def test_build_lines(self):
+        for name in ("test.lines", "test-european.lines"):
+            lines = base.read_hocr(
+                builders.LineBoxBuilder(),
+                os.path.join("tests", "output", "specific", "tesseract",
+                             name)
+            )
+            words = [box for line in lines for box in line.word_boxes]
+            words.reverse()
+            result = builders.build_lines(words)
+            self.assertEqual([line.content for line in result],
+                             [line.content for line in lines
+                              if len(line.word_boxes) > 0])
+            for line in result:
+                self.assertEqual(line.word_boxes, sorted(
+                    line.word_boxes, key=lambda box: box.position[0][0]
+                ))
+        self.assertEqual(builders.build_lines([]), [])
+
+    def test_columns(self):
+        title = self._make_column(10, 0, [["a", "title"]])
+        left = self._make_column(10, 50, [
+            ["first", "column"], ["of", "text"], ["on", "the", "left"],
+        ])
+        # starts lower, and with a new paragraph
+        right = self._make_column(200, 60, [
+            ["second", "column"], ["on", "the", "right"],
+        ]) + self._make_column(200, 160, [["new", "paragraph"]])
+        expected = title + left + right
+        words = [box for line in expected for box in line.word_boxes]
+        words.reverse()
+        result = builders.build_lines(words)
+        self.assertEqual([line.content for line in result],
+                         [line.content for line in expected])
+        self.assertEqual([line.position for line in result],
+                         [line.position for line in expected])
+        # sorted() interleaves the columns
+        self.assertNotEqual(sorted(expected), expected)
+        self.assertEqual(
+            [line.content for line in builders.sort_reading_order(
+                reversed(expected)
+            )],
+            [line.content for line in expected]
+        )
+
+
+def get_all_tests():
+    all_tests = unittest.TestSuite()
+
+    test_names = [
+        'test_word_boxes',
+        'test_line_boxes',
+    ]
+    tests = unittest.TestSuite(map(TestTsv, test_names))
+    all_tests.addTest(tests)
+
+    test_names = [
+        'test_line_boxes',
+        'test_word_boxes',
+    ]
+    tests = unittest.TestSuite(map(TestCuneiformHocr, test_names))
+    all_tests.addTest(tests)
+
+    test_names = [
+        'test_same_boxes',
+        'test_line_classes',
+        'test_not_xml',
+    ]
+    tests = unittest.TestSuite(map(TestHocrParser, test_names))
+    all_tests.addTest(tests)
+
+    test_names = [
+        'test_iter_words',
+        'test_iter_lines',
+        'test_early_stop',
+        'test_not_xml',
+    ]
+    tests = unittest.TestSuite(map(TestStreaming, test_names))
+    all_tests.addTest(tests)
+
+    test_names = [
+        'test_round_trip',
+        'test_view',
+        'test_slice',
+        'test_hash',
+    ]
+    tests = unittest.TestSuite(map(TestBoxArray, test_names))
+    all_tests.addTest(tests)
+
+    test_names = [
+        'test_line_content',
+        'test_text_builder',
+    ]
+    tests = unittest.TestSuite(map(TestLineContent, test_names))
+    all_tests.addTest(tests)
+
+    test_names = [
+        'test_word_boxes',
+        'test_line_boxes',
+        'test_streaming',
+    ]
+    tests = unittest.TestSuite(map(TestHocrWriter, test_names))
+    all_tests.addTest(tests)
+
+    test_names = [
+        'test_round_trip',
+        'test_valid_xml',
+        'test_streaming',
+        'test_callbacks',
+        'test_libtesseract',
+        'test_other_writers',
+    ]
+    tests = unittest.TestSuite(map(TestAlto, test_names))
+    all_tests.addTest(tests)
+
+    test_names = [
+        'test_callbacks',
+        'test_missing_events',
+        'test_alto',
+        'test_alto_without_blocks',
+        'test_tsv',
+    ]
+    tests = unittest.TestSuite(map(TestBlockBuilder, test_names))
+    all_tests.addTest(tests)
+
+    test_names = [
+        'test_hocr',
+        'test_not_xml',
+        'test_tsv',
+        'test_alto',
+        'test_callbacks',
+        'test_filtered_line',
+        'test_cuneiform',
+    ]
+    tests = unittest.TestSuite(map(TestWordFilter, test_names))
+    all_tests.addTest(tests)
+
+    test_names = [
+        'test_find_in_rect',
+        'test_find_at',
+        'test_find_nearest',
+        'test_other_boxes',
+    ]
+    tests = unittest.TestSuite(map(TestBoxIndex, test_names))
+    all_tests.addTest(tests)
+
+    test_names = [
+        'test_build_lines',
+        'test_columns',
+    ]
+    tests = unittest.TestSuite(map(TestReadingOrder, test_names))
+    all_tests.addTest(tests)
+
+    return all_tests
@@ -0,0 +1,344 @@
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import zlib
+
+from PIL import Image
+
+from pyocr import builders
+from pyocr import cache
+
+
+# fake OCR tool: the tests below are the tool module
+g_calls = []
+
+
+def get_name():
+    return "Fake OCR"
+
+
+def get_version():
+    return (1, 2, 3)
+
+
+@cache.cached
+def image_to_string(image, lang=None, builder=None):
+    if builder is None:
+        builder = builders.TextBuilder()
+    g_calls.append((image, lang, builder))
+    if isinstance(builder, builders.WordBoxBuilder):
+        builder.word_boxes = []
+        builder.add_word(u"word%d" % len(g_calls), ((1, 2), (3, 4)), 90)
+        builder.add_word(u"noise", ((5, 6), (7, 8)), 10)
+        return builder.get_output()
+    return u"text %d" % len(g_calls)
+
+
+# Libtesseract results: 2 lines
+EVENTS = [
+    ("start_block", ((0, 0), (60, 30)), 1),
+    ("start_paragraph", ((0, 0), (60, 30))),
+    ("start_line", ((0, 0), (60, 10))),
+    ("add_word", u"Hello", ((0, 0), (25, 10)), 91.5),
+    ("add_word", u"world", ((30, 0), (60, 10)), 30.0),
+    ("end_line",),
+    ("start_line", ((0, 20), (40, 30))),
+    ("add_word", u"again", ((0, 20), (40, 30)), 88.0),
+    ("end_line",),
+    ("end_paragraph",),
+    ("end_block",),
+]
+
+
+@cache.cached_events
+def _iter_results(image, lang, builder):
+    g_calls.append((image, lang, builder))
+    for event in EVENTS:
+        yield event
+
+
+def _replay(builder, image, lang="eng"):
+    for event in _iter_results(image, lang, builder):
+        getattr(builder, event[0])(*event[1:])
+    return builder.get_output()
+
+
+class _WordListBuilder(builders.BaseBuilder):
+    """
+    Custom builder, without the attributes of the builders of PyOCR
+    """
+
+    def __init__(self):
+        super(_WordListBuilder, self).__init__([], [], [], [])
+        self.words = []
+
+    def start_line(self, box):
+        pass
+
+    def add_word(self, word, box, confidence=0):
+        self.words.append(word)
+
+    def end_line(self):
+        pass
+
+    def get_output(self):
+        return self.words
+
+
+class TestResultCache(unittest.TestCase):
+    """
+    These tests make sure that the results are read from the cache only when
+    the image and the settings are the same.
+    """
+    image_path = os.path.join("tests", "input", "specific",
+                              "test-digits.png")
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = cache.ResultCache(os.path.join(self.tmp_dir,
+                                                    "cache.sqlite"))
+        cache.set_cache(self.cache)
+        self.image = Image.open(self.image_path)
+        self.image.load()
+        del g_calls[:]
+
+    def test_no_cache(self):
+        cache.set_cache(None)
+        self.assertEqual(image_to_string(self.image), u"text 1")
+        self.assertEqual(image_to_string(self.image), u"text 2")
+
+    def test_hit(self):
+        self.assertEqual(image_to_string(self.image, lang="eng"), u"text 1")
+        self.assertEqual(image_to_string(self.image, lang="eng"), u"text 1")
+        self.assertEqual(image_to_string(self.image_path, lang="eng"),
+                         u"text 1")
+        self.assertEqual(len(g_calls), 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+        # default builder
+        self.assertEqual(image_to_string(self.image, "eng",
+                                         builders.TextBuilder()), u"text 1")
+
+        builder = builders.WordBoxBuilder()
+        boxes = image_to_string(self.image, "eng", builder)
+        self.assertEqual(image_to_string(self.image, "eng", builder), boxes)
+        self.assertEqual(boxes[0].content, u"word2")
+        self.assertEqual(len(g_calls), 2)
+        # the cache is persistent
+        other_cache = cache.ResultCache(self.cache.path)
+        cache.set_cache(other_cache)
+        self.assertEqual(image_to_string(self.image, "eng", builder), boxes)
+        self.assertEqual(other_cache.hits, 1)
+
+    def test_rejected_words(self):
+        builder = builders.WordBoxBuilder(min_confidence=50)
+        boxes = image_to_string(self.image, "eng", builder)
+        self.assertEqual(builder.rejected_words, {"confidence": 1, "size": 0})
+        builder = builders.WordBoxBuilder(min_confidence=50)
+        self.assertEqual(image_to_string(self.image, "eng", builder), boxes)
+        self.assertEqual(len(g_calls), 1)
+        self.assertEqual(builder.rejected_words, {"confidence": 1, "size": 0})
+        # counts added up, as when the builder reads another result
+        self.assertEqual(image_to_string(self.image, "eng", builder), boxes)
+        self.assertEqual(builder.rejected_words, {"confidence": 2, "size": 0})
+
+    def test_same_pixels(self):
+        # same pixels, other file format
+        image = self.image.convert("RGB")
+        image_to_string(image)
+        for file_format in ("BMP", "TIFF"):
+            image_file = io.BytesIO()
+            image.save(image_file, file_format)
+            image_file.seek(0)
+            self.assertEqual(image_to_string(image_file), u"text 1")
+            # file objects are given as-is to the tool
+            self.assertEqual(image_file.tell(), 0)
+        self.assertEqual(len(g_calls), 1)
+
+    def test_multi_page(self):
+        # the tools read all the pages of the files given as-is
+        first_page = self.image.convert("L")
+        paths = []
+        for color in (0, 255):
+            path = os.path.join(self.tmp_dir, "doc%d.tiff" % color)
+            first_page.save(path, "TIFF", save_all=True, append_images=[
+                Image.new("L", first_page.size, color)
+            ])
+            paths.append(path)
+        self.assertEqual(image_to_string(paths[0]), u"text 1")
+        self.assertEqual(image_to_string(paths[1]), u"text 2")
+        with open(paths[1], 'rb') as file_descriptor:
+            self.assertEqual(image_to_string(file_descriptor), u"text 2")
+        self.assertEqual(len(g_calls), 2)
+
+    def test_miss(self):
+        image_to_string(self.image, "eng")
+        image_to_string(self.image, "fra")
+        image_to_string(self.image.convert("L"), "eng")
+        image_to_string(self.image.rotate(90), "eng")
+        image_to_string(self.image, "eng", builders.DigitBuilder())
+        builder = builders.TextBuilder(tesseract_layout=6)
+        image_to_string(self.image, "eng", builder)
+        builder = builders.WordBoxBuilder(min_confidence=50)
+        image_to_string(self.image, "eng", builder)
+        self.assertEqual(len(g_calls), 7)
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_eviction(self):
+        images = [Image.new("L", (10, 10), color) for color in range(10)]
+        image_to_string(images[0])
+        (nb_results, size) = self.cache.get_size()
+        self.assertEqual(nb_results, 1)
+        self.cache.max_size = 3 * size
+        for image in images[1:4]:
+            image_to_string(image)
+        self.assertEqual(self.cache.get_size()[0], 3)
+        # least recently used: images[1] (images[0] has been dropped)
+        image_to_string(images[2])
+        image_to_string(images[4])
+        del g_calls[:]
+        for image in (images[2], images[3], images[4]):
+            image_to_string(image)
+        self.assertEqual(g_calls, [])
+        image_to_string(images[1])
+        self.assertEqual(len(g_calls), 1)
+        self.cache.clear()
+        self.assertEqual(self.cache.get_size(), (0, 0))
+
+    def test_unreadable(self):
+        image_to_string(self.image)
+        for data in (
+                b"not zlib",
+                zlib.compress(b""),  # EOFError
+                zlib.compress(b"cpyocr.builders\nRenamedBox\n."),
+                zlib.compress(b"cnot_a_pyocr_module\nBox\n."),
+        ):
+            connection = sqlite3.connect(self.cache.path)
+            with connection:
+                connection.execute("UPDATE results SET data = ?",
+                                   (sqlite3.Binary(data),))
+            connection.close()
+            del g_calls[:]
+            # unreadable result dropped: the OCR runs again
+            self.assertEqual(image_to_string(self.image), u"text 1")
+            self.assertEqual(len(g_calls), 1)
+            self.assertEqual(image_to_string(self.image), u"text 1")
+            self.assertEqual(len(g_calls), 1)
+            self.assertEqual(self.cache.get_size()[0], 1)
+
+    def tearDown(self):
+        cache.set_cache(None)
+        shutil.rmtree(self.tmp_dir)
+
+
+class TestEventCache(unittest.TestCase):
+    """
+    These tests make sure that builders get the same results from the
+    events stored in the cache as from the OCR.
+    """
+    def setUp(self):
+        self.cache = cache.EventCache()
+        cache.set_event_cache(self.cache)
+        self.image = Image.new("L", (60, 30), 255)
+        del g_calls[:]
+
+    def test_replay(self):
+        # same page segmentation mode for all of them
+        builder_types = [
+            lambda: builders.TextBuilder(tesseract_layout=1),
+            builders.WordBoxBuilder,
+            builders.LineBoxBuilder,
+            builders.BlockBuilder,
+        ]
+        results = [_replay(builder_type(), self.image)
+                   for builder_type in builder_types]
+        self.assertEqual(len(g_calls), 1)
+        self.assertEqual(self.cache.hits, len(builder_types) - 1)
+        self.assertEqual(results[0], u"Hello world\nagain")
+        self.assertEqual(len(results[1]), 3)
+        self.assertEqual(len(results[2]), 2)
+        # same results without the cache
+        cache.set_event_cache(None)
+        for (builder_type, result) in zip(builder_types, results):
+            self.assertEqual(_replay(builder_type(), self.image), result)
+        # builder options are applied on the events from the cache
+        cache.set_event_cache(self.cache)
+        builder = builders.WordBoxBuilder(min_confidence=50)
+        self.assertEqual(len(_replay(builder, self.image)), 2)
+        self.assertEqual(builder.rejected_words['confidence'], 1)
+        self.assertEqual(len(g_calls), len(builder_types) + 1)
+
+    def test_custom_builder(self):
+        expected = [u"Hello", u"world", u"again"]
+        self.assertEqual(_replay(_WordListBuilder(), self.image), expected)
+        self.assertEqual(_replay(_WordListBuilder(), self.image), expected)
+        self.assertEqual(len(g_calls), 1)
+
+    def test_miss(self):
+        _replay(builders.TextBuilder(), self.image)
+        _replay(builders.TextBuilder(), self.image, "fra")
+        _replay(builders.DigitBuilder(), self.image)
+        _replay(builders.TextBuilder(tesseract_layout=6), self.image)
+        _replay(builders.TextBuilder(), Image.new("L", (60, 30), 0))
+        self.assertEqual(len(g_calls), 5)
+        # generator closed before the end: nothing stored
+        results = _iter_results(Image.new("L", (60, 30), 1), "eng",
+                                builders.TextBuilder())
+        next(results)
+        results.close()
+        self.assertEqual(len(self.cache), 5)
+
+    def test_eviction(self):
+        images = [Image.new("L", (60, 30), color) for color in range(10)]
+        _replay(builders.TextBuilder(), images[0])
+        size = self.cache.size
+        self.assertTrue(size > 0)
+        self.cache.max_size = 3 * size
+        for image in images[1:4]:
+            _replay(builders.TextBuilder(), image)
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(self.cache.size, 3 * size)
+        # least recently used: images[1] (images[0] has been dropped)
+        _replay(builders.TextBuilder(), images[2])
+        _replay(builders.TextBuilder(), images[4])
+        del g_calls[:]
+        for image in (images[2], images[3], images[4]):
+            _replay(builders.TextBuilder(), image)
+        self.assertEqual(g_calls, [])
+        _replay(builders.TextBuilder(), images[1])
+        self.assertEqual(len(g_calls), 1)
+        self.cache.clear()
+        self.assertEqual((len(self.cache), self.cache.size), (0, 0))
+
+    def tearDown(self):
+        cache.set_event_cache(None)
+
+
+def get_all_tests():
+    all_tests = unittest.TestSuite()
+
+    test_names = [
+        'test_no_cache',
+        'test_hit',
+        'test_rejected_words',
+        'test_same_pixels',
+        'test_multi_page',
+        'test_miss',
+        'test_eviction',
+        'test_unreadable',
+    ]
+    tests = unittest.TestSuite(map(TestResultCache, test_names))
+    all_tests.addTest(tests)
+
+    test_names = [
+        'test_replay',
+        'test_custom_builder',
+        'test_miss',
+        'test_eviction',
+    ]
+    tests = unittest.TestSuite(map(TestEventCache, test_names))
+    all_tests.addTest(tests)
+
+    return all_tests
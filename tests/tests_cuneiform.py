@@ -4,6 +4,7 @@ import tempfile
 
 import unittest
 
+from pyocr import builders
 from pyocr import cuneiform
 from . import tests_base as base
 
@@ -129,6 +130,54 @@ class TestWordBox(base.BaseTestWordBox, BaseCuneiform, unittest.TestCase):
             os.remove(tmp_path)
 
 
+class TestLineBox(base.BaseTestLineBox, BaseCuneiform, unittest.TestCase):
+    """
+    These tests make sure that cuneiform line box handling works fine.
+    """
+    def setUp(self):
+        super(TestLineBox, self).setUp()
+        self.tool = cuneiform
+        self.set_builder()
+
+    def _read_from_img(self, image_path, lang=None):
+        lines = self.tool.image_to_string(
+            base.Image.open(image_path),
+            lang=lang,
+            builder=self._builder
+        )
+        lines.sort()
+        return lines
+
+    def test_basic(self):
+        self._test_txt('test.png', 'test.lines')
+
+    def test_european(self):
+        self._test_txt('test-european.jpg', 'test-european.lines')
+
+    def test_french(self):
+        self._test_txt('test-french.jpg', 'test-french.lines', 'fra')
+
+
+class TestStdout(unittest.TestCase):
+    """
+    These tests make sure that the output of Cuneiform read from its standard
+    output gives the same results as when read from a file.
+    """
+    def test_builders(self):
+        if not cuneiform.OUTPUT_TO_STDOUT:
+            self.skipTest("Output to stdout not supported")
+        path = os.path.join("tests", "output", "specific", "cuneiform",
+                            "test-french.lines")
+        for builder_cls in (builders.TextBuilder, builders.WordBoxBuilder,
+                            builders.LineBoxBuilder):
+            with codecs.open(path, 'r', encoding='utf-8') as file_descriptor:
+                expected = builder_cls().read_file(file_descriptor)
+            # 'cat' instead of Cuneiform
+            results = cuneiform._run_to_stdout(["cat", path], None,
+                                               builder_cls())
+            self.assertEqual(results, expected)
+
+
 class TestOrientation(unittest.TestCase):
     def test_can_detect_orientation(self):
         self.assertFalse(cuneiform.can_detect_orientation())
@@ -162,12 +211,26 @@ def get_all_tests():
     tests = unittest.TestSuite(map(TestWordBox, test_names))
     all_tests.addTest(tests)
 
+    test_names = [
+        'test_basic',
+        'test_european',
+        'test_french',
+    ]
+    tests = unittest.TestSuite(map(TestLineBox, test_names))
+    all_tests.addTest(tests)
+
     test_names = [
         'test_digits_not_implemented'
     ]
     tests = unittest.TestSuite(map(TestDigit, test_names))
     all_tests.addTest(tests)
 
+    test_names = [
+        'test_builders',
+    ]
+    tests = unittest.TestSuite(map(TestStdout, test_names))
+    all_tests.addTest(tests)
+
     test_names = [
         'test_can_detect_orientation',
     ]
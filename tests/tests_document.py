@@ -0,0 +1,159 @@
+import gc
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import weakref
+
+from PIL import Image
+
+from pyocr import builders
+from pyocr import document
+
+
+class FakeTool(object):
+    def __init__(self):
+        self.builders = []
+
+    def image_to_string(self, image, lang=None, builder=None):
+        self.builders.append(builder)
+        return (image.getpixel((0, 0)), lang)
+
+
+class TestDocument(unittest.TestCase):
+    """
+    These tests make sure that the pages are all read, in order, and that no
+    more than 'max_pages' pages are decoded at once.
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.colors = [0, 50, 100, 150, 200]
+        self.pages = [Image.new("L", (40, 30), color)
+                      for color in self.colors]
+        self.path = os.path.join(self.tmp_dir, "document.tiff")
+        self.pages[0].save(self.path, save_all=True,
+                           append_images=self.pages[1:])
+
+    def _get_colors(self, pages):
+        return [page.getpixel((0, 0)) for page in pages]
+
+    def test_multi_page(self):
+        self.assertEqual(self._get_colors(document.iter_pages(self.path)),
+                         self.colors)
+        with open(self.path, 'rb') as file_descriptor:
+            pages = document.iter_pages(file_descriptor, max_pages=1)
+            self.assertEqual(self._get_colors(pages), self.colors)
+        with Image.open(self.path) as image:
+            pages = document.iter_pages(image, max_pages=3)
+            self.assertEqual(self._get_colors(pages), self.colors)
+        # single page
+        self.assertEqual(self._get_colors(document.iter_pages(self.pages[2])),
+                         [self.colors[2]])
+
+    def test_page_list(self):
+        paths = []
+        for (idx, page) in enumerate(self.pages):
+            paths.append(os.path.join(self.tmp_dir, "page%d.png" % idx))
+            page.save(paths[-1])
+        self.assertEqual(self._get_colors(document.iter_pages(paths)),
+                         self.colors)
+        pages = document.iter_pages(self.pages[:2] + paths[2:])
+        self.assertEqual(self._get_colors(pages), self.colors)
+        self.assertEqual(list(document.iter_pages([])), [])
+
+    def test_max_pages(self):
+        for max_pages in (1, 2, 4):
+            decoded = []
+
+            def decode():
+                for page in self.pages:
+                    decoded.append(page)
+                    yield page
+
+            pages = document.iter_pages(decode(), max_pages=max_pages)
+            next(pages)
+            time.sleep(0.2)
+            self.assertEqual(len(decoded), max_pages)
+            next(pages)
+            time.sleep(0.2)
+            self.assertEqual(len(decoded), max_pages + 1)
+            pages.close()
+        self.assertRaises(ValueError, document.iter_pages, self.path, 0)
+
+    def test_live_pages(self):
+        for max_pages in (1, 2, 3):
+            refs = []
+            alive = []
+
+            def decode():
+                for color in self.colors:
+                    page = Image.new("L", (40, 30), color)
+                    refs.append(weakref.ref(page))
+                    gc.collect()
+                    alive.append(len([ref for ref in refs
+                                      if ref() is not None]))
+                    yield page
+
+            pages = document.iter_pages(decode(), max_pages=max_pages)
+            for color in self.colors:
+                page = next(pages)
+                self.assertEqual(page.getpixel((0, 0)), color)
+                time.sleep(0.05)
+                # the caller is done with the page before asking for the next
+                page = None
+            self.assertEqual(list(pages), [])
+            self.assertEqual(len(alive), len(self.colors))
+            self.assertTrue(max(alive) <= max_pages,
+                            "%d pages alive with max_pages=%d" % (
+                                max(alive), max_pages))
+
+    def test_frame_restored(self):
+        with Image.open(self.path) as image:
+            image.seek(2)
+            pages = document.iter_pages(image)
+            self.assertEqual(self._get_colors(pages), self.colors)
+            self.assertEqual(image.tell(), 2)
+
+    def test_errors(self):
+        pages = document.iter_pages(
+            [self.pages[0], os.path.join(self.tmp_dir, "missing.png")]
+        )
+        self.assertEqual(next(pages).getpixel((0, 0)), self.colors[0])
+        self.assertRaises(IOError, next, pages)
+
+    def test_results(self):
+        tool = FakeTool()
+        builder = builders.LineBoxBuilder()
+        results = document.iter_results(tool, self.path, lang="fra",
+                                        builder=builder)
+        self.assertEqual(list(results),
+                         [(color, "fra") for color in self.colors])
+        # each page gets its own builder, with the same options
+        self.assertEqual(len(set(id(page_builder)
+                                 for page_builder in tool.builders)),
+                         len(self.colors))
+        self.assertTrue(builder not in tool.builders)
+        self.assertEqual(tool.builders[0].tesseract_layout,
+                         builder.tesseract_layout)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+
+def get_all_tests():
+    all_tests = unittest.TestSuite()
+
+    test_names = [
+        'test_multi_page',
+        'test_page_list',
+        'test_max_pages',
+        'test_live_pages',
+        'test_frame_restored',
+        'test_errors',
+        'test_results',
+    ]
+    tests = unittest.TestSuite(map(TestDocument, test_names))
+    all_tests.addTest(tests)
+
+    return all_tests
@@ -0,0 +1,156 @@
+import os
+import unittest
+
+from pyocr import builders
+from . import tests_base as base
+
+
+def _iou(position_a, position_b):
+    ((ax1, ay1), (ax2, ay2)) = position_a
+    ((bx1, by1), (bx2, by2)) = position_b
+    inter = (max(min(ax2, bx2) - max(ax1, bx1), 0) *
+             max(min(ay2, by2) - max(ay1, by1), 0))
+    total = (ax2 - ax1) * (ay2 - ay1) + (bx2 - bx1) * (by2 - by1) - inter
+    return float(inter) / total if total > 0 else 0.0
+
+
+class TestGeometry(unittest.TestCase):
+    """
+    These tests make sure that the NumPy geometry gives the same results as
+    the same computations done box by box.
+    """
+    def setUp(self):
+        try:
+            from pyocr import geometry
+        except ImportError:
+            self.skipTest("NumPy not available")
+        self.geometry = geometry
+        self.lines = base.read_hocr(
+            builders.LineBoxBuilder(),
+            os.path.join("tests", "output", "specific", "tesseract",
+                         "test.lines")
+        )
+        self.words = [box for line in self.lines for box in line.word_boxes]
+
+    def test_round_trip(self):
+        geometry = self.geometry
+        positions = geometry.to_array(self.words)
+        self.assertEqual(positions.shape, (len(self.words), 4))
+        self.assertEqual(geometry.from_array(self.words, positions),
+                         self.words)
+        box_array = builders.BoxArray(self.words)
+        self.assertEqual(geometry.to_array(box_array).tolist(),
+                         positions.tolist())
+        result = geometry.from_array(box_array, positions + 1)
+        self.assertTrue(isinstance(result, builders.BoxArray))
+        self.assertEqual(result[0].position[0],
+                         (self.words[0].position[0][0] + 1,
+                          self.words[0].position[0][1] + 1))
+        self.assertEqual(result[0].content, self.words[0].content)
+        self.assertRaises(ValueError, geometry.from_array, self.words,
+                          positions[1:])
+
+    def test_transform(self):
+        geometry = self.geometry
+        lines = geometry.transform(self.lines, geometry.scaling(2))
+        for (line, expected) in zip(lines, self.lines):
+            ((x1, y1), (x2, y2)) = expected.position
+            self.assertEqual(line.position, ((2 * x1, 2 * y1),
+                                             (2 * x2, 2 * y2)))
+            self.assertEqual(line.content, expected.content)
+            self.assertEqual(len(line.word_boxes), len(expected.word_boxes))
+            self.assertEqual(type(line.position[0][0]), int)
+        lines = geometry.transform(lines, geometry.scaling(0.5))
+        self.assertEqual([line.position for line in lines],
+                         [line.position for line in self.lines])
+        self.assertEqual([line.word_boxes for line in lines],
+                         [line.word_boxes for line in self.lines])
+
+        matrix = geometry.translation(5, -3).dot(
+            geometry.rotation(90, (100, 200))
+        )
+        self.assertEqual(
+            geometry.transform_positions([[100, 200, 110, 220]],
+                                         matrix).tolist(),
+            [[105, 187, 125, 197]]
+        )
+        words = geometry.transform(self.words, geometry.rotation(90))
+        words = geometry.transform(words, geometry.rotation(-90))
+        self.assertEqual(words, self.words)
+
+    def test_iou(self):
+        geometry = self.geometry
+        positions = geometry.to_array(self.words)
+        shifted = positions + [5, 3, 5, 3]
+        iou = geometry.iou_matrix(positions, shifted)
+        self.assertEqual(iou.shape, (len(self.words), len(self.words)))
+        for (idx_a, box_a) in enumerate(self.words):
+            for (idx_b, box_b) in enumerate(self.words):
+                ((x1, y1), (x2, y2)) = box_b.position
+                shifted_position = ((x1 + 5, y1 + 3), (x2 + 5, y2 + 3))
+                self.assertAlmostEqual(iou[idx_a, idx_b],
+                                       _iou(box_a.position, shifted_position))
+
+        inter = geometry.intersection(positions, shifted)
+        union = geometry.union(positions, shifted)
+        self.assertEqual(inter[0].tolist(),
+                         (positions[0] + [5, 3, 0, 0]).tolist())
+        self.assertEqual(union[0].tolist(),
+                         (positions[0] + [0, 0, 5, 3]).tolist())
+        self.assertEqual(geometry.bounding_box(positions).tolist(), [
+            min(box.position[0][0] for box in self.words),
+            min(box.position[0][1] for box in self.words),
+            max(box.position[1][0] for box in self.words),
+            max(box.position[1][1] for box in self.words),
+        ])
+
+    def test_nms(self):
+        geometry = self.geometry
+        positions = geometry.to_array(self.words)
+        # each word twice: slightly shifted and with a lower score
+        duplicates = positions + 1
+        all_positions = list(positions) + list(duplicates)
+        scores = [90] * len(positions) + [50] * len(positions)
+        kept = geometry.nms(all_positions, scores, max_iou=0.5)
+        self.assertEqual(sorted(kept.tolist()), list(range(len(positions))))
+        kept = geometry.nms(all_positions, scores, max_iou=1.0)
+        self.assertEqual(len(kept), 2 * len(positions))
+
+    def test_merge_overlapping(self):
+        geometry = self.geometry
+        positions = [
+            [0, 0, 10, 10],
+            [100, 0, 110, 10],
+            [5, 5, 20, 20],  # overlaps the first box
+            [15, 15, 30, 30],  # overlaps the third box
+            [200, 200, 210, 210],
+        ]
+        (merged, labels) = geometry.merge_overlapping(positions)
+        self.assertEqual(merged.tolist(), [
+            [0, 0, 30, 30], [100, 0, 110, 10], [200, 200, 210, 210],
+        ])
+        self.assertEqual(labels.tolist(), [0, 1, 0, 0, 2])
+        # IoU of the first box with the third one: 25 / 300, of the third
+        # box with the fourth one: 25 / 425
+        (merged, labels) = geometry.merge_overlapping(positions,
+                                                      min_iou=0.07)
+        self.assertEqual(labels.tolist(), [0, 1, 0, 2, 3])
+        positions = geometry.to_array(self.words)
+        self.assertEqual(len(geometry.merge_overlapping(positions)[0]),
+                         len(self.words))
+
+
+def get_all_tests():
+    all_tests = unittest.TestSuite()
+
+    test_names = [
+        'test_round_trip',
+        'test_transform',
+        'test_iou',
+        'test_nms',
+        'test_merge_overlapping',
+    ]
+    tests = unittest.TestSuite(map(TestGeometry, test_names))
+    all_tests.addTest(tests)
+
+    return all_tests
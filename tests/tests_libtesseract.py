@@ -175,6 +175,12 @@ class TestWordBox(base.BaseTestWordBox, BaseLibtesseract, unittest.TestCase):
         finally:
             os.remove(tmp_path)
 
+    def test_iter_words(self):
+        image_path = self._path_to_img("test.png")
+        expected = self._read_from_img(image_path)
+        boxes = list(libtesseract.iter_words(base.Image.open(image_path)))
+        self._test_equal(boxes, expected)
+
 
 class TestLineBox(base.BaseTestLineBox, BaseLibtesseract, unittest.TestCase):
     """
@@ -214,6 +220,23 @@ class TestLineBox(base.BaseTestLineBox, BaseLibtesseract, unittest.TestCase):
         finally:
             os.remove(tmp_path)
 
+    def test_iter_lines(self):
+        image_path = self._path_to_img("test.png")
+        expected = self._read_from_img(image_path)
+        lines = list(libtesseract.iter_lines(base.Image.open(image_path)))
+        self._test_equal(lines, expected)
+
+    def test_blocks(self):
+        image_path = self._path_to_img("test.png")
+        expected = self._read_from_img(image_path)
+        blocks = libtesseract.image_to_string(
+            base.Image.open(image_path), builder=builders.BlockBuilder()
+        )
+        self.assertTrue(len(blocks) > 0)
+        lines = [line for block in blocks for line in block.iter_lines()
+                 if line.content != u""]
+        self._test_equal(lines, expected)
+
 
 class TestDigitLineBox(base.BaseTestDigitLineBox, BaseLibtesseract,
                        unittest.TestCase):
@@ -306,9 +329,12 @@ def get_all_tests():
         'test_japanese',
         'test_write_read',
     ]
-    tests = unittest.TestSuite(map(TestWordBox, test_names))
+    tests = unittest.TestSuite(map(TestWordBox,
+                                   test_names + ['test_iter_words']))
     all_tests.addTest(tests)
-    tests = unittest.TestSuite(map(TestLineBox, test_names))
+    tests = unittest.TestSuite(map(TestLineBox,
+                                   test_names + ['test_iter_lines',
+                                                 'test_blocks']))
     all_tests.addTest(tests)
 
     test_names = [
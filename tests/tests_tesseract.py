@@ -1,3 +1,4 @@
+import io
 import os
 import codecs
 import tempfile
@@ -132,6 +133,74 @@ class TestCharBox(base.BaseTestBox, BaseTesseract, unittest.TestCase):
             os.remove(tmp_path)
 
 
+class TestCharBoxFile(unittest.TestCase):
+    """
+    These tests make sure that box files are read and written the same way
+    with or without BoxArray.
+    """
+    def _path(self, file_name):
+        return os.path.join("tests", "output", "specific", "tesseract",
+                            file_name)
+
+    def _read(self, file_name):
+        with codecs.open(self._path(file_name), 'r',
+                         encoding='utf-8') as fdescriptor:
+            return fdescriptor.read()
+
+    def test_read_box_array(self):
+        for file_name in ('test.box', 'test-european.box',
+                          'test-japanese.box'):
+            with codecs.open(self._path(file_name), 'r',
+                             encoding='utf-8') as fdescriptor:
+                boxes = tesseract.CharBoxBuilder.read_file(fdescriptor)
+            with codecs.open(self._path(file_name), 'r',
+                             encoding='utf-8') as fdescriptor:
+                box_array = tesseract.CharBoxBuilder.read_box_array(
+                    fdescriptor
+                )
+            self.assertTrue(len(boxes) > 0)
+            self.assertEqual(box_array.to_boxes(), boxes)
+
+    def test_malformed(self):
+        data = (
+            u"a 1 2 3 4 0\r\n"
+            u"\n"
+            u"b 5 6 7 8\n"
+            u"c 9 10 11 12 0 extra\n"
+        )
+        boxes = tesseract.CharBoxBuilder.read_file(io.StringIO(data))
+        self.assertEqual([box.content for box in boxes], [u"a", u"c"])
+        self.assertEqual(boxes[1].position, ((9, 10), (11, 12)))
+
+    def test_write(self):
+        for file_name in ('test.box', 'test-european.box'):
+            data = self._read(file_name)
+            boxes = tesseract.CharBoxBuilder.read_file(io.StringIO(data))
+            box_array = tesseract.CharBoxBuilder.read_box_array(
+                io.StringIO(data)
+            )
+            for source in (boxes, box_array):
+                output = io.StringIO()
+                tesseract.CharBoxBuilder.write_file(output, source)
+                self.assertEqual(output.getvalue(), data)
+
+    def test_to_numpy(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest("NumPy not available")
+        with codecs.open(self._path('test.box'), 'r',
+                         encoding='utf-8') as fdescriptor:
+            box_array = tesseract.CharBoxBuilder.read_box_array(fdescriptor)
+        (positions, confidences, contents) = box_array.to_numpy()
+        self.assertEqual(positions.shape, (len(box_array), 4))
+        self.assertEqual(positions.dtype, numpy.int32)
+        for (idx, box) in enumerate(box_array):
+            self.assertEqual(tuple(positions[idx]),
+                             box.position[0] + box.position[1])
+            self.assertEqual(box_array.strings[contents[idx]], box.content)
+
+
 class TestDigit(base.BaseTestDigit, BaseTesseract, unittest.TestCase):
     """
     These tests make sure that Tesseract digits handling works fine.
@@ -245,6 +314,23 @@ class TestOrientation(BaseTesseract, unittest.TestCase):
         result = tesseract.detect_orientation(img, lang='eng')
         self.assertEqual(result['angle'], 90)
 
+    def test_orientation_path(self):
+        result = tesseract.detect_orientation(
+            self._path_to_img("test-90.png"), lang='eng'
+        )
+        self.assertEqual(result['angle'], 90)
+
+    def test_orientations(self):
+        imgs = [
+            base.Image.open(self._path_to_img("test.png")),
+            self._path_to_img("test-90.png"),
+            base.Image.open(self._path_to_img("test-90.png")),
+        ]
+        results = tesseract.detect_orientations(imgs, lang='eng',
+                                                batch_size=2)
+        self.assertEqual([result['angle'] for result in results],
+                         [0, 90, 90])
+
 
 def get_all_tests():
     all_tests = unittest.TestSuite()
@@ -281,6 +367,15 @@ def get_all_tests():
     tests = unittest.TestSuite(map(TestLineBox, test_names))
     all_tests.addTest(tests)
 
+    test_names = [
+        'test_read_box_array',
+        'test_malformed',
+        'test_write',
+        'test_to_numpy',
+    ]
+    tests = unittest.TestSuite(map(TestCharBoxFile, test_names))
+    all_tests.addTest(tests)
+
     test_names = [
         'test_digits'
     ]
@@ -293,6 +388,8 @@ def get_all_tests():
         'test_can_detect_orientation',
         'test_orientation_0',
         'test_orientation_90',
+        'test_orientation_path',
+        'test_orientations',
     ]
     tests = unittest.TestSuite(map(TestOrientation, test_names))
     all_tests.addTest(tests)
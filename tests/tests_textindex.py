@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyocr import boxfile
+from pyocr import builders
+from pyocr import textindex
+from pyocr import PyocrException
+from . import tests_base as base
+
+
+class TestTextIndex(unittest.TestCase):
+    """
+    These tests make sure that the index finds the same words as going
+    through the boxes of each page.
+    """
+    lines_path = os.path.join("tests", "output", "specific", "tesseract",
+                              "test.lines")
+    words_path = os.path.join("tests", "output", "specific", "tesseract",
+                              "test-european.words")
+
+    def setUp(self):
+        self.lines = base.read_hocr(builders.LineBoxBuilder(), self.lines_path)
+        self.words = base.read_hocr(builders.WordBoxBuilder(), self.words_path)
+        self.pages = [self.words, self.lines, [], self.lines[:3]]
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "results.idx")
+        with open(self.path, 'wb') as file_descriptor:
+            textindex.dump(self.pages, file_descriptor)
+
+    def _search(self, query, prefix=False):
+        """
+        Linear search: the expected results
+        """
+        tokens = textindex.tokenize(query)
+        hits = []
+        with boxfile.BoxFile(boxfile.dumps(self.pages)) as box_file:
+            for page_idx in range(len(box_file)):
+                page_tokens = [
+                    (word_idx, token)
+                    for (word_idx, box) in enumerate(
+                        box_file.get_words(page_idx)
+                    )
+                    for token in textindex.tokenize(box.content)
+                ]
+                for idx in range(len(page_tokens) - len(tokens) + 1):
+                    found = page_tokens[idx:idx + len(tokens)]
+                    if all(token == expected for ((_, token), expected) in
+                           zip(found[:-1], tokens[:-1])) and (
+                               found[-1][1].startswith(tokens[-1])
+                               if prefix else found[-1][1] == tokens[-1]):
+                        hits.append((page_idx, found[0][0], found[-1][0]))
+        return hits
+
+    def test_tokenize(self):
+        self.assertEqual(textindex.tokenize(u"L'\xe9t\xe9, d\xe9j\xe0!"),
+                         [u"l", u"ete", u"deja"])
+        self.assertEqual(textindex.tokenize(u" -- "), [])
+
+    def test_search(self):
+        with textindex.TextIndex(self.path) as index:
+            self.assertEqual(len(index), 4)
+            for query in (u"the", u"The", u"OCR", u"that", u"not-a-word",
+                          u"is the", u"this is a", u"the the"):
+                expected = self._search(query)
+                self.assertEqual(index.search(query), expected)
+            self.assertTrue(len(index.search(u"the")) > 3)
+            self.assertTrue(len(index.search(u"this is a")) > 0)
+            self.assertEqual(index.search(u"the", max_hits=3),
+                             self._search(u"the")[:3])
+            self.assertEqual(index.search(u""), [])
+
+    def test_prefix(self):
+        with textindex.TextIndex(self.path) as index:
+            for query in (u"th*", u"this is a*", u"z*"):
+                expected = self._search(query, prefix=True)
+                self.assertEqual(index.search(query), expected)
+            terms = index.get_terms(u"th")
+            self.assertTrue(u"the" in terms)
+            self.assertEqual(terms, sorted(terms))
+
+    def test_highlight(self):
+        # hits point to the boxes of the words
+        with textindex.TextIndex(self.path) as index:
+            (page_idx, first_word, last_word) = index.search(u"the")[0]
+        with boxfile.BoxFile(boxfile.dumps(self.pages)) as box_file:
+            words = box_file.get_words(page_idx).to_boxes()
+        self.assertEqual(textindex.tokenize(words[first_word].content),
+                         [u"the"])
+        self.assertEqual(first_word, last_word)
+
+    def test_invalid(self):
+        data = textindex.dumps(self.pages)
+        self.assertRaises(PyocrException, textindex.TextIndex,
+                          b"not an index")
+        self.assertRaises(PyocrException, textindex.TextIndex,
+                          data[:8] + b"\xff" + data[9:])
+        self.assertRaises(PyocrException, textindex.TextIndex, data[:40])
+        self.assertRaises(PyocrException, textindex.TextIndex,
+                          boxfile.dumps(self.pages))
+
+    def test_close(self):
+        index = textindex.TextIndex(self.path)
+        mapping = index._TextIndex__mmap
+        self.assertTrue(len(index.search(u"the")) > 0)
+        index.close()
+        self.assertTrue(mapping.closed)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+
+def get_all_tests():
+    all_tests = unittest.TestSuite()
+
+    test_names = [
+        'test_tokenize',
+        'test_search',
+        'test_prefix',
+        'test_highlight',
+        'test_invalid',
+        'test_close',
+    ]
+    tests = unittest.TestSuite(map(TestTextIndex, test_names))
+    all_tests.addTest(tests)
+
+    return all_tests
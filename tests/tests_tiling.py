@@ -0,0 +1,151 @@
+import random
+import unittest
+
+from PIL import Image
+from PIL import ImageDraw
+
+from pyocr import builders
+from pyocr import tiling
+
+
+class FakeTool(object):
+    """
+    Words are rectangles, each one of its own color: finds their boxes in
+    the tiles. Words cut by the border of the tile get a low confidence.
+    """
+    def __init__(self):
+        self.tile_sizes = []
+
+    def image_to_string(self, image, lang=None, builder=None):
+        assert isinstance(builder, builders.WordBoxBuilder)
+        self.tile_sizes.append(image.size)
+        words = []
+        for (_, color) in sorted(image.getcolors(256)):
+            if color == 0:
+                continue
+            mask = image.point(lambda value: 255 if value == color else 0)
+            (x1, y1, x2, y2) = mask.getbbox()
+            cut = (x1 == 0 or y1 == 0 or x2 == image.size[0] or
+                   y2 == image.size[1])
+            words.append(builders.Box(u"word%d" % color,
+                                      ((x1, y1), (x2, y2)),
+                                      40 if cut else 90))
+        words.sort(key=lambda box: (box.position[0][1], box.position[0][0]))
+        return words
+
+
+class TestTiling(unittest.TestCase):
+    """
+    These tests make sure that each word is found once, at its position in
+    the image, whatever the tiles.
+    """
+    def setUp(self):
+        rand = random.Random(0)
+        self.image = Image.new("L", (1000, 700), 0)
+        draw = ImageDraw.Draw(self.image)
+        self.words = []
+        color = 1
+        for y in range(20, 680, 40):
+            x = 10 + rand.randint(0, 20)
+            while color < 256:
+                width = rand.randint(30, 90)
+                if x + width > 990:
+                    break
+                position = ((x, y), (x + width, y + 20))
+                # rectangle(): last pixel included
+                draw.rectangle((x, y, x + width - 1, y + 19), fill=color)
+                self.words.append(builders.Box(u"word%d" % color, position,
+                                               90))
+                color += 1
+                x += width + rand.randint(10, 25)
+
+    def _get_words(self, boxes):
+        return sorted((box.content, box.position) for box in boxes)
+
+    def test_get_tiles(self):
+        for (size, tile_size, overlap) in (((1000, 700), 300, 100),
+                                           ((1000, 700), 2000, 100),
+                                           ((257, 1000), 64, 0)):
+            tiles = tiling.get_tiles(size, tile_size, overlap)
+            coverage = Image.new("L", size, 0)
+            for (((x1, y1), (x2, y2)), core) in tiles:
+                self.assertTrue(x2 - x1 <= tile_size)
+                self.assertTrue(y2 - y1 <= tile_size)
+                ((cx1, cy1), (cx2, cy2)) = core
+                self.assertTrue(x1 <= cx1 < cx2 <= x2)
+                self.assertTrue(y1 <= cy1 < cy2 <= y2)
+                coverage.paste(coverage.crop((cx1, cy1, cx2, cy2)).point(
+                    lambda value: value + 1
+                ), (cx1, cy1))
+            # each pixel belongs to one tile
+            self.assertEqual(coverage.getextrema(), (1, 1))
+        self.assertEqual(len(tiling.get_tiles((1000, 700), 2000, 100)), 1)
+        self.assertRaises(ValueError, tiling.get_tiles, (1000, 700), 100,
+                          100)
+
+    def test_words(self):
+        expected = self._get_words(self.words)
+        self.assertEqual(self._get_words(FakeTool().image_to_string(
+            self.image, builder=builders.WordBoxBuilder()
+        )), expected)
+        for (tile_size, overlap) in ((300, 100), (250, 120), (2000, 0)):
+            tool = FakeTool()
+            boxes = tiling.image_to_string(
+                tool, self.image, builder=builders.WordBoxBuilder(),
+                tile_size=tile_size, overlap=overlap, max_workers=4
+            )
+            self.assertEqual(self._get_words(boxes), expected)
+            self.assertTrue(all(width <= tile_size and height <= tile_size
+                                for (width, height) in tool.tile_sizes))
+        # overlap narrower than some words: words cut by the border of the
+        # tiles are still found once (but their boxes may be cut)
+        boxes = tiling.image_to_string(
+            FakeTool(), self.image, builder=builders.WordBoxBuilder(),
+            tile_size=300, overlap=40
+        )
+        self.assertEqual(sorted(box.content for box in boxes),
+                         sorted(box.content for box in self.words))
+
+    def test_deterministic(self):
+        results = [
+            tiling.image_to_string(
+                FakeTool(), self.image, builder=builders.WordBoxBuilder(),
+                tile_size=300, overlap=100, max_workers=max_workers
+            )
+            for max_workers in (1, 3, 8)
+        ]
+        for result in results[1:]:
+            self.assertEqual(result, results[0])
+
+    def test_builders(self):
+        lines = tiling.image_to_string(FakeTool(), self.image,
+                                       builder=builders.LineBoxBuilder(),
+                                       tile_size=300, overlap=100)
+        # one line for each row of words
+        self.assertEqual(len(lines), 17)
+        self.assertEqual(
+            self._get_words(box for line in lines for box in line.word_boxes),
+            self._get_words(self.words)
+        )
+        expected = [word.content for word in self.words]
+        txt = tiling.image_to_string(FakeTool(), self.image, tile_size=300,
+                                     overlap=100)
+        self.assertEqual(txt.split(), expected)
+        self.assertRaises(NotImplementedError, tiling.image_to_string,
+                          FakeTool(), self.image,
+                          builder=builders.BlockBuilder())
+
+
+def get_all_tests():
+    all_tests = unittest.TestSuite()
+
+    test_names = [
+        'test_get_tiles',
+        'test_words',
+        'test_deterministic',
+        'test_builders',
+    ]
+    tests = unittest.TestSuite(map(TestTiling, test_names))
+    all_tests.addTest(tests)
+
+    return all_tests
@@ -0,0 +1,186 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image
+
+from pyocr import util
+
+
+class TestImageFormat(unittest.TestCase):
+    """
+    These tests make sure the intermediate image format picked for the
+    shell tools matches the image mode.
+    """
+    def _choose(self, mode, size=(64, 64), image_format=None):
+        img = Image.new(mode, size)
+        return util.choose_image_format(img, image_format)
+
+    def test_bilevel(self):
+        (img, fmt) = self._choose("1")
+        self.assertEqual(img.mode, "1")
+        self.assertEqual(fmt, util.IMAGE_FORMATS["pnm"])
+
+    def test_grayscale(self):
+        (img, fmt) = self._choose("L")
+        self.assertEqual(img.mode, "L")
+        self.assertEqual(fmt, util.IMAGE_FORMATS["pnm"])
+        (img, fmt) = self._choose("LA")
+        self.assertEqual(img.mode, "L")
+
+    def test_color(self):
+        (img, fmt) = self._choose("RGB")
+        self.assertEqual(fmt, util.IMAGE_FORMATS["bmp"])
+        (img, fmt) = self._choose("RGBA")
+        self.assertEqual(img.mode, "RGB")
+        self.assertEqual(fmt, util.IMAGE_FORMATS["bmp"])
+
+    def test_forced(self):
+        (img, fmt) = self._choose("L", image_format="bmp")
+        self.assertEqual(img.mode, "L")
+        self.assertEqual(fmt, util.IMAGE_FORMATS["bmp"])
+        (img, fmt) = self._choose("CMYK", image_format="png")
+        self.assertEqual(img.mode, "RGB")
+        self.assertEqual(fmt, util.IMAGE_FORMATS["png"])
+
+    def test_forced_unsupported(self):
+        (img, fmt) = self._choose("RGB", image_format="tiff-g4")
+        self.assertEqual(img.mode, "RGB")
+        self.assertEqual(fmt, util.IMAGE_FORMATS["bmp"])
+
+    def test_save(self):
+        for (name, fmt) in util.IMAGE_FORMATS.items():
+            img = Image.new(fmt.modes[0], (32, 16))
+            output = io.BytesIO()
+            util.save_image(img, fmt, output)
+            output.seek(0)
+            reloaded = Image.open(output)
+            self.assertEqual(reloaded.size, (32, 16), name)
+
+
+class TestImageSource(unittest.TestCase):
+    """
+    These tests make sure image files are handed over as-is to the shell
+    tools when they can read them.
+    """
+    png_path = os.path.join("tests", "input", "specific", "test.png")
+    jpg_path = os.path.join("tests", "input", "specific", "test-french.jpg")
+
+    def test_guess_format(self):
+        with open(self.png_path, 'rb') as file_desc:
+            self.assertEqual(util.guess_image_format(file_desc.read(16)),
+                             "png")
+        with open(self.jpg_path, 'rb') as file_desc:
+            self.assertEqual(util.guess_image_format(file_desc.read(16)),
+                             "jpeg")
+        self.assertEqual(util.guess_image_format(b"P5\n640 480\n255\n"),
+                         "pnm")
+        self.assertEqual(util.guess_image_format(b"not an image"), None)
+
+    def test_path(self):
+        (image_format, image) = util.get_image_source(self.png_path,
+                                                      ("png",))
+        self.assertEqual(image_format, "png")
+        self.assertEqual(image, self.png_path)
+
+    def test_path_decoded(self):
+        (image_format, image) = util.get_image_source(self.jpg_path,
+                                                      ("png",))
+        self.assertEqual(image_format, None)
+        self.assertEqual(image.size, (200, 200))
+
+    def test_file_object(self):
+        with open(self.png_path, 'rb') as file_desc:
+            (image_format, image) = util.get_image_source(file_desc,
+                                                          ("png",))
+            self.assertEqual(image_format, "png")
+            self.assertEqual(image.tell(), 0)
+
+    def test_pillow_image(self):
+        img = Image.new("RGB", (8, 8))
+        self.assertEqual(util.get_image_source(img, ("png",)), (None, img))
+
+
+class TestWorkspace(unittest.TestCase):
+    """
+    These tests make sure the workspace of the shell tools is reused and
+    cleaned up.
+    """
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.workspace = util.Workspace(self.root)
+
+    def test_reused(self):
+        path = self.workspace.get_path()
+        self.assertTrue(os.path.isdir(path))
+        self.assertTrue(os.path.basename(path).startswith(
+            "tess_%d_" % os.getpid()
+        ))
+        files_a = self.workspace.get_files()
+        files_b = self.workspace.get_files()
+        self.assertNotEqual(files_a.get(".bmp"), files_b.get(".bmp"))
+        self.assertEqual(self.workspace.get_path(), path)
+
+    def test_cleanup(self):
+        with self.workspace.get_files() as files:
+            file_name = files.get(".txt")
+            open(file_name, 'w').close()
+            files.get(".missing")
+        self.assertFalse(os.path.exists(file_name))
+        path = self.workspace.get_path()
+        self.workspace.cleanup()
+        self.assertFalse(os.path.exists(path))
+
+    def test_reap(self):
+        # above the maximum PID on Linux: can't belong to a running process
+        stale = os.path.join(self.root, "tess_%d_abcd" % (2 ** 22 + 1))
+        os.mkdir(stale)
+        alive = os.path.join(self.root, "tess_%d_abcd" % os.getpid())
+        os.mkdir(alive)
+        other = os.path.join(self.root, "other")
+        os.mkdir(other)
+        self.workspace.get_path()
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(alive))
+        self.assertTrue(os.path.exists(other))
+
+    def tearDown(self):
+        self.workspace.cleanup()
+        shutil.rmtree(self.root)
+
+
+def get_all_tests():
+    all_tests = unittest.TestSuite()
+
+    test_names = [
+        'test_bilevel',
+        'test_grayscale',
+        'test_color',
+        'test_forced',
+        'test_forced_unsupported',
+        'test_save',
+    ]
+    tests = unittest.TestSuite(map(TestImageFormat, test_names))
+    all_tests.addTest(tests)
+
+    test_names = [
+        'test_guess_format',
+        'test_path',
+        'test_path_decoded',
+        'test_file_object',
+        'test_pillow_image',
+    ]
+    tests = unittest.TestSuite(map(TestImageSource, test_names))
+    all_tests.addTest(tests)
+
+    test_names = [
+        'test_reused',
+        'test_cleanup',
+        'test_reap',
+    ]
+    tests = unittest.TestSuite(map(TestWorkspace, test_names))
+    all_tests.addTest(tests)
+
+    return all_tests